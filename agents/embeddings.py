@@ -1,6 +1,4 @@
 import random
-import ollama
-import requests
 import json
 import re
 
@@ -9,6 +7,8 @@ USE_FAKE_EMBEDDINGS = True
 
 def check_ollama_connection():
     """Check if Ollama server is running."""
+    import requests  # imported lazily: only needed when talking to Ollama
+
     try:
         r = requests.get("http://localhost:11434/api/tags", timeout=2)
         return r.status_code == 200
@@ -35,6 +35,8 @@ def generate_embedding(text, model="codellama"):
         print("   • Run `ollama serve` in a terminal.")
         raise ConnectionError("Ollama server is not running.")
 
+    import ollama
+
     prompt = f"""
     Convert the following text into a JSON array of exactly 1024 floating point numbers
     between -1 and 1 (an embedding vector).
@@ -4,64 +4,54 @@ import os
 import json
 import re
 import uuid
-import datetime
+import threading
 from prompts.pm_prompt import pm_prompt
 from prompts.architect_prompt import architect_prompt
 from prompts.dev_prompt import dev_prompt
 from prompts.reviewer_prompt import reviewer_prompt
+from prompts.budget import architect_slices
 from llm import call_model
+from rag.retriever import Retriever
+from db.generation_store import GenerationStore
+from db.projects import project_config
+from agents.trace import TraceWriter
+from config import DEFAULT_PROJECT
 
 # =========================
 # Config / constants
 # =========================
 
-# Lock the real root to avoid drift
+# Lock the real root to avoid drift (per-project roots come from config.PROJECTS)
 PACKAGE_ROOT = "com.example.userproductapp"
 HEADER_PREFIX = f"src/main/java/{PACKAGE_ROOT.replace('.', '/')}/"
 
 # Toggle full prompt/response logging: export LLM_TRACE=1
 TRACE = os.getenv("LLM_TRACE", "0") == "1"
-_SESSION_ID = None
+_TRACER = None
+_TRACER_LOCK = threading.Lock()
 
 # =========================
 # Tracing helpers
 # =========================
 
-# Redact obvious secrets if they accidentally end up in prompts
-_REDACT_PATTERNS = [
-    (r"(?i)(api[_-]?key)\s*=\s*[\w\-]+", r"\1=***"),
-    (r"(?i)(password)\s*=\s*[^\s\n]+", r"\1=***"),
-    (r"postgresql:\/\/[^ \n]+:[^@\n]+@", "postgresql://***:***@"),
-]
-
-def _ensure_log_dir() -> str:
-    """Create logs/run-YYYYmmdd-HHMMSS-<id>/ and return the path (once per process)."""
-    global _SESSION_ID
-    if _SESSION_ID is None:
-        _SESSION_ID = f"run-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
-    path = os.path.join("logs", _SESSION_ID)
-    os.makedirs(path, exist_ok=True)
-    return path
-
-def _redact_safe(text: str) -> str:
-    out = text or ""
-    for pat, repl in _REDACT_PATTERNS:
-        out = re.sub(pat, repl, out)
-    return out
+def _tracer():
+    """The process's background trace writer (agents/trace.py), started on first use."""
+    global _TRACER
+    with _TRACER_LOCK:
+        if _TRACER is None:
+            _TRACER = TraceWriter()
+            print(f"📝 Tracing prompts/responses to {_TRACER.archive_path}")
+        return _TRACER
 
 def log_block(stage: str, kind: str, text: str):
     """
     stage: 'pm', 'architect', 'dev:<FQCN>', 'reviewer:<FQCN>', etc.
     kind : 'input' | 'output' | 'code'
+    Only enqueues; redaction, compression and disk writes happen on the writer thread.
     """
     if not TRACE:
         return
-    path = _ensure_log_dir()
-    fname = f"{stage}.{kind}.txt"
-    fp = os.path.join(path, fname)
-    with open(fp, "w", encoding="utf-8") as f:
-        f.write(_redact_safe(text or ""))
-    print(f"📝 Logged {kind} for {stage} -> {fp}")
+    _tracer().write(stage, kind, text)
 
 # =========================
 # Parsing / extraction utils
@@ -146,8 +136,14 @@ def normalize_to_root(dev_code: str, target_class: str, pkg_root=PACKAGE_ROOT) -
 # Orchestration
 # =========================
 
-def orchestrate(feature_request, model="mistral"):
+def orchestrate(feature_request, model="mistral", retriever=None, project_id=DEFAULT_PROJECT):
+    """
+    retriever: optional warm Retriever to reuse (e.g. the daemon's); one is
+    opened per call otherwise.
+    project_id: which configured project (config.PROJECTS) to generate into and retrieve from.
+    """
     print(f"📌 Feature Request: {feature_request}")
+    package_root = project_config(project_id).get("package_root", PACKAGE_ROOT)
 
     # ---------- PM Step ----------
     print("\n📝 PM interpreting the request...")
@@ -169,83 +165,135 @@ def orchestrate(feature_request, model="mistral"):
 
     # Generate one class per iteration (order can be adjusted)
     target_classes = [
-        f"{PACKAGE_ROOT}.review.Review",
-        f"{PACKAGE_ROOT}.review.ReviewRepository",
-        f"{PACKAGE_ROOT}.review.ReviewService",
-        f"{PACKAGE_ROOT}.review.ReviewController",
+        f"{package_root}.review.Review",
+        f"{package_root}.review.ReviewRepository",
+        f"{package_root}.review.ReviewService",
+        f"{package_root}.review.ReviewController",
     ]
 
+    # Condense the design once: each class's prompts carry only its slice
+    arch_slices = architect_slices(arch_output, target_classes)
+
     # Base context for the developer (you can wire RAG in later)
     base_context = {
         "entities": "User, Product",
         "repositories": "UserRepository, ProductRepository",
         "services": "UserService, ProductService",
         "controllers": "UserController, ProductController",
-        "package_root": PACKAGE_ROOT,
+        "package_root": package_root,
     }
 
     all_approved_code = []
 
-    for target_class in target_classes:
-        print(f"\n🔄 Generating class: {target_class}")
-        review_passed = False
-        attempt = 0
-
-        while not review_passed:
-            attempt += 1
-            print(f"🧪 Attempt {attempt} - Developer generating {target_class}...")
-
-            # Developer step
-            dev_prompt_text = dev_prompt(pm_plan, arch_output, base_context, target_class)
-            log_block(f"dev:{target_class}", "input", dev_prompt_text)
-
-            dev_output = call_model(dev_prompt_text, model=model)
-            log_block(f"dev:{target_class}", "output", dev_output)
-
-            # Tolerant single-file extraction
-            dev_code_block = extract_single_file_block(dev_output)
-            if not dev_code_block:
-                print("❌ Could not find a // FILE: header (allowing leading spaces/fences). Retrying…")
-                continue
-
-            # If multiple headers exist, accept the first block and warn
-            headers_count = len(list(HEADER_RE.finditer(strip_fences(dev_output).lstrip())))
-            if headers_count > 1:
-                print("⚠️ Multiple // FILE: headers found. Using the first block and ignoring the rest.")
-
-            dev_code = dev_code_block
-
-            # Normalize package drift & header
-            if not valid_package_root(dev_code) or not valid_header_path(dev_code):
-                dev_code = normalize_to_root(dev_code, target_class)
-
-            # Reject placeholders
-            if contains_placeholders(dev_code):
-                print("❌ Placeholder comments found. Retrying...")
-                continue
-
-            log_block(f"dev:{target_class}", "code", dev_code)
-
-            # Reviewer step
-            print(f"🕵️ Reviewer checking {target_class}...")
-            reviewer_prompt_text = reviewer_prompt(pm_plan, dev_code)
-            log_block(f"reviewer:{target_class}", "input", reviewer_prompt_text)
-
-            reviewer_output = call_model(reviewer_prompt_text, model=model)
-            log_block(f"reviewer:{target_class}", "output", reviewer_output)
-
-            reviewer_feedback = extract_json(reviewer_output)
-            if not reviewer_feedback:
-                print("⚠️ Reviewer output not valid JSON.")
-                continue
-
-            status = (reviewer_feedback.get("status") or "").lower()
-            if status == "approved":
-                print(f"✅ {target_class} approved!\n")
-                all_approved_code.append(dev_code)
-                review_passed = True
-            else:
-                issues = reviewer_feedback.get("issues") or []
-                print(f"❌ Reviewer rejected {target_class}: {issues}")
+    own_retriever = retriever is None  # only close what this call opened
+    if retriever is None:
+        try:
+            retriever = Retriever(project_id=project_id)
+        except Exception as e:
+            print(f"⚠️ Retrieval disabled (could not open vector store): {e}")
+
+    # Approved classes are buffered per feature and written in one transaction at the end;
+    # their contracts feed known_apis/service_contract from memory in the meantime.
+    feature_id = f"feature-{uuid.uuid4().hex[:8]}"
+    try:
+        store = GenerationStore(project_id)
+        batch = store.begin_feature(feature_id)
+    except Exception as e:
+        print(f"⚠️ Generation store disabled: {e}")
+        store = batch = None
+
+    try:
+        for target_class in target_classes:
+            print(f"\n🔄 Generating class: {target_class}")
+
+            # Existing code around this class: vector hits + their callers/callees
+            if retriever is not None:
+                simple_name = target_class.rsplit(".", 1)[-1]
+                try:
+                    base_context["related_code"] = retriever.context_for(f"{simple_name} {feature_request}")
+                except Exception as e:
+                    # retrieval is only a hint: never lose the LLM work already done for this feature
+                    print(f"⚠️ No related code for {target_class}: {e}")
+                    base_context["related_code"] = None
+
+            if store is not None:
+                base_context["known_apis"] = store.get_all_contracts(feature_id)
+                base_context["service_contract"] = store.service_contract(feature_id, target_class)
+
+            review_passed = False
+            attempt = 0
+
+            while not review_passed:
+                attempt += 1
+                print(f"🧪 Attempt {attempt} - Developer generating {target_class}...")
+
+                # Developer step
+                dev_prompt_text = dev_prompt(pm_plan, arch_slices[target_class], base_context, target_class)
+                log_block(f"dev:{target_class}", "input", dev_prompt_text)
+
+                dev_output = call_model(dev_prompt_text, model=model)
+                log_block(f"dev:{target_class}", "output", dev_output)
+
+                # Tolerant single-file extraction
+                dev_code_block = extract_single_file_block(dev_output)
+                if not dev_code_block:
+                    print("❌ Could not find a // FILE: header (allowing leading spaces/fences). Retrying…")
+                    continue
+
+                # If multiple headers exist, accept the first block and warn
+                headers_count = len(list(HEADER_RE.finditer(strip_fences(dev_output).lstrip())))
+                if headers_count > 1:
+                    print("⚠️ Multiple // FILE: headers found. Using the first block and ignoring the rest.")
+
+                dev_code = dev_code_block
+
+                # Normalize package drift & header
+                if not valid_package_root(dev_code, package_root) or not valid_header_path(dev_code, package_root):
+                    dev_code = normalize_to_root(dev_code, target_class, package_root)
+
+                # Reject placeholders
+                if contains_placeholders(dev_code):
+                    print("❌ Placeholder comments found. Retrying...")
+                    continue
+
+                log_block(f"dev:{target_class}", "code", dev_code)
+
+                # Reviewer step
+                print(f"🕵️ Reviewer checking {target_class}...")
+                reviewer_prompt_text = reviewer_prompt(pm_plan, dev_code)
+                log_block(f"reviewer:{target_class}", "input", reviewer_prompt_text)
+
+                reviewer_output = call_model(reviewer_prompt_text, model=model)
+                log_block(f"reviewer:{target_class}", "output", reviewer_output)
+
+                reviewer_feedback = extract_json(reviewer_output)
+                if not reviewer_feedback:
+                    print("⚠️ Reviewer output not valid JSON.")
+                    continue
+
+                status = (reviewer_feedback.get("status") or "").lower()
+                if status == "approved":
+                    print(f"✅ {target_class} approved!\n")
+                    all_approved_code.append(dev_code)
+                    if batch is not None:
+                        header_path = HEADER_RE.search(dev_code).group(1).strip()
+                        package = ".".join(target_class.split(".")[:-1])
+                        batch.add_class(target_class, header_path, package, dev_code)
+                    review_passed = True
+                else:
+                    issues = reviewer_feedback.get("issues") or []
+                    print(f"❌ Reviewer rejected {target_class}: {issues}")
+
+        if batch is not None:
+            try:
+                batch.commit()
+            except Exception as e:
+                # the approved code is still returned (and saved by the caller)
+                print(f"⚠️ Could not record the approved classes in the generation store: {e}")
+    finally:
+        if store is not None:
+            store.close()
+        if own_retriever and retriever is not None:
+            retriever.close()
 
     return "\n\n".join(all_approved_code)
@@ -0,0 +1,207 @@
+# agents/trace.py
+#
+# Prompt/response tracing off the generation path: log_block() only enqueues;
+# a background thread redacts, compresses and appends each record to one
+# archive per run, and applies size/age retention to the trace directory
+# (at start, every TRACE_RETENTION_SECONDS while open, and at close).
+#
+#   logs/run-<stamp>-<id>.trace.gz     one gzip member per record (`gzip -dc` reads them all)
+#   logs/run-<stamp>-<id>.index.jsonl  {"stage", "kind", "ts", "offset", "length", "chars"} per record
+
+import os
+import re
+import gzip
+import json
+import time
+import uuid
+import queue
+import atexit
+import shutil
+import datetime
+import threading
+
+from config import (
+    TRACE_DIR, TRACE_QUEUE_SIZE, TRACE_COMPRESS_LEVEL, TRACE_MAX_BYTES, TRACE_MAX_AGE_DAYS,
+    TRACE_ACTIVE_SECONDS, TRACE_RETENTION_SECONDS,
+)
+
+# Redact obvious secrets if they accidentally end up in prompts
+REDACT_PATTERNS = [
+    (re.compile(r"(?i)(api[_-]?key)\s*=\s*[\w\-]+"), r"\1=***"),
+    (re.compile(r"(?i)(password)\s*=\s*[^\s\n]+"), r"\1=***"),
+    (re.compile(r"postgresql:\/\/[^ \n]+:[^@\n]+@"), "postgresql://***:***@"),
+]
+
+_STOP = object()
+
+
+def redact(text):
+    out = text or ""
+    for pattern, repl in REDACT_PATTERNS:
+        out = pattern.sub(repl, out)
+    return out
+
+
+def _run_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path)
+
+
+def enforce_retention(log_dir=TRACE_DIR, max_bytes=TRACE_MAX_BYTES, max_age_days=TRACE_MAX_AGE_DAYS, keep=(),
+                      active_seconds=TRACE_ACTIVE_SECONDS):
+    """
+    Delete runs (archives + indexes, and per-file run directories from before
+    archives) older than `max_age_days`, then the oldest runs until the rest
+    fit in `max_bytes`. Paths in `keep`, and runs modified within the last
+    `active_seconds` (possibly still being written by another process), are
+    never deleted. Returns the count removed.
+    """
+    if not os.path.isdir(log_dir):
+        return 0
+    runs = {}  # run id -> [paths]
+    for name in os.listdir(log_dir):
+        if name.startswith("run-"):
+            run_id = name.split(".", 1)[0]
+            runs.setdefault(run_id, []).append(os.path.join(log_dir, name))
+
+    now = time.time()
+    entries = []  # (mtime, size, run id) of deletable runs
+    total = 0
+    for run_id, paths in runs.items():
+        try:
+            mtime = max(os.path.getmtime(p) for p in paths)
+            size = sum(_run_size(p) for p in paths)
+        except FileNotFoundError:
+            continue
+        total += size
+        if not any(p in keep for p in paths) and now - mtime > active_seconds:
+            entries.append((mtime, size, run_id))
+    entries.sort()
+
+    removed = 0
+    for mtime, size, run_id in entries:
+        if now - mtime <= max_age_days * 86400 and total <= max_bytes:
+            break
+        for p in runs[run_id]:
+            if os.path.isdir(p):
+                shutil.rmtree(p, ignore_errors=True)
+            else:
+                try:
+                    os.remove(p)
+                except FileNotFoundError:
+                    pass
+        total -= size
+        removed += 1
+    return removed
+
+
+class TraceWriter:
+    """
+    Bounded queue + daemon writer thread for one run's trace archive.
+    `write` never blocks: when the queue is full, or the writer has stopped
+    on a disk error, the record is dropped and counted, so a slow or broken
+    disk cannot stall generation.
+    """
+
+    def __init__(self, log_dir=TRACE_DIR, maxsize=TRACE_QUEUE_SIZE, max_bytes=TRACE_MAX_BYTES,
+                 max_age_days=TRACE_MAX_AGE_DAYS, retention_interval=TRACE_RETENTION_SECONDS):
+        run_id = f"run-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.archive_path = os.path.join(log_dir, f"{run_id}.trace.gz")
+        self.index_path = os.path.join(log_dir, f"{run_id}.index.jsonl")
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.retention_interval = retention_interval
+        self.dropped = 0
+        self.written = 0
+        self.error = None  # OSError that stopped the writer thread
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, stage, kind, text):
+        if not self._thread.is_alive():
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait((stage, kind, time.time(), text or ""))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=10.0):
+        """Flush queued records and stop the thread (also runs at interpreter exit)."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._drop_queued()
+        if self.dropped:
+            reason = f"writer stopped: {self.error}" if self.error else "queue was full"
+            print(f"⚠️ Dropped {self.dropped} trace record(s) ({reason})")
+            self.dropped = 0  # report once, even if close() runs again at exit
+
+    def _drop_queued(self):
+        """Count records left in the queue after the writer stopped; they will never be written."""
+        while True:
+            try:
+                if self._queue.get_nowait() is not _STOP:
+                    self.dropped += 1
+            except queue.Empty:
+                return
+
+    def _run(self):
+        try:
+            self._write_all()
+        except OSError as e:
+            self.error = e
+            self._drop_queued()
+            print(f"⚠️ Tracing stopped, further records are dropped: {e}")
+
+    def _enforce_retention(self):
+        enforce_retention(self.log_dir, self.max_bytes, self.max_age_days,
+                          keep=(self.archive_path, self.index_path))
+        self._retention_due = time.monotonic() + self.retention_interval
+
+    def _write_all(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._enforce_retention()
+        with open(self.archive_path, "ab") as archive, open(self.index_path, "a", encoding="utf-8") as index:
+            stop = False
+            while not stop:
+                try:
+                    # wake up for retention even when no records arrive
+                    batch = [self._queue.get(timeout=max(0.0, self._retention_due - time.monotonic()))]
+                except queue.Empty:
+                    batch = []
+                while True:  # drain whatever else is waiting, then flush once
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for item in batch:
+                    if item is _STOP:
+                        stop = True
+                        continue
+                    stage, kind, ts, text = item
+                    text = redact(text)
+                    data = gzip.compress(text.encode("utf-8"), compresslevel=TRACE_COMPRESS_LEVEL, mtime=int(ts))
+                    index.write(json.dumps({
+                        "stage": stage, "kind": kind, "ts": round(ts, 3),
+                        "offset": archive.tell(), "length": len(data), "chars": len(text),
+                    }) + "\n")
+                    archive.write(data)
+                    self.written += 1
+                archive.flush()
+                index.flush()
+                if not stop and time.monotonic() >= self._retention_due:
+                    self._enforce_retention()
+        self._enforce_retention()
+
+
+def read_record(archive_path, entry):
+    """Text of one record, given its index entry (a parsed line of the .index.jsonl file)."""
+    with open(archive_path, "rb") as f:
+        f.seek(entry["offset"])
+        return gzip.decompress(f.read(entry["length"])).decode("utf-8")
@@ -1,58 +1,151 @@
 # analyzer/call_graph.py
 
 import os
-import javalang
 import psycopg2
-from config import DB_CONFIG
+from psycopg2.extras import execute_values
+from config import DB_CONFIG, DEFAULT_PROJECT, SKIP_FOLDERS, FAST_SCAN
+from db import index_generation, projects
+from analyzer.symbol_index import SymbolIndex, fq_method
+from analyzer.graph_engine import CallGraph
+
+METHOD_CALLS_DDL = """
+CREATE TABLE {table} (
+    id BIGSERIAL,
+    project_id TEXT NOT NULL,
+    caller_class TEXT,
+    caller_method TEXT,
+    called_class TEXT,
+    called_method TEXT,
+    caller_fqmn TEXT,
+    callee_fqmn TEXT,
+    resolved BOOLEAN NOT NULL DEFAULT FALSE,
+    file_path TEXT,
+    PRIMARY KEY (project_id, id)
+) PARTITION BY LIST (project_id);
+"""
+
+# Applied before partitioning so rows of pre-fqmn installs migrate with every column
+LEGACY_COLUMNS = """
+ALTER TABLE method_calls ADD COLUMN IF NOT EXISTS caller_fqmn TEXT;
+ALTER TABLE method_calls ADD COLUMN IF NOT EXISTS callee_fqmn TEXT;
+ALTER TABLE method_calls ADD COLUMN IF NOT EXISTS resolved BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE method_calls ADD COLUMN IF NOT EXISTS file_path TEXT;
+"""
+
+# Resolved keys (`pkg.Type.method`) so graph lookups are exact matches
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_method_calls_caller ON method_calls(project_id, caller_fqmn);
+CREATE INDEX IF NOT EXISTS idx_method_calls_callee ON method_calls(project_id, callee_fqmn);
+CREATE INDEX IF NOT EXISTS idx_method_calls_file ON method_calls(project_id, file_path);
+"""
 
 class CallGraphBuilder:
-    def __init__(self, project_path):
+    def __init__(self, project_path, project_id=DEFAULT_PROJECT, fast=FAST_SCAN):
         self.project_path = project_path
+        self.project_id = project_id
+        self.fast = fast  # tokenizer-only extraction for every file (analyzer.fast_scan)
         self.conn = psycopg2.connect(**DB_CONFIG)
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        with self.conn.cursor() as cur:
+            if projects.relkind(cur, "method_calls") == "r":
+                cur.execute(LEGACY_COLUMNS)
+            projects.ensure_partitioned(cur, "method_calls", METHOD_CALLS_DDL)
+            cur.execute(INDEXES)
+            projects.ensure_partition(cur, "method_calls", self.project_id)
+            index_generation.ensure_schema(cur)
+        self.conn.commit()
+        SymbolIndex.ensure_schema(self.conn)
 
     def scan_codebase(self):
-        """Walk through project and parse all Java files."""
-        for root, _, files in os.walk(self.project_path):
+        """
+        Walk through project and parse all Java files.
+        Pass 1 builds the symbol index, pass 2 resolves every call against it.
+        """
+        index = SymbolIndex()
+        for root, dirs, files in os.walk(self.project_path):
+            dirs[:] = [d for d in dirs if d not in SKIP_FOLDERS]
             for file in files:
                 if file.endswith(".java"):
                     file_path = os.path.join(root, file)
                     print(f"🔍 Parsing {file_path}")
                     with open(file_path, "r", encoding="utf-8") as f:
                         code = f.read()
-                        self._parse_file(code)
+                        self._parse_file(index, file_path, code)
 
-    def _parse_file(self, code):
-        try:
-            tree = javalang.parse.parse(code)
-        except javalang.parser.JavaSyntaxError as e:
-            print(f"⚠️ Skipped file (syntax error): {e}")
-            return
+        index.save(self.conn, self.project_id)
+        self._insert_calls(index, full=True)
 
-        # Find classes & methods
-        for path, class_decl in tree.filter(javalang.tree.ClassDeclaration):
-            class_name = class_decl.name
+    def _parse_file(self, index, file_path, code):
+        return index.add_file(file_path, code, fast=self.fast)
 
-            for method in class_decl.methods:
-                method_name = method.name
-                self._extract_method_calls(class_name, method_name, method)
+    def update_files(self, file_paths):
+        """
+        Incrementally re-index only `file_paths` (changed, added or deleted).
+        Other files' declarations are loaded from the symbol tables so calls
+        from the changed files still resolve project-wide.
+        """
+        file_paths = list(dict.fromkeys(file_paths))
+        index = SymbolIndex.load(self.conn, exclude_files=file_paths, project_id=self.project_id)
+        removed = []  # deleted, or no longer readable: their old rows must not linger
+        for file_path in file_paths:
+            if not os.path.exists(file_path):
+                removed.append(file_path)
+                continue
+            print(f"🔍 Re-parsing {file_path}")
+            with open(file_path, "r", encoding="utf-8") as f:
+                if not self._parse_file(index, file_path, f.read()):
+                    removed.append(file_path)
 
-    def _extract_method_calls(self, class_name, method_name, method_node):
-        """Look for all method invocations inside a method."""
-        calls = []
-        for path, node in method_node.filter(javalang.tree.MethodInvocation):
-            called_method = node.member
-            called_class = node.qualifier  # e.g., userService.authenticate()
+        if removed:
+            with self.conn.cursor() as cur:
+                SymbolIndex.delete_files(cur, removed, self.project_id)
+                cur.execute("DELETE FROM method_calls WHERE project_id = %s AND file_path = ANY(%s);",
+                            (self.project_id, removed))
+                index_generation.bump(cur, self.project_id)
+            self.conn.commit()
+        index.save(self.conn, self.project_id)
+        self._insert_calls(index)
 
-            # Store relationship
-            calls.append((class_name, method_name, called_class, called_method))
+    def refresh_snapshot(self, path):
+        """Rewrite the binary call graph snapshot from method_calls (see analyzer/graph_engine.py)."""
+        graph = CallGraph.from_db(self.conn, self.project_id)
+        graph.save(path)
+        return graph
 
-        if calls:
-            self._insert_calls(calls)
+    def _insert_calls(self, index, full=False):
+        """
+        Replace the call edges of every indexed file in one transaction. After
+        a `full` scan, rows of files that were not scanned (deleted files,
+        legacy rows without a file_path) are dropped too, with their symbols.
+        """
+        rows = [
+            (self.project_id, caller_fqcn, caller_method, callee_fqcn, callee_method,
+             fq_method(caller_fqcn, caller_method), fq_method(callee_fqcn, callee_method),
+             resolved, file_path)
+            for file_path, caller_fqcn, caller_method, callee_fqcn, callee_method, resolved
+            in index.resolve_calls()
+        ]
+        files = [ctx.file_path for ctx, _ in index.units]
 
-    def _insert_calls(self, calls):
         with self.conn.cursor() as cur:
-            cur.executemany("""
-                INSERT INTO method_calls (caller_class, caller_method, called_class, called_method)
-                VALUES (%s, %s, %s, %s);
-            """, calls)
+            if full:
+                # NOT (NULL = ANY(...)) is NULL, so rows without a file_path need their own test
+                cur.execute("""
+                    DELETE FROM method_calls
+                    WHERE project_id = %s AND (file_path IS NULL OR NOT (file_path = ANY(%s)));
+                """, (self.project_id, files))
+                SymbolIndex.delete_other_files(cur, files, self.project_id)
+            cur.execute("DELETE FROM method_calls WHERE project_id = %s AND file_path = ANY(%s);",
+                        (self.project_id, files))
+            if rows:
+                execute_values(cur, """
+                    INSERT INTO method_calls (project_id, caller_class, caller_method, called_class, called_method,
+                                              caller_fqmn, callee_fqmn, resolved, file_path)
+                    VALUES %s
+                """, rows)
+            index_generation.bump(cur, self.project_id)
         self.conn.commit()
+        resolved = sum(1 for r in rows if r[7])
+        print(f"🔗 Stored {len(rows)} call edges ({resolved} resolved to known targets)")
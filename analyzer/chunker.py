@@ -0,0 +1,226 @@
+# analyzer/chunker.py
+#
+# Method-level chunks for retrieval: one chunk per method, constructor or
+# group of consecutive fields, each a line span of the source file plus its
+# class header (package + type declaration line) as shared context.
+# Members over `max_tokens` javalang tokens are split at statement boundaries.
+# Files javalang cannot parse are chunked from analyzer.fast_scan's spans.
+
+import bisect
+from collections import namedtuple
+
+import javalang
+
+from analyzer.fast_scan import fast_scan
+from analyzer.symbol_index import CONSTRUCTOR, _body_members
+from config import CHUNK_MAX_TOKENS, FAST_SCAN
+
+FIELDS = "<fields>"
+
+# member: method name, CONSTRUCTOR or FIELDS; part: 1-based index when a member is split
+Chunk = namedtuple("Chunk", "class_name member kind start_line end_line tokens part header")
+
+
+class JavaChunker:
+    def __init__(self, max_tokens=CHUNK_MAX_TOKENS, fast=FAST_SCAN):
+        self.max_tokens = max_tokens
+        self.fast = fast
+
+    def chunk(self, code):
+        """
+        Chunks of one compilation unit, in source order. Uses the fast scan
+        when javalang's parser rejects the file (or always, with `fast`).
+        Raises javalang's LexerError if `code` cannot be tokenized.
+        """
+        if not self.fast:
+            try:
+                tokens = list(javalang.tokenizer.tokenize(code))
+                tree = javalang.parser.Parser(tokens).parse()
+                return _FileChunker(code, tokens, tree, self.max_tokens).chunks()
+            except javalang.parser.JavaSyntaxError:
+                pass
+        scan = fast_scan(code)
+        return _FileChunker(code, scan.tokens, None, self.max_tokens).scanned_chunks(scan)
+
+    @staticmethod
+    def text(code_lines, chunk):
+        """Text to embed for a chunk: class header, then the chunk's lines."""
+        body = "\n".join(code_lines[chunk.start_line - 1:chunk.end_line])
+        return f"{chunk.header}\n{body}" if chunk.header else body
+
+
+class _FileChunker:
+    def __init__(self, code, tokens, tree, max_tokens):
+        self.lines = code.split("\n")
+        self.tokens = tokens
+        self.tree = tree
+        self.max_tokens = max_tokens
+        self.positions = [(t.position.line, t.position.column) for t in tokens]
+        # prefix[i] = tokens on lines 1..i, for O(1) span sizes
+        per_line = [0] * (len(self.lines) + 2)
+        for line, _ in self.positions:
+            per_line[line] += 1
+        self.prefix = [0] * len(per_line)
+        for i in range(1, len(per_line)):
+            self.prefix[i] = self.prefix[i - 1] + per_line[i]
+
+    def span_tokens(self, start_line, end_line):
+        return self.prefix[end_line] - self.prefix[start_line - 1]
+
+    def token_index(self, position):
+        return bisect.bisect_left(self.positions, (position.line, position.column))
+
+    def _start_line(self, node):
+        lines = [node.position.line] + [a.position.line for a in getattr(node, "annotations", None) or () if a.position]
+        return min(lines)
+
+    def _end_index(self, start, kind):
+        """
+        Index of the token ending the declaration that starts at token `start`:
+        the `}` closing a type/method body, or the `;` ending a field or a
+        bodiless method. Tokens make braces in strings and comments harmless.
+        """
+        depth = 0
+        for i in range(start, len(self.tokens)):
+            value = self.tokens[i].value
+            if value == "{":
+                depth += 1
+            elif value == "}":
+                depth -= 1
+                if depth == 0 and kind != "field":
+                    return i
+            elif value == ";" and depth == 0:
+                return i
+        return len(self.tokens) - 1
+
+    def _header(self, type_decl):
+        """`package x;` + the type's declaration up to its opening brace."""
+        start = self.token_index(type_decl.position)
+        brace = next((i for i in range(start, len(self.tokens)) if self.tokens[i].value == "{"), start)
+        header = self.lines[self._start_line(type_decl) - 1:self.tokens[brace].position.line]
+        package = f"package {self.tree.package.name};" if self.tree.package else ""
+        return "\n".join(([package] if package else []) + [l.rstrip() for l in header])
+
+    def chunks(self):
+        out = []
+        for _, type_decl in self.tree.filter(javalang.tree.TypeDeclaration):
+            if type_decl.position is None:
+                continue
+            header = self._header(type_decl)
+            fields = []
+            for member in _body_members(type_decl):
+                if member.position is None or isinstance(member, javalang.tree.TypeDeclaration):
+                    continue  # nested types are chunked on their own
+                start_line = self._start_line(member)
+                if isinstance(member, javalang.tree.FieldDeclaration):
+                    end = self._end_index(self.token_index(member.position), "field")
+                    fields.append((start_line, self.tokens[end].position.line))
+                    continue
+                out.extend(self._field_chunks(type_decl.name, fields, header))
+                fields = []
+                if isinstance(member, (javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)):
+                    is_ctor = isinstance(member, javalang.tree.ConstructorDeclaration)
+                    kind = "constructor" if is_ctor else "method"
+                    begin = self.token_index(member.position)
+                    out.extend(self._member_chunks(
+                        type_decl.name, CONSTRUCTOR if is_ctor else member.name, kind,
+                        begin, self._end_index(begin, kind), start_line, header,
+                    ))
+            out.extend(self._field_chunks(type_decl.name, fields, header))
+        return sorted(out, key=lambda c: (c.start_line, c.end_line))
+
+    def scanned_chunks(self, scan):
+        """chunks() from an analyzer.fast_scan result instead of a javalang tree."""
+        package = f"package {scan.package};" if scan.package else ""
+        out = []
+        for t in scan.types:
+            class_name = t.name.rsplit(".", 1)[-1]
+            header_lines = self.lines[t.start_line - 1:t.body_line]
+            header = "\n".join(([package] if package else []) + [l.rstrip() for l in header_lines])
+            members = sorted([(s, e, None) for s, e in t.field_spans] +
+                             [(m.start_line, m.end_line, m) for m in t.methods], key=lambda x: x[:2])
+            fields = []
+            for start_line, end_line, m in members:
+                if m is None:
+                    fields.append((start_line, end_line))
+                    continue
+                out.extend(self._field_chunks(class_name, fields, header))
+                fields = []
+                out.extend(self._member_chunks(
+                    class_name, m.name, "constructor" if m.is_constructor else "method",
+                    m.begin, m.end, start_line, header,
+                ))
+            out.extend(self._field_chunks(class_name, fields, header))
+        return sorted(out, key=lambda c: (c.start_line, c.end_line))
+
+    def _field_chunks(self, class_name, fields, header):
+        """Consecutive fields grouped into chunks of at most max_tokens."""
+        groups = []
+        for start, end in fields:
+            if groups and self.span_tokens(groups[-1][0], end) <= self.max_tokens:
+                groups[-1][1] = end
+            else:
+                groups.append([start, end])
+        return [
+            Chunk(class_name, FIELDS, "fields", start, end, self.span_tokens(start, end),
+                  i + 1 if len(groups) > 1 else None, header)
+            for i, (start, end) in enumerate(groups)
+        ]
+
+    def _member_chunks(self, class_name, member_name, kind, begin, end, start_line, header):
+        """Chunks of the member whose tokens run from `begin` to `end` (its `}` or `;`)."""
+        end_line = self.tokens[end].position.line
+        spans = [(start_line, end_line)]
+        if self.span_tokens(start_line, end_line) > self.max_tokens:
+            spans = self._split(begin, end, start_line, end_line)
+        return [
+            Chunk(class_name, member_name, kind, s, e, self.span_tokens(s, e),
+                  i + 1 if len(spans) > 1 else None, header)
+            for i, (s, e) in enumerate(spans)
+        ]
+
+    def _boundaries(self, begin, end):
+        """
+        (line, depth) after each statement in the body between tokens `begin`
+        and `end` that ends its line; depth 0 = top-level statement.
+        """
+        out = []
+        depth = parens = 0
+        for i in range(begin, end):
+            value = self.tokens[i].value
+            if value == "(":
+                parens += 1
+            elif value == ")":
+                parens -= 1
+            elif value == "{":
+                depth += 1
+                continue
+            elif value == "}":
+                depth -= 1
+            if depth >= 1 and parens == 0 and value in (";", "}"):
+                line = self.positions[i][0]
+                if self.positions[i + 1][0] > line:
+                    out.append((line, depth - 1))
+        return out
+
+    def _split(self, begin, end, start_line, end_line):
+        """
+        Greedy line spans under max_tokens, cut after the last top-level
+        statement that fits (a nested one only when no top-level one does).
+        A single statement larger than the limit becomes its own oversized span.
+        """
+        spans = []
+        current = start_line
+        fitting = []
+        for line, depth in self._boundaries(begin, end) + [(end_line, 0)]:
+            while line >= current and self.span_tokens(current, line) > self.max_tokens:
+                top = [l for l, d in fitting if d == 0]
+                cut = top[-1] if top else fitting[-1][0] if fitting else line
+                spans.append((current, cut))
+                current = cut + 1
+                fitting = [(l, d) for l, d in fitting if l >= current]
+            if line >= current:
+                fitting.append((line, depth))
+        if current <= end_line:
+            spans.append((current, end_line))
+        return spans
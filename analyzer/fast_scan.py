@@ -0,0 +1,545 @@
+# analyzer/fast_scan.py
+#
+# Tolerant, tokenizer-only extraction of the structure the indexers need:
+# package, imports, type names, fields, method signatures with line spans and
+# invocation sites. Tracks brace depth instead of building an AST, so it copes
+# with syntax javalang's parser rejects (records, sealed types, switch
+# expressions, text blocks) and is several times faster on large sources.
+# Used as the fallback when javalang.parse fails, and for every file when
+# FAST_SCAN is on.
+
+import re
+import time
+from collections import namedtuple
+
+import javalang
+from javalang.tokenizer import Identifier, BasicType, Keyword, Modifier
+
+TYPE_KEYWORDS = {"class": "class", "interface": "interface", "enum": "enum"}
+# contextual keywords javalang tokenizes as identifiers
+CONTEXTUAL_MODIFIERS = {"sealed", "non-sealed", "record", "permits", "yield"}
+
+TEXT_BLOCK_RE = re.compile(r'"""[\s\S]*?"""')
+
+# qualifier: None (implicit this), "this", "super", "new" (constructor call),
+# a dotted name (`repo`, `Foo.bar`) or CHAINED (receiver is the result of call `prev`).
+# Explicit constructor calls `this(...)` / `super(...)` are named "<init>".
+CallSite = namedtuple("CallSite", "qualifier name line prev")
+CHAINED = "<chained>"
+
+
+class FastType:
+    def __init__(self, name, kind, start_line):
+        self.name = name              # nested types: `Outer.Inner`
+        self.kind = kind
+        self.start_line = start_line
+        self.end_line = start_line
+        self.body_line = start_line   # line of the `{` opening the body
+        self.supertypes = []
+        self.superclass = None        # name after `extends` (classes only)
+        self.fields = {}              # name -> type text
+        self.field_spans = []         # (start_line, end_line) per field declaration
+        self.methods = []
+        self.initializers = []        # FastMethod per `static { }` (<clinit>) / `{ }` (<init>) block
+
+
+class FastMethod:
+    def __init__(self, name, is_constructor, return_type, params, start_line, begin):
+        self.name = name
+        self.is_constructor = is_constructor
+        self.return_type = return_type
+        self.params = params          # [(type text, name)], varargs keep their `...`
+        self.modifiers = set()
+        self.start_line = start_line
+        self.end_line = start_line
+        self.begin = begin            # token index of the name
+        self.end = begin              # token index of the closing `}` / `;`
+        self.calls = []               # [CallSite]
+        self.locals = {}              # name -> type text
+
+
+class ScanResult:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.package = ""
+        self.imports = []             # [(path, is_static, is_wildcard)]
+        self.types = []               # FastType, outer types before their nested ones
+
+
+def strip_text_blocks(code):
+    """Blank out Java text blocks (keeping their line count) so the tokenizer sees `""`."""
+    return TEXT_BLOCK_RE.sub(lambda m: '""' + "\n" * m.group(0).count("\n"), code)
+
+
+def fast_scan(code):
+    """Scan one compilation unit. Raises javalang.tokenizer.LexerError only if it cannot be tokenized."""
+    tokens = list(javalang.tokenizer.tokenize(strip_text_blocks(code)))
+    return _Scanner(tokens).scan()
+
+
+def base_type(text):
+    """`Map.Entry<K, V>[]` -> `Map.Entry`: the part of a type text that names a type."""
+    return text.split("<", 1)[0].replace("[]", "").replace("...", "").strip() or text
+
+
+def _is_type_token(tok):
+    return isinstance(tok, (Identifier, BasicType)) or tok.value in (">", "]")
+
+
+class _Scanner:
+    def __init__(self, tokens):
+        self.t = tokens
+        self.n = len(tokens)
+        self.result = ScanResult(tokens)
+
+    # ---------- token helpers ----------
+
+    def value(self, i):
+        return self.t[i].value if 0 <= i < self.n else None
+
+    def line(self, i):
+        return self.t[min(i, self.n - 1)].position.line
+
+    def match(self, i, open_, close):
+        """Index of the token closing the `open_` at i."""
+        depth = 0
+        for j in range(i, self.n):
+            v = self.t[j].value
+            if v == open_:
+                depth += 1
+            elif v == close:
+                depth -= 1
+                if depth == 0:
+                    return j
+        return self.n - 1
+
+    def skip_generics(self, i):
+        """Index after a `<...>` starting at i (`>>` counts twice)."""
+        if self.value(i) != "<":
+            return i
+        depth = 0
+        for j in range(i, self.n):
+            v = self.t[j].value
+            if v in ("<", ">", ">>", ">>>"):
+                depth += 1 if v == "<" else -len(v)
+                if depth <= 0:
+                    return j + 1
+            elif v in (";", "{", "(", ")"):
+                return j
+        return self.n
+
+    def qualified(self, i):
+        """(dotted name starting at i, index after it)."""
+        parts = [self.value(i)]
+        j = i + 1
+        while self.value(j) == "." and isinstance(self.t[j + 1] if j + 1 < self.n else None, Identifier):
+            parts.append(self.value(j + 1))
+            j += 2
+        return ".".join(parts), j
+
+    def text(self, start, end):
+        """Source-like text of tokens [start, end)."""
+        out = ""
+        for j in range(start, end):
+            v = self.t[j].value
+            if out and isinstance(self.t[j], (Identifier, BasicType, Keyword, Modifier)) \
+                    and (isinstance(self.t[j - 1], (Identifier, BasicType, Keyword, Modifier)) or out.endswith("?")):
+                out += " "
+            out += v + (" " if v == "," else "")
+        return out
+
+    def skip_annotation(self, i):
+        """Index after an annotation starting with `@` at i."""
+        _, j = self.qualified(i + 1)
+        if self.value(j) == "(":
+            j = self.match(j, "(", ")") + 1
+        return j
+
+    def member_head(self, start, end):
+        """Index of the first token of [start, end) after annotations, modifiers and type parameters."""
+        j = start
+        while j < end:
+            v = self.value(j)
+            if v == "@" and self.value(j + 1) != "interface":
+                j = self.skip_annotation(j)
+            elif isinstance(self.t[j], Modifier) or v in CONTEXTUAL_MODIFIERS or v == "default":
+                j += 1
+            elif v == "<":
+                j = self.skip_generics(j)
+            else:
+                break
+        return j
+
+    def params(self, open_, close):
+        """[(type text, name)] of a parameter list between parens at open_/close."""
+        out = []
+        start = open_ + 1
+        depth = 0
+        for j in range(open_ + 1, close + 1):
+            v = self.value(j)
+            if v in ("<", "(", "["):
+                depth += 1
+            elif v in (">", ")", "]") and j != close:
+                depth -= 1
+            elif v == ">>":
+                depth -= 2
+            if (v == "," and depth == 0) or j == close:
+                head = self.member_head(start, j)
+                if j - head >= 2:
+                    out.append((self.text(head, j - 1), self.value(j - 1)))
+                start = j + 1
+        return out
+
+    # ---------- scanning ----------
+
+    def scan(self):
+        # frame: ("type", FastType, in_constants) | ("method", FastMethod) | ("block", owner method or None)
+        stack = []
+        member_start = 0
+        pending_type = None
+        pending_method = None
+        in_initializer = False
+        call_at_paren = {}     # index of `(` -> call index, for chained calls
+        closed_call = {}       # index of `)` -> call index
+        parens = []
+        i = 0
+
+        def method_frame():
+            for frame in reversed(stack):
+                if frame[0] == "method":
+                    return frame[1]
+                if frame[0] == "type":
+                    return None
+            return None
+
+        while i < self.n:
+            tok = self.t[i]
+            v = tok.value
+            top = stack[-1] if stack else None
+            at_type_level = top is not None and top[0] == "type" and not parens
+
+            if v == "(":
+                parens.append(i)
+            elif v == ")":
+                if parens:
+                    closed_call[i] = call_at_paren.get(parens.pop())
+
+            # --- compilation unit header ---
+            if not stack and v == "package":
+                self.result.package, i = self.qualified(i + 1)
+                member_start = i + 1
+                continue
+            if not stack and v == "import":
+                j = i + 1
+                static = self.value(j) == "static"
+                j += static
+                path, j = self.qualified(j)
+                wildcard = self.value(j) == "." and self.value(j + 1) == "*"
+                self.result.imports.append((path, static, wildcard))
+                i = j + 2 * wildcard
+                member_start = i + 1
+                continue
+
+            # --- type declarations ---
+            kind = None
+            if isinstance(tok, Keyword) and v in TYPE_KEYWORDS and self.value(i - 1) != ".":
+                kind = "annotation" if self.value(i - 1) == "@" else TYPE_KEYWORDS[v]
+            elif v == "record" and isinstance(tok, Identifier) and isinstance(self.t[i + 1] if i + 1 < self.n else None, Identifier) \
+                    and self.value(i + 2) in ("(", "<"):
+                kind = "record"
+            if kind and i + 1 < self.n and isinstance(self.t[i + 1], Identifier) and method_frame() is None:
+                outer = next((f[1].name for f in reversed(stack) if f[0] == "type"), None)
+                name = self.value(i + 1)
+                pending_type = FastType(f"{outer}.{name}" if outer else name, kind, self.line(member_start))
+                j = self.skip_generics(i + 2)
+                if kind == "record" and self.value(j) == "(":
+                    close = self.match(j, "(", ")")
+                    pending_type.fields.update({n: t for t, n in self.params(j, close)})
+                    j = close + 1
+                # extends / implements lists (permits is skipped)
+                target = None
+                extends = False
+                while j < self.n and self.value(j) != "{":
+                    w = self.value(j)
+                    if w in ("extends", "implements"):
+                        target = pending_type.supertypes
+                        extends = w == "extends"
+                    elif w == "permits":
+                        target = None
+                    elif isinstance(self.t[j], Identifier) and target is not None:
+                        name_, j = self.qualified(j)
+                        target.append(name_)
+                        if extends and kind == "class":
+                            pending_type.superclass = name_
+                        j = self.skip_generics(j)
+                        continue
+                    j += 1
+                i = j
+                continue
+
+            if v == "{":
+                owner = method_frame()
+                if pending_type is not None:
+                    pending_type.body_line = tok.position.line
+                    stack.append(("type", pending_type, pending_type.kind == "enum"))
+                    self.result.types.append(pending_type)
+                    pending_type = None
+                    member_start = i + 1
+                elif pending_method is not None:
+                    stack.append(("method", pending_method))
+                    pending_method = None
+                elif at_type_level and not top[2] and not in_initializer:
+                    # initializer block: its calls belong to a synthetic <clinit> / <init> member
+                    block = FastMethod("<clinit>" if self.value(i - 1) == "static" else "<init>",
+                                       False, "", [], self.line(member_start), i)
+                    top[1].initializers.append(block)
+                    stack.append(("method", block))
+                else:
+                    stack.append(("block", owner))
+                i += 1
+                continue
+
+            if v == "}":
+                if stack:
+                    frame = stack.pop()
+                    if frame[0] == "type":
+                        frame[1].end_line = tok.position.line
+                    elif frame[0] == "method":
+                        frame[1].end_line = tok.position.line
+                        frame[1].end = i
+                if not stack or (stack[-1][0] == "type" and not in_initializer):
+                    member_start = i + 1
+                i += 1
+                continue
+
+            # --- members at type-body level ---
+            if at_type_level:
+                frame_type = top[1]
+                if v == ";":
+                    if top[2]:
+                        stack[-1] = ("type", frame_type, False)  # end of enum constants
+                    else:
+                        self.fields(frame_type, member_start, i)
+                    in_initializer = False
+                    member_start = i + 1
+                    i += 1
+                    continue
+                if top[2]:
+                    i += 1          # enum constants: arguments and bodies are not members
+                    continue
+                if v == "=":
+                    in_initializer = True
+                elif isinstance(tok, Identifier) and not in_initializer and self.value(i + 1) in ("(", "{") \
+                        and self.value(i - 1) not in (".", "new"):
+                    method = self.declaration(frame_type, member_start, i)
+                    if method is not None:
+                        frame_type.methods.append(method)
+                        if self.value(method.end) == ";":
+                            member_start = method.end + 1
+                            i = method.end + 1
+                            continue
+                        pending_method = method
+                        i = self.body_open(i)
+                        continue
+
+            # --- method bodies ---
+            method = method_frame()
+            if method is not None:
+                if v == "new" and i + 1 < self.n and isinstance(self.t[i + 1], Identifier):
+                    name, j = self.qualified(i + 1)
+                    j = self.skip_generics(j)
+                    if self.value(j) == "(":
+                        call_at_paren[j] = len(method.calls)
+                        method.calls.append(CallSite("new", name, tok.position.line, None))
+                    i = j
+                    continue
+                if v in ("this", "super") and self.value(i + 1) == "(" and self.value(i - 1) != ".":
+                    call_at_paren[i + 1] = len(method.calls)
+                    method.calls.append(CallSite(v, "<init>", tok.position.line, None))
+                elif isinstance(tok, Identifier) and self.value(i + 1) == "(" and not self.declares(i):
+                    call_at_paren[i + 1] = len(method.calls)
+                    method.calls.append(self.call_site(i, closed_call))
+                elif isinstance(tok, Identifier) and self.value(i + 1) in ("=", ";", ":", ")", ",") \
+                        and _is_type_token(self.t[i - 1]) and self.value(i - 2) not in (".", "new"):
+                    method.locals[v] = self.local_type(i - 1)
+            i += 1
+
+        return self.result
+
+    def declares(self, i):
+        """True if the name at i follows a type, i.e. declares a method (local class) rather than calls one."""
+        prev = self.t[i - 1]
+        if isinstance(prev, Identifier):
+            return prev.value not in CONTEXTUAL_MODIFIERS
+        return isinstance(prev, BasicType) or prev.value in ("void", "]")
+
+    def body_open(self, name_index):
+        """Index of the `{` opening the body of the declaration named at name_index."""
+        j = name_index + 1
+        if self.value(j) == "(":
+            j = self.match(j, "(", ")") + 1
+        while j < self.n and self.value(j) != "{":
+            j += 1
+        return j
+
+    def declaration(self, frame_type, member_start, i):
+        """FastMethod for a method/constructor declared at name index i, or None if it is not one."""
+        name = self.value(i)
+        simple = frame_type.name.rsplit(".", 1)[-1]
+        if self.value(i + 1) == "{":
+            if name != simple or frame_type.kind != "record":
+                return None
+            params, after = [], i + 1                     # compact record constructor
+        else:
+            close = self.match(i + 1, "(", ")")
+            after = close + 1
+            if self.value(after) == "throws":
+                while after < self.n and self.value(after) not in ("{", ";"):
+                    after += 1
+            if self.value(after) == "default":       # annotation element default value
+                while after < self.n and self.value(after) != ";":
+                    after += 1
+            if self.value(after) not in ("{", ";"):
+                return None
+            params = self.params(i + 1, close)
+        head = self.member_head(member_start, i)
+        is_ctor = name == simple and head == i
+        method = FastMethod(
+            "<init>" if is_ctor else name, is_ctor,
+            "" if is_ctor else self.text(head, i),
+            params, self.line(member_start), i,
+        )
+        method.modifiers = {self.value(j) for j in range(member_start, head) if isinstance(self.t[j], Modifier)}
+        if self.value(after) == ";":
+            method.end = after
+            method.end_line = self.line(after)
+        return method
+
+    def fields(self, frame_type, member_start, end):
+        """Record each `name` of a field declaration `Type a = ..., b;` spanning [member_start, end)."""
+        head = self.member_head(member_start, end)
+        type_text = None
+        name = None
+        depth = 0
+        in_init = False
+        declared = False
+        for j in range(head, end + 1):
+            v = self.value(j)
+            if j == end or (v == "," and depth == 0):
+                if name is not None:
+                    if type_text is None:
+                        type_text = self.text(head, name)
+                    if type_text:
+                        frame_type.fields[self.value(name)] = type_text
+                        declared = True
+                name = None
+                in_init = False
+                continue
+            if v == "=" and depth == 0:
+                in_init = True
+            elif v in ("(", "[", "{") or (v == "<" and not in_init):
+                depth += 1
+            elif v in (")", "]", "}") or (v in (">", ">>") and not in_init):
+                depth -= 2 if v == ">>" else 1
+            elif depth == 0 and not in_init and isinstance(self.t[j], Identifier):
+                name = j
+        if declared:
+            frame_type.field_spans.append((self.line(member_start), self.line(end)))
+
+    def local_type(self, j):
+        """Type text of a local declared with its type ending at token j."""
+        end = j + 1
+        while self.value(j) in ("]", "["):
+            j -= 1
+        if self.value(j) in (">", ">>"):
+            depth = 0
+            while j > 0:
+                v = self.value(j)
+                depth += {">": 1, ">>": 2, "<": -1}.get(v, 0)
+                if depth <= 0 and v == "<":
+                    break
+                j -= 1
+            j -= 1
+        while self.value(j - 1) == "." and j >= 2:
+            j -= 2
+        return self.text(j, end)
+
+    def call_site(self, i, closed_call):
+        """CallSite for the invocation whose name is at i."""
+        line = self.line(i)
+        if self.value(i - 1) != ".":
+            return CallSite(None, self.value(i), line, None)
+        j = i - 2
+        if self.value(j) == ")":
+            return CallSite(CHAINED, self.value(i), line, closed_call.get(j))
+        if self.value(j) == "super":
+            return CallSite("super", self.value(i), line, None)
+        parts = []
+        while j >= 0 and isinstance(self.t[j], Identifier) or self.value(j) == "this":
+            parts.append(self.value(j))
+            if self.value(j - 1) != ".":
+                break
+            j -= 2
+        parts.reverse()
+        if parts and parts[0] == "this":
+            parts = parts[1:] or ["this"]
+        return CallSite(".".join(parts) or None, self.value(i), line, None)
+
+
+# ---------- coverage / speed report ----------
+
+def compare_parsers(paths):
+    """
+    Run javalang's full parser and the fast scan over `paths`.
+    Returns {"files", "full": {...}, "fast": {...}, "method_recall"} where each side
+    has ok/failed file counts, types, methods, calls and seconds; method_recall
+    is the share of (type, method) pairs the full parser found that the fast scan
+    also found, over files both could read.
+    """
+    stats = {side: {"ok": 0, "failed": 0, "types": 0, "methods": 0, "calls": 0, "seconds": 0.0}
+             for side in ("full", "fast")}
+    both = matched = 0
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            code = f.read()
+
+        started = time.perf_counter()
+        full_methods = None
+        try:
+            tree = javalang.parse.parse(code)
+            full_methods = set()
+            for _, decl in tree.filter(javalang.tree.TypeDeclaration):
+                stats["full"]["types"] += 1
+                body = decl.body.declarations if isinstance(decl, javalang.tree.EnumDeclaration) else decl.body
+                for m in body or ():
+                    if isinstance(m, (javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)):
+                        name = "<init>" if isinstance(m, javalang.tree.ConstructorDeclaration) else m.name
+                        full_methods.add((decl.name, name))
+                        stats["full"]["methods"] += 1
+            stats["full"]["calls"] += sum(1 for _ in tree.filter(javalang.tree.MethodInvocation)) \
+                + sum(1 for _ in tree.filter(javalang.tree.ClassCreator)) \
+                + sum(1 for _ in tree.filter(javalang.tree.SuperConstructorInvocation)) \
+                + sum(1 for _ in tree.filter(javalang.tree.ExplicitConstructorInvocation))
+            stats["full"]["ok"] += 1
+        except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError, RecursionError):
+            stats["full"]["failed"] += 1
+        stats["full"]["seconds"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        fast_methods = None
+        try:
+            scan = fast_scan(code)
+            fast_methods = {(t.name.rsplit(".", 1)[-1], m.name) for t in scan.types for m in t.methods}
+            stats["fast"]["types"] += len(scan.types)
+            stats["fast"]["methods"] += sum(len(t.methods) for t in scan.types)
+            stats["fast"]["calls"] += sum(len(m.calls) for t in scan.types for m in t.methods)
+            stats["fast"]["ok"] += 1
+        except javalang.tokenizer.LexerError:
+            stats["fast"]["failed"] += 1
+        stats["fast"]["seconds"] += time.perf_counter() - started
+
+        if full_methods is not None and fast_methods is not None:
+            both += len(full_methods)
+            matched += len(full_methods & fast_methods)
+
+    return {"files": len(paths), **stats, "method_recall": matched / both if both else None}
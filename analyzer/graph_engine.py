@@ -0,0 +1,312 @@
+# analyzer/graph_engine.py
+
+import struct
+import numpy as np
+
+# File layout: header, newline-joined node names, then the CSR arrays.
+MAGIC = b"JCG1"
+HEADER = struct.Struct("<4sIQQB")  # magic, version, n_nodes, n_edges, has_scc
+VERSION = 1
+
+
+def node_name(class_name, method_name):
+    """Key used for a method node: `Class.method`, or just `method` when the class is unknown."""
+    return f"{class_name}.{method_name}" if class_name else method_name
+
+
+def _build_csr(src, dst, n_nodes):
+    """Return (offsets, targets) with targets grouped by src and sorted within each group."""
+    order = np.lexsort((dst, src))
+    targets = dst[order].astype(np.int32)
+    counts = np.bincount(src, minlength=n_nodes)
+    offsets = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, targets
+
+
+def _gather(offsets, targets, frontier):
+    """All neighbours of every node in `frontier`, in one vectorised slice."""
+    starts = offsets[frontier]
+    lengths = offsets[frontier + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int32)
+    shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return targets[np.arange(total) + shift]
+
+
+class CallGraph:
+    """
+    Read-only call graph with interned integer node ids.
+
+    Edges are held twice in CSR form (forward = callees, reverse = callers), so
+    every neighbour lookup is a single array slice and BFS expands whole
+    frontiers at once.
+    """
+
+    def __init__(self, names, fwd_offsets, fwd_targets, rev_offsets, rev_targets, scc=None):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.fwd_offsets = fwd_offsets
+        self.fwd_targets = fwd_targets
+        self.rev_offsets = rev_offsets
+        self.rev_targets = rev_targets
+        self._scc = scc
+        self._classes = None
+
+    # ---------- construction ----------
+
+    @classmethod
+    def from_edges(cls, edges):
+        """
+        Build from an iterable of (caller, callee) node names.
+        Duplicate edges are collapsed.
+        """
+        ids = {}
+        names = []
+        src = []
+        dst = []
+        for caller, callee in edges:
+            for name in (caller, callee):
+                if name not in ids:
+                    ids[name] = len(names)
+                    names.append(name)
+            src.append(ids[caller])
+            dst.append(ids[callee])
+
+        n = len(names)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        if len(src):
+            unique = np.unique(src * max(n, 1) + dst)
+            src, dst = unique // n, unique % n
+
+        fwd_offsets, fwd_targets = _build_csr(src, dst, n)
+        rev_offsets, rev_targets = _build_csr(dst, src, n)
+        return cls(names, fwd_offsets, fwd_targets, rev_offsets, rev_targets)
+
+    @classmethod
+    def from_db(cls, conn, project_id=None):
+        """
+        Load the rows of `method_calls` into a graph: one project's partition,
+        or every project when `project_id` is None.
+        Resolved `*_fqmn` keys are used when present; legacy rows fall back to `Class.method`.
+        """
+        with conn.cursor(name="call_graph_edges") as cur:
+            cur.itersize = 100_000
+            cur.execute("""
+                SELECT COALESCE(caller_fqmn, CONCAT_WS('.', caller_class, caller_method)),
+                       COALESCE(callee_fqmn, CONCAT_WS('.', called_class, called_method))
+                FROM method_calls
+                WHERE %(project)s IS NULL OR project_id = %(project)s;
+            """, {"project": project_id})
+            return cls.from_edges(cur)
+
+    # ---------- serialisation ----------
+
+    def save(self, path):
+        """Write the graph to a compact binary file (reload with `CallGraph.load`)."""
+        blob = "\n".join(self.names).encode("utf-8")
+        has_scc = self._scc is not None
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.names), len(self.fwd_targets), has_scc))
+            f.write(struct.pack("<Q", len(blob)))
+            f.write(blob)
+            for arr in (self.fwd_offsets, self.fwd_targets, self.rev_offsets, self.rev_targets):
+                f.write(arr.tobytes())
+            if has_scc:
+                f.write(self._scc.astype(np.int32).tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, version, n, m, has_scc = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a call graph file (or unsupported version): {path}")
+        pos = HEADER.size
+        (blob_len,) = struct.unpack_from("<Q", data, pos)
+        pos += 8
+        names = data[pos:pos + blob_len].decode("utf-8").split("\n") if n else []
+        pos += blob_len
+
+        def take(dtype, count):
+            nonlocal pos
+            arr = np.frombuffer(data, dtype=dtype, count=count, offset=pos)
+            pos += arr.nbytes
+            return arr
+
+        fwd_offsets = take(np.int64, n + 1)
+        fwd_targets = take(np.int32, m)
+        rev_offsets = take(np.int64, n + 1)
+        rev_targets = take(np.int32, m)
+        scc = take(np.int32, n) if has_scc else None
+        return cls(names, fwd_offsets, fwd_targets, rev_offsets, rev_targets, scc)
+
+    # ---------- queries ----------
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return len(self.fwd_targets)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def _id(self, name):
+        try:
+            return self.ids[name]
+        except KeyError:
+            raise KeyError(f"Unknown call graph node: {name}") from None
+
+    @staticmethod
+    def class_of(name):
+        """`pkg.Type` for a `pkg.Type.method` node (empty for bare method names)."""
+        return name.rsplit(".", 1)[0] if "." in name else ""
+
+    def nodes_of_class(self, class_name):
+        """Method nodes declared on `class_name`, matched by FQCN or simple name."""
+        if self._classes is None:
+            self._classes = {}
+            for name in self.names:
+                cls = self.class_of(name)
+                if not cls:
+                    continue
+                self._classes.setdefault(cls, []).append(name)
+                simple = cls.rsplit(".", 1)[-1]
+                if simple != cls:
+                    self._classes.setdefault(simple, []).append(name)
+        return self._classes.get(class_name, [])
+
+    def callees(self, name):
+        i = self._id(name)
+        return [self.names[j] for j in self.fwd_targets[self.fwd_offsets[i]:self.fwd_offsets[i + 1]]]
+
+    def callers(self, name):
+        i = self._id(name)
+        return [self.names[j] for j in self.rev_targets[self.rev_offsets[i]:self.rev_offsets[i + 1]]]
+
+    def _adjacency(self, direction):
+        if direction == "out":
+            return [(self.fwd_offsets, self.fwd_targets)]
+        if direction == "in":
+            return [(self.rev_offsets, self.rev_targets)]
+        if direction == "both":
+            return [(self.fwd_offsets, self.fwd_targets), (self.rev_offsets, self.rev_targets)]
+        raise ValueError(f"direction must be 'out', 'in' or 'both', got {direction!r}")
+
+    def _bfs(self, start, max_depth, direction, stop_at=None):
+        """Frontier-at-a-time BFS. Returns hop distance per node (-1 = unreached)."""
+        adjacency = self._adjacency(direction)
+        dist = np.full(len(self.names), -1, dtype=np.int32)
+        dist[start] = 0
+        frontier = np.array([start], dtype=np.int64)
+        depth = 0
+        while len(frontier) and (max_depth is None or depth < max_depth):
+            depth += 1
+            found = np.concatenate([_gather(off, tgt, frontier) for off, tgt in adjacency])
+            found = np.unique(found)
+            frontier = found[dist[found] < 0].astype(np.int64)
+            dist[frontier] = depth
+            if stop_at is not None and dist[stop_at] >= 0:
+                break
+        return dist
+
+    def neighbourhood(self, name, k=1, direction="both"):
+        """
+        Nodes within `k` hops of `name` (k=None means unbounded).
+        Returns {node_name: hops}, excluding the start node.
+        """
+        start = self._id(name)
+        dist = self._bfs(start, k, direction)
+        hit = np.nonzero(dist > 0)[0]
+        return {self.names[i]: int(dist[i]) for i in hit}
+
+    def reachable(self, source, target, max_depth=None):
+        """True if `target` can be reached from `source` by following calls."""
+        s, t = self._id(source), self._id(target)
+        if s == t:
+            return True
+        return bool(self._bfs(s, max_depth, "out", stop_at=t)[t] >= 0)
+
+    # ---------- strongly connected components ----------
+
+    def _compute_scc(self):
+        """Iterative Tarjan over the forward CSR; returns a component label per node."""
+        n = len(self.names)
+        offsets = self.fwd_offsets.tolist()
+        targets = self.fwd_targets.tolist()
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        label = [-1] * n
+        stack = []
+        counter = 0
+        n_comp = 0
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            work = [(root, offsets[root])]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+
+            while work:
+                v, pos = work[-1]
+                end = offsets[v + 1]
+                if pos < end:
+                    work[-1] = (v, pos + 1)
+                    w = targets[pos]
+                    if index[w] == -1:
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, offsets[w]))
+                    elif on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[v] < low[parent]:
+                        low[parent] = low[v]
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        label[w] = n_comp
+                        if w == v:
+                            break
+                    n_comp += 1
+
+        return np.asarray(label, dtype=np.int32)
+
+    def strongly_connected_components(self, min_size=2):
+        """
+        Groups of mutually recursive methods, largest first.
+        Labels are computed once and cached (and persisted by `save`).
+        """
+        if self._scc is None:
+            self._scc = self._compute_scc()
+        if not len(self._scc):
+            return []
+        sizes = np.bincount(self._scc)
+        wanted = np.nonzero(sizes >= min_size)[0]
+        groups = {int(c): [] for c in wanted}
+        for i in np.nonzero(np.isin(self._scc, wanted))[0]:
+            groups[int(self._scc[i])].append(self.names[i])
+        return sorted(groups.values(), key=len, reverse=True)
+
+    def component_of(self, name):
+        """All nodes in the same strongly connected component as `name`."""
+        i = self._id(name)
+        if self._scc is None:
+            self._scc = self._compute_scc()
+        return [self.names[j] for j in np.nonzero(self._scc == self._scc[i])[0]]
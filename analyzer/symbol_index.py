@@ -0,0 +1,777 @@
+# analyzer/symbol_index.py
+
+import bisect
+
+import javalang
+from psycopg2.extras import execute_values
+
+from analyzer.fast_scan import fast_scan, base_type, CHAINED
+from analyzer.graph_engine import node_name
+from config import DEFAULT_PROJECT
+
+DDL = """
+DO $$
+BEGIN
+    -- Tables from before per-project indexing have no project_id; they only hold
+    -- data derived from the sources, so drop them and let the next scan refill them.
+    IF EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = 'symbol_types')
+       AND NOT EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_name = 'symbol_types' AND column_name = 'project_id') THEN
+        DROP TABLE IF EXISTS symbol_types, symbol_imports, symbol_fields, symbol_methods;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS symbol_types (
+    project_id TEXT NOT NULL,
+    fqcn TEXT NOT NULL,
+    simple_name TEXT NOT NULL,
+    package TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    supertypes TEXT[] NOT NULL DEFAULT '{}',
+    PRIMARY KEY (project_id, fqcn)
+);
+
+CREATE TABLE IF NOT EXISTS symbol_imports (
+    project_id TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    import_path TEXT NOT NULL,
+    is_static BOOLEAN NOT NULL DEFAULT FALSE,
+    is_wildcard BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE TABLE IF NOT EXISTS symbol_fields (
+    project_id TEXT NOT NULL,
+    fqcn TEXT NOT NULL,
+    field_name TEXT NOT NULL,
+    field_type TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    PRIMARY KEY (project_id, fqcn, field_name)
+);
+
+CREATE TABLE IF NOT EXISTS symbol_methods (
+    project_id TEXT NOT NULL,
+    fqcn TEXT NOT NULL,
+    method_name TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    visibility TEXT NOT NULL DEFAULT 'package',
+    return_type TEXT DEFAULT '',
+    params TEXT DEFAULT '',
+    is_constructor BOOLEAN NOT NULL DEFAULT FALSE,
+    file_path TEXT NOT NULL,
+    PRIMARY KEY (project_id, fqcn, signature)
+);
+
+CREATE INDEX IF NOT EXISTS idx_symbol_types_simple ON symbol_types(project_id, simple_name);
+CREATE INDEX IF NOT EXISTS idx_symbol_types_file ON symbol_types(project_id, file_path);
+CREATE INDEX IF NOT EXISTS idx_symbol_imports_file ON symbol_imports(project_id, file_path);
+CREATE INDEX IF NOT EXISTS idx_symbol_fields_file ON symbol_fields(project_id, file_path);
+CREATE INDEX IF NOT EXISTS idx_symbol_methods_name ON symbol_methods(project_id, fqcn, method_name);
+CREATE INDEX IF NOT EXISTS idx_symbol_methods_file ON symbol_methods(project_id, file_path);
+"""
+
+TYPE_KINDS = {
+    javalang.tree.ClassDeclaration: "class",
+    javalang.tree.InterfaceDeclaration: "interface",
+    javalang.tree.EnumDeclaration: "enum",
+    javalang.tree.AnnotationDeclaration: "annotation",
+}
+
+CONSTRUCTOR = "<init>"
+# Synthetic caller for calls made in `static { }` blocks; instance `{ }` blocks use CONSTRUCTOR
+STATIC_INIT = "<clinit>"
+
+# Implicitly imported in every compilation unit
+JAVA_LANG = {
+    "Object", "String", "StringBuilder", "Integer", "Long", "Short", "Byte", "Double", "Float",
+    "Boolean", "Character", "Number", "Math", "System", "Thread", "Enum", "Iterable",
+    "Exception", "RuntimeException", "IllegalArgumentException", "IllegalStateException",
+}
+
+
+def type_name(t):
+    """Base name of a javalang type node, including nested parts (`Map.Entry`), without generics."""
+    if t is None:
+        return "void"
+    name = t.name
+    sub = getattr(t, "sub_type", None)
+    while sub is not None:
+        name = f"{name}.{sub.name}"
+        sub = getattr(sub, "sub_type", None)
+    return name
+
+
+def type_str(t):
+    """Source-like rendering of a type node (`List<User>`, `int[]`), used in signatures."""
+    if t is None:
+        return "void"
+    out = t.name
+    args = getattr(t, "arguments", None)
+    if args:
+        out += "<" + ", ".join(type_str(a.type) if a.type is not None else "?" for a in args) + ">"
+    sub = getattr(t, "sub_type", None)
+    if sub is not None:
+        out += "." + type_str(sub)
+    return out + "[]" * len(t.dimensions or [])
+
+
+def _visibility(modifiers):
+    for v in ("public", "protected", "private"):
+        if v in (modifiers or ()):
+            return v
+    return "package"
+
+
+def _body_members(type_decl):
+    """Members of a type body; enums keep theirs under body.declarations."""
+    if isinstance(type_decl, javalang.tree.EnumDeclaration):
+        return type_decl.body.declarations or []
+    return type_decl.body or []
+
+
+class CompilationUnitContext:
+    """Package + imports of one file, used to turn simple type names into FQCNs."""
+
+    def __init__(self, file_path, package, import_paths=(), wildcards=(), static_paths=(), static_wildcards=()):
+        self.file_path = file_path
+        self.package = package
+        self.imports = {p.rsplit(".", 1)[-1]: p for p in import_paths}  # simple name -> FQCN
+        self.wildcards = list(wildcards)                                # package prefixes
+        self.static_imports = {p.rsplit(".", 1)[-1]: p.rsplit(".", 1)[0] for p in static_paths}  # member -> FQCN
+        self.static_wildcards = list(static_wildcards)                  # FQCNs whose static members are imported
+
+    @classmethod
+    def from_imports(cls, file_path, package, imports):
+        """Build from javalang Import nodes."""
+        return cls(
+            file_path, package,
+            [imp.path for imp in imports if not imp.static and not imp.wildcard],
+            [imp.path for imp in imports if not imp.static and imp.wildcard],
+            [imp.path for imp in imports if imp.static and not imp.wildcard],
+            [imp.path for imp in imports if imp.static and imp.wildcard],
+        )
+
+
+class SymbolIndex:
+    """
+    Project-wide index of types, fields and method signatures.
+
+    Files are added in a first pass (`add_file`); once every type is known,
+    `resolve_calls` walks each method body and maps invocations to fully
+    qualified `pkg.Type.method` targets using parameter, local and field
+    types plus the file's imports.
+    """
+
+    def __init__(self):
+        self.types = {}          # fqcn -> type record
+        self.simple_names = {}   # simple name -> [fqcn, ...]
+        self.units = []          # (CompilationUnitContext, [(fqcn, type_decl), ...])
+        self._linked = False
+
+    # ---------- pass 1: declarations ----------
+
+    def add_file(self, file_path, code, fast=False):
+        """
+        Index one file. Files javalang cannot parse (records, sealed types,
+        text blocks, ...) and every file when `fast` is set go through the
+        tokenizer-only analyzer.fast_scan instead. Returns False only if the
+        file cannot even be tokenized.
+        """
+        self.remove_file(file_path)
+        if not fast:
+            try:
+                tokens = list(javalang.tokenizer.tokenize(code))
+                self.add_tree(file_path, javalang.parser.Parser(tokens).parse(), tokens)
+                return True
+            except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError, RecursionError) as e:
+                print(f"⚠️ Full parse failed, using fast scan: {file_path}: {e}")
+        try:
+            scan = fast_scan(code)
+        except javalang.tokenizer.LexerError as e:
+            print(f"⚠️ Skipped file (cannot tokenize): {file_path}: {e}")
+            return False
+        self.add_scan(file_path, scan)
+        return True
+
+    def remove_file(self, file_path):
+        """Forget the declarations of `file_path`, so re-adding it (or failing to) leaves nothing stale."""
+        dropped = {fqcn for ctx, declared in self.units if ctx.file_path == file_path for fqcn, _ in declared}
+        if not dropped:
+            return
+        self.units = [u for u in self.units if u[0].file_path != file_path]
+        for fqcn in dropped:
+            self.types.pop(fqcn, None)
+        for name, fqcns in list(self.simple_names.items()):
+            kept = [f for f in fqcns if f not in dropped]
+            if kept:
+                self.simple_names[name] = kept
+            else:
+                del self.simple_names[name]
+        self._linked = False
+
+    def add_tree(self, file_path, tree, tokens=None):
+        """
+        Index a parsed compilation unit. `tokens` (the ones `tree` was parsed
+        from) are needed to tell static from instance initializer blocks,
+        since javalang drops their `static`; without them initializer calls
+        are not recorded.
+        """
+        package = tree.package.name if tree.package else ""
+        ctx = CompilationUnitContext.from_imports(file_path, package, tree.imports or [])
+        declared = []
+
+        for path, decl in tree.filter(javalang.tree.TypeDeclaration):
+            outer = [p.name for p in path if isinstance(p, javalang.tree.TypeDeclaration)]
+            simple = ".".join(outer + [decl.name])
+            fqcn = f"{package}.{simple}" if package else simple
+            self.types[fqcn] = self._type_record(fqcn, decl, ctx, tokens)
+            self.simple_names.setdefault(decl.name, []).append(fqcn)
+            if outer:
+                # allow `Outer.Inner` lookups as well as `Inner`
+                self.simple_names.setdefault(simple, []).append(fqcn)
+            declared.append((fqcn, decl))
+
+        self.units.append((ctx, declared))
+        self._linked = False
+
+    def add_scan(self, file_path, scan):
+        """Index the result of analyzer.fast_scan.fast_scan for one file."""
+        ctx = CompilationUnitContext(
+            file_path, scan.package,
+            [p for p, static, wildcard in scan.imports if not static and not wildcard],
+            [p for p, static, wildcard in scan.imports if not static and wildcard],
+            [p for p, static, wildcard in scan.imports if static and not wildcard],
+            [p for p, static, wildcard in scan.imports if static and wildcard],
+        )
+        declared = []
+        for t in scan.types:
+            fqcn = f"{scan.package}.{t.name}" if scan.package else t.name
+            simple = t.name.rsplit(".", 1)[-1]
+            self.types[fqcn] = {
+                "fqcn": fqcn,
+                "name": simple,
+                "kind": t.kind,
+                "package": scan.package,
+                "file_path": file_path,
+                "supertype_names": [base_type(s) for s in t.supertypes],
+                "supertypes": [],
+                "superclass_name": base_type(t.superclass) if t.superclass else None,
+                "field_names": {f: base_type(ft) for f, ft in t.fields.items()},
+                "fields": {},
+                "methods": [self._scanned_method_record(m) for m in t.methods],
+                "initializers": [self._scanned_method_record(m) for m in t.initializers],
+                "ctx": ctx,
+            }
+            self.simple_names.setdefault(simple, []).append(fqcn)
+            if t.name != simple:
+                self.simple_names.setdefault(t.name, []).append(fqcn)
+            declared.append((fqcn, t))
+
+        self.units.append((ctx, declared))
+        self._linked = False
+
+    def _type_record(self, fqcn, decl, ctx, tokens=None):
+        supertypes = []
+        extends = getattr(decl, "extends", None)
+        if extends is not None:
+            supertypes.extend(extends if isinstance(extends, list) else [extends])
+        supertypes.extend(getattr(decl, "implements", None) or [])
+        superclass = extends if isinstance(decl, javalang.tree.ClassDeclaration) else None
+
+        fields = {}
+        methods = []
+        initializers = []
+        for member in _body_members(decl):
+            if isinstance(member, javalang.tree.FieldDeclaration):
+                for d in member.declarators:
+                    fields[d.name] = type_name(member.type)
+            elif isinstance(member, (javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)):
+                methods.append(self._method_record(member))
+            elif isinstance(member, list) and member and tokens:
+                initializers.append(self._initializer_record(member, tokens))
+
+        return {
+            "fqcn": fqcn,
+            "name": decl.name,
+            "kind": TYPE_KINDS.get(type(decl), "class"),
+            "package": ctx.package,
+            "file_path": ctx.file_path,
+            "supertype_names": [type_name(t) for t in supertypes],
+            "supertypes": [],      # resolved to FQCNs in _link
+            "superclass_name": type_name(superclass) if superclass is not None else None,
+            "field_names": fields,
+            "fields": {},          # resolved to FQCNs in _link
+            "methods": methods,
+            "initializers": initializers,  # callers only: never saved or looked up as members
+            "ctx": ctx,
+        }
+
+    @staticmethod
+    def _initializer_record(statements, tokens):
+        """Record for an initializer block (javalang gives its statements as a bare list)."""
+        first = next((n.position for n in statements if n.position), None)
+        i = bisect.bisect_left([(t.position.line, t.position.column) for t in tokens],
+                               (first.line, first.column)) if first else 0
+        depth = 0  # walk back to the `{` opening the block, skipping nested blocks
+        while i > 0:
+            i -= 1
+            value = tokens[i].value
+            if value == "}":
+                depth += 1
+            elif value == "{":
+                if depth == 0:
+                    break
+                depth -= 1
+        name = STATIC_INIT if i > 0 and tokens[i - 1].value == "static" else CONSTRUCTOR
+        return {
+            "name": name,
+            "signature": f"{name}()",
+            "param_types": {},
+            "is_constructor": False,
+            "node": javalang.tree.MethodDeclaration(name=name, parameters=[], body=statements),
+        }
+
+    @staticmethod
+    def _method_record(member):
+        is_ctor = isinstance(member, javalang.tree.ConstructorDeclaration)
+        name = CONSTRUCTOR if is_ctor else member.name
+        return_type = "" if is_ctor else type_str(member.return_type)
+        params = ", ".join(
+            f"{type_str(p.type)}{'...' if p.varargs else ''} {p.name}" for p in member.parameters
+        )
+        param_types = ",".join(type_str(p.type) for p in member.parameters)
+        return {
+            "name": name,
+            "signature": f"{name}({param_types})",
+            "visibility": _visibility(member.modifiers),
+            "return_type": return_type,
+            "return_name": None if is_ctor else type_name(member.return_type),
+            "params": params,
+            "param_types": {p.name: type_name(p.type) for p in member.parameters},
+            "is_constructor": is_ctor,
+            "node": member,
+        }
+
+    @staticmethod
+    def _scanned_method_record(m):
+        name = CONSTRUCTOR if m.is_constructor else m.name
+        return {
+            "name": name,
+            "signature": f"{name}({','.join(t.replace('...', '') for t, _ in m.params)})",
+            "visibility": _visibility(m.modifiers),
+            "return_type": m.return_type,
+            "return_name": None if m.is_constructor else base_type(m.return_type),
+            "params": ", ".join(f"{t} {n}" for t, n in m.params),
+            "param_types": {n: base_type(t) for t, n in m.params},
+            "is_constructor": m.is_constructor,
+            "node": None,
+            "calls": m.calls,
+            "locals": {n: base_type(t) for n, t in m.locals.items() if t != "var"},
+        }
+
+    # ---------- name resolution ----------
+
+    def resolve_type(self, name, ctx, current=None):
+        """Resolve a (possibly dotted) type name as seen from `ctx`; None if unknown."""
+        if not name:
+            return None
+        if name in self.types:
+            return name
+        head, _, rest = name.partition(".")
+
+        imported = ctx.imports[head] + (f".{rest}" if rest else "") if head in ctx.imports else None
+        candidates = []
+        scope = current
+        while scope and scope in self.types:
+            # member types of the current class, then of each enclosing class
+            candidates.append(f"{scope}.{name}")
+            scope = scope.rpartition(".")[0]
+        if imported:
+            candidates.append(imported)
+        if ctx.package:
+            candidates.append(f"{ctx.package}.{name}")
+        candidates.extend(f"{w}.{name}" for w in ctx.wildcards)
+
+        for c in candidates:
+            if c in self.types:
+                return c
+        if imported:
+            # external library type: the import still tells us the FQCN
+            return imported
+        # a project type that is neither imported nor in scope is not guessed from
+        # its simple name: the edge stays unresolved rather than possibly wrong
+        if name in JAVA_LANG:
+            return f"java.lang.{name}"
+        return None
+
+    def _link(self):
+        """Resolve supertype and field type names once every file is indexed."""
+        if self._linked:
+            return
+        self._linked = True
+        for fqcn, rec in self.types.items():
+            ctx = rec["ctx"]
+            rec["supertypes"] = [self.resolve_type(n, ctx, fqcn) or n for n in rec["supertype_names"]]
+            name = rec.get("superclass_name")
+            rec["superclass"] = (self.resolve_type(name, ctx, fqcn) or name) if name else None
+            rec["fields"] = {f: self.resolve_type(t, ctx, fqcn) or t for f, t in rec["field_names"].items()}
+
+    def _hierarchy(self, fqcn):
+        """fqcn followed by its known supertypes, breadth first."""
+        seen = [fqcn]
+        i = 0
+        while i < len(seen):
+            rec = self.types.get(seen[i])
+            i += 1
+            for sup in rec["supertypes"] if rec else ():
+                if sup not in seen:
+                    seen.append(sup)
+        return seen
+
+    def find_method(self, fqcn, method_name):
+        """(declaring_fqcn, method record) for `method_name` on `fqcn` or a supertype."""
+        for owner in self._hierarchy(fqcn):
+            rec = self.types.get(owner)
+            for m in rec["methods"] if rec else ():
+                if m["name"] == method_name:
+                    return owner, m
+        return None, None
+
+    def find_field(self, fqcn, field_name):
+        for owner in self._hierarchy(fqcn):
+            rec = self.types.get(owner)
+            if rec and field_name in rec["fields"]:
+                return rec["fields"][field_name]
+        return None
+
+    # ---------- pass 2: invocation targets ----------
+
+    def resolve_calls(self):
+        """
+        Yield (file_path, caller_fqcn, caller_method, callee_fqcn, callee_method, resolved)
+        for every invocation and constructor call in the indexed files.
+        Unresolved receivers fall back to the raw qualifier text.
+        """
+        self._link()
+        for ctx, declared in self.units:
+            for fqcn, _decl in declared:
+                rec = self.types[fqcn]
+                for m in rec["methods"] + rec["initializers"]:
+                    for callee_fqcn, callee_method, resolved in self._method_calls(fqcn, m, ctx):
+                        yield ctx.file_path, fqcn, m["name"], callee_fqcn, callee_method, resolved
+
+    def _method_calls(self, fqcn, method, ctx):
+        node = method["node"]
+        if node is None:
+            if method.get("calls"):
+                yield from self._scanned_calls(fqcn, method, ctx)
+            return
+        if not node.body:
+            return
+
+        # parameters and locals share one flat scope per method (good enough for lookup)
+        scope = {n: self.resolve_type(t, ctx, fqcn) or t for n, t in method["param_types"].items()}
+        for _, var in node.filter(javalang.tree.VariableDeclaration):
+            t = self.resolve_type(type_name(var.type), ctx, fqcn) or type_name(var.type)
+            for d in var.declarators:
+                scope[d.name] = t
+        for _, p in node.filter(javalang.tree.FormalParameter):
+            scope.setdefault(p.name, self.resolve_type(type_name(p.type), ctx, fqcn) or type_name(p.type))
+        for _, p in node.filter(javalang.tree.CatchClauseParameter):
+            if p.types:
+                scope.setdefault(p.name, self.resolve_type(p.types[0], ctx, fqcn) or p.types[0])
+        for _, r in node.filter(javalang.tree.TryResource):
+            scope.setdefault(r.name, self.resolve_type(type_name(r.type), ctx, fqcn) or type_name(r.type))
+
+        # invocations reached through another primary's selectors are handled by _walk_chain
+        chained = set()
+        for _, prim in node.filter(javalang.tree.Primary):
+            for sel in prim.selectors or ():
+                chained.add(id(sel))
+
+        for _, prim in node.filter(javalang.tree.Primary):
+            if id(prim) in chained:
+                continue
+            yield from self._walk_chain(prim, fqcn, scope, ctx)
+
+    def _scanned_calls(self, fqcn, method, ctx):
+        """_method_calls for a fast-scanned method: walks its call sites in source order."""
+        scope = {n: self.resolve_type(t, ctx, fqcn) or t for n, t in method["param_types"].items()}
+        for n, t in method["locals"].items():
+            scope.setdefault(n, self.resolve_type(t, ctx, fqcn) or t)
+
+        receivers = []  # type each call returns, for calls chained on it
+        for call in method["calls"]:
+            current = None
+            if call.qualifier == "new":
+                created = self.resolve_type(call.name, ctx, fqcn) or call.name
+                yield created, CONSTRUCTOR, created in self.types or "." in created
+                current = created
+            elif call.name == CONSTRUCTOR:
+                owner = self._constructor_owner(fqcn, call.qualifier)
+                yield owner, CONSTRUCTOR, owner in self.types or "." in owner
+            elif call.qualifier == CHAINED:
+                owner = receivers[call.prev] if call.prev is not None else None
+                if owner is None:
+                    yield "?", call.name, False
+                else:
+                    current, _ = yield from self._invoke(owner, call.name, True)
+            elif call.qualifier == "super":
+                rec = self.types.get(fqcn)
+                owner = rec["supertypes"][0] if rec and rec["supertypes"] else fqcn
+                current, _ = yield from self._invoke(owner, call.name, True)
+            elif call.qualifier is None:
+                current, _ = yield from self._invoke(self._unqualified_owner(fqcn, call.name, ctx), call.name, True)
+            else:
+                owner, ok = self._qualifier_type(call.qualifier, fqcn, scope, ctx)
+                current, _ = yield from self._invoke(owner, call.name, ok)
+            receivers.append(current)
+
+    def _variable_type(self, name, fqcn, scope, ctx):
+        if name in scope:
+            return scope[name]
+        field_t = self.find_field(fqcn, name)
+        if field_t:
+            return field_t
+        return None
+
+    def _qualifier_type(self, qualifier, fqcn, scope, ctx):
+        """Type of `qualifier` in `qualifier.method()`: a variable, a field, or a class (static call)."""
+        if not qualifier:
+            return fqcn, True
+        if qualifier == "this":
+            return fqcn, True
+        head, _, rest = qualifier.partition(".")
+        t = self._variable_type(head, fqcn, scope, ctx)
+        if t is not None:
+            for part in rest.split(".") if rest else ():
+                t = self.find_field(t, part) if t in self.types else None
+                if t is None:
+                    return qualifier, False
+            return t, True
+        cls = self.resolve_type(qualifier, ctx, fqcn)
+        if cls is not None:
+            return cls, True
+        return qualifier, False
+
+    def _walk_chain(self, prim, fqcn, scope, ctx):
+        """Yield call targets for a primary and its selector chain, tracking the receiver type."""
+        current = None
+        resolved = True
+
+        if isinstance(prim, javalang.tree.MethodInvocation) and not prim.qualifier:
+            owner = self._unqualified_owner(fqcn, prim.member, ctx)
+            current, resolved = yield from self._invoke(owner, prim.member, True)
+        elif isinstance(prim, javalang.tree.MethodInvocation):
+            owner, ok = self._qualifier_type(prim.qualifier, fqcn, scope, ctx)
+            current, resolved = yield from self._invoke(owner, prim.member, ok)
+        elif isinstance(prim, javalang.tree.SuperMethodInvocation):
+            rec = self.types.get(fqcn)
+            owner = rec["supertypes"][0] if rec and rec["supertypes"] else fqcn
+            current, resolved = yield from self._invoke(owner, prim.member, True)
+        elif isinstance(prim, javalang.tree.ClassCreator):
+            created = self.resolve_type(type_name(prim.type), ctx, fqcn) or type_name(prim.type)
+            yield created, CONSTRUCTOR, created in self.types or "." in created
+            current = created
+        elif isinstance(prim, (javalang.tree.SuperConstructorInvocation, javalang.tree.ExplicitConstructorInvocation)):
+            qualifier = "super" if isinstance(prim, javalang.tree.SuperConstructorInvocation) else "this"
+            owner = self._constructor_owner(fqcn, qualifier)
+            yield owner, CONSTRUCTOR, owner in self.types or "." in owner
+            return
+        elif isinstance(prim, javalang.tree.This):
+            current = fqcn
+        elif isinstance(prim, javalang.tree.MemberReference):
+            if prim.qualifier:
+                owner, resolved = self._qualifier_type(prim.qualifier, fqcn, scope, ctx)
+                current = self.find_field(owner, prim.member) if resolved else None
+            else:
+                current = self._variable_type(prim.member, fqcn, scope, ctx)
+        else:
+            return
+
+        for sel in prim.selectors or ():
+            if isinstance(sel, javalang.tree.MethodInvocation):
+                if current is None:
+                    yield "?", sel.member, False
+                    continue
+                current, resolved = yield from self._invoke(current, sel.member, resolved)
+            elif isinstance(sel, javalang.tree.MemberReference):
+                current = self.find_field(current, sel.member) if current in self.types else None
+
+    def _constructor_owner(self, fqcn, qualifier):
+        """Class whose constructor `this(...)` / `super(...)` in `fqcn` runs."""
+        if qualifier == "this":
+            return fqcn
+        rec = self.types.get(fqcn)
+        return rec.get("superclass") if rec and rec.get("superclass") else "java.lang.Object"
+
+    def _unqualified_owner(self, fqcn, member, ctx):
+        """Class declaring an unqualified `member()` call: the caller's hierarchy, else a static import."""
+        if self.find_method(fqcn, member)[1] is not None:
+            return fqcn
+        if member in ctx.static_imports:
+            return self.resolve_type(ctx.static_imports[member], ctx, fqcn) or ctx.static_imports[member]
+        for imported in ctx.static_wildcards:
+            owner = self.resolve_type(imported, ctx, fqcn) or imported
+            if self.find_method(owner, member)[1] is not None:
+                return owner
+        return fqcn
+
+    def _invoke(self, owner, member, resolved):
+        """
+        Record owner.member(); return the receiver type for the next selector.
+        A call is resolved only when the method is found on `owner` or a supertype.
+        """
+        if not resolved:
+            yield owner, member, False
+            return None, False
+        declaring, m = self.find_method(owner, member)
+        yield declaring or owner, member, m is not None
+        if m is None:
+            return None, False
+        if not m["return_name"] or m["return_name"] == "void":
+            return None, True
+        ctx = self.types[declaring]["ctx"]
+        return self.resolve_type(m["return_name"], ctx, declaring) or m["return_name"], True
+
+    # ---------- incremental loading ----------
+
+    @classmethod
+    def load(cls, conn, exclude_files=(), project_id=DEFAULT_PROJECT):
+        """
+        Rebuild the declarations of `project_id`'s already-indexed files from the
+        symbol_* tables (skipping `exclude_files`, which are about to be re-parsed).
+        Loaded types resolve calls *into* them; only files added afterwards
+        with `add_file` get their own calls resolved.
+        """
+        index = cls()
+        exclude = list(exclude_files)
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT file_path, import_path, is_static, is_wildcard FROM symbol_imports
+                WHERE project_id = %s AND NOT (file_path = ANY(%s));
+            """, (project_id, exclude))
+            imports = {}  # file -> (paths, wildcards, static paths, static wildcards)
+            for file_path, path, static, wildcard in cur.fetchall():
+                imports.setdefault(file_path, ([], [], [], []))[2 * static + wildcard].append(path)
+
+            cur.execute("""
+                SELECT fqcn, simple_name, package, kind, file_path, supertypes FROM symbol_types
+                WHERE project_id = %s AND NOT (file_path = ANY(%s));
+            """, (project_id, exclude))
+            contexts = {}
+            for fqcn, simple, package, kind, file_path, supertypes in cur.fetchall():
+                ctx = contexts.get(file_path)
+                if ctx is None:
+                    ctx = contexts[file_path] = CompilationUnitContext(
+                        file_path, package, *imports.get(file_path, ([], [], [], [])))
+                index.types[fqcn] = {
+                    "fqcn": fqcn, "name": simple, "kind": kind, "package": package,
+                    "file_path": file_path, "supertype_names": list(supertypes or []),
+                    "supertypes": [], "field_names": {}, "fields": {}, "methods": [], "ctx": ctx,
+                }
+                index.simple_names.setdefault(simple, []).append(fqcn)
+                nested = fqcn[len(package) + 1:] if package else fqcn
+                if nested != simple:
+                    index.simple_names.setdefault(nested, []).append(fqcn)
+
+            cur.execute("""
+                SELECT fqcn, field_name, field_type FROM symbol_fields
+                WHERE project_id = %s AND NOT (file_path = ANY(%s));
+            """, (project_id, exclude))
+            for fqcn, name, field_type in cur.fetchall():
+                if fqcn in index.types:
+                    index.types[fqcn]["field_names"][name] = field_type
+
+            cur.execute("""
+                SELECT fqcn, method_name, signature, visibility, return_type, params, is_constructor
+                FROM symbol_methods WHERE project_id = %s AND NOT (file_path = ANY(%s));
+            """, (project_id, exclude))
+            for fqcn, name, signature, visibility, return_type, params, is_ctor in cur.fetchall():
+                if fqcn not in index.types:
+                    continue
+                index.types[fqcn]["methods"].append({
+                    "name": name, "signature": signature, "visibility": visibility,
+                    "return_type": return_type, "params": params, "is_constructor": is_ctor,
+                    "return_name": None if is_ctor else return_type.split("<", 1)[0].rstrip("[]") or None,
+                    "param_types": {}, "node": None,
+                })
+        conn.commit()
+        return index
+
+    # ---------- persistence ----------
+
+    @staticmethod
+    def ensure_schema(conn):
+        with conn.cursor() as cur:
+            cur.execute(DDL)
+        conn.commit()
+
+    @staticmethod
+    def delete_files(cur, files, project_id=DEFAULT_PROJECT):
+        for table in ("symbol_types", "symbol_imports", "symbol_fields", "symbol_methods"):
+            cur.execute(f"DELETE FROM {table} WHERE project_id = %s AND file_path = ANY(%s);",
+                        (project_id, list(files)))
+
+    @staticmethod
+    def delete_other_files(cur, files, project_id=DEFAULT_PROJECT):
+        """Drop the rows of every file not in `files` (deleted since the last full scan, or NULL paths)."""
+        for table in ("symbol_types", "symbol_imports", "symbol_fields", "symbol_methods"):
+            cur.execute(f"DELETE FROM {table} WHERE project_id = %s AND NOT (file_path = ANY(%s));",
+                        (project_id, list(files)))
+
+    def save(self, conn, project_id=DEFAULT_PROJECT):
+        """Replace `project_id`'s symbol rows of every file added to this index in one transaction."""
+        self._link()
+        files = [ctx.file_path for ctx, _ in self.units]
+        type_rows, import_rows, field_rows, method_rows = [], [], [], []
+        for ctx, declared in self.units:
+            for w in ctx.wildcards:
+                import_rows.append((project_id, ctx.file_path, w, False, True))
+            for path in ctx.imports.values():
+                import_rows.append((project_id, ctx.file_path, path, False, False))
+            for w in ctx.static_wildcards:
+                import_rows.append((project_id, ctx.file_path, w, True, True))
+            for member, owner in ctx.static_imports.items():
+                import_rows.append((project_id, ctx.file_path, f"{owner}.{member}", True, False))
+            for fqcn, _ in declared:
+                rec = self.types[fqcn]
+                type_rows.append((project_id, fqcn, rec["name"], rec["package"], rec["kind"], ctx.file_path, rec["supertypes"]))
+                for f, t in rec["fields"].items():
+                    field_rows.append((project_id, fqcn, f, t, ctx.file_path))
+                for m in rec["methods"]:
+                    method_rows.append((
+                        project_id, fqcn, m["name"], m["signature"], m["visibility"],
+                        m["return_type"], m["params"], m["is_constructor"], ctx.file_path,
+                    ))
+
+        with conn.cursor() as cur:
+            self.delete_files(cur, files, project_id)
+            if type_rows:
+                execute_values(cur, """
+                    INSERT INTO symbol_types (project_id, fqcn, simple_name, package, kind, file_path, supertypes)
+                    VALUES %s ON CONFLICT (project_id, fqcn) DO UPDATE SET
+                        simple_name = EXCLUDED.simple_name, package = EXCLUDED.package,
+                        kind = EXCLUDED.kind, file_path = EXCLUDED.file_path, supertypes = EXCLUDED.supertypes
+                """, type_rows)
+            if import_rows:
+                execute_values(cur, """
+                    INSERT INTO symbol_imports (project_id, file_path, import_path, is_static, is_wildcard) VALUES %s
+                """, import_rows)
+            if field_rows:
+                execute_values(cur, """
+                    INSERT INTO symbol_fields (project_id, fqcn, field_name, field_type, file_path)
+                    VALUES %s ON CONFLICT (project_id, fqcn, field_name) DO UPDATE SET field_type = EXCLUDED.field_type
+                """, field_rows)
+            if method_rows:
+                execute_values(cur, """
+                    INSERT INTO symbol_methods
+                        (project_id, fqcn, method_name, signature, visibility, return_type, params, is_constructor, file_path)
+                    VALUES %s ON CONFLICT (project_id, fqcn, signature) DO NOTHING
+                """, method_rows)
+        conn.commit()
+
+
+def fq_method(fqcn, method_name):
+    """Fully qualified method key used by the call graph and `method_calls.*_fqmn`."""
+    return node_name(fqcn, method_name)
@@ -1,11 +1,20 @@
 # build_call_graph.py
 
+import sys
+
 from analyzer.call_graph import CallGraphBuilder
+from config import DEFAULT_PROJECT
+from db.projects import project_config, snapshot_path
 
 if __name__ == "__main__":
-    project_path = "codebase/src/main/java"  # adjust if needed
+    project_id = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PROJECT
+    project_path = project_config(project_id)["path"]  # adjust in config.PROJECTS if needed
 
-    print(f"🔍 Building call graph for Java project at: {project_path}")
-    builder = CallGraphBuilder(project_path)
+    print(f"🔍 Building call graph for Java project '{project_id}' at: {project_path}")
+    builder = CallGraphBuilder(project_path, project_id)
     builder.scan_codebase()
     print("✅ Call graph build complete! `method_calls` table is now populated.")
+
+    path = snapshot_path(project_id)
+    graph = builder.refresh_snapshot(path)
+    print(f"💾 Saved call graph snapshot ({len(graph)} nodes, {graph.edge_count} edges) -> {path}")
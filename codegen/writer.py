@@ -0,0 +1,145 @@
+# codegen/writer.py
+
+import os
+import re
+import secrets
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Same tolerant header the orchestrator accepts: leading spaces, `//FILE:` without space
+HEADER_RE = re.compile(r'^\s*//\s*FILE\s*:\s*(.+)$', re.M)
+
+PACKAGE_PREFIXES = ("com/", "org/", "io/", "net/")
+
+
+def normalize_rel_path(rel_path: str) -> str:
+    """
+    Headers like `com/example/.../X.java` are saved under `src/main/java/`;
+    `src/main/java/...` and bare filenames are kept as-is. Headers come from
+    model output, so absolute paths and `..` segments raise ValueError.
+    """
+    p = rel_path.replace("\\", "/").strip()
+    if p.startswith("/") or re.match(r"^[A-Za-z]:", p):
+        raise ValueError(f"absolute path in file header: {rel_path!r}")
+    if ".." in p.split("/"):
+        raise ValueError(f"'..' in file header path: {rel_path!r}")
+    if p.startswith("src/main/java/"):
+        return p
+    if p.startswith(PACKAGE_PREFIXES):
+        return f"src/main/java/{p}"
+    return p
+
+
+def split_file_blocks(code_blob: str):
+    """Yield (relative_path, content) for every `// FILE:` block in one pass over the blob."""
+    matches = list(HEADER_RE.finditer(code_blob))
+    if not matches and code_blob.strip():
+        print(f"⚠️ Skipping block (no file marker): {code_blob[:80]!r}")
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(code_blob)
+        content = code_blob[m.end():end].strip()
+        try:
+            rel_path = normalize_rel_path(m.group(1).strip())
+        except ValueError as e:
+            print(f"⚠️ Skipping block ({e})")
+            continue
+        yield rel_path, content
+
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+
+def _create_temp(directory):
+    """
+    New exclusive temp file in `directory`, created 0666 so the kernel applies
+    the umask exactly as for a plain open() (mkstemp would force 0600).
+    Returns (fd, path).
+    """
+    while True:
+        path = os.path.join(directory, f".tmp-{secrets.token_hex(8)}.part")
+        try:
+            return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), path
+        except FileExistsError:
+            continue
+
+
+def write_if_changed(file_path: str, content: str) -> bool:
+    """
+    Atomically replace `file_path` with `content` unless it already holds
+    exactly that content. Returns True when the file was written.
+    """
+    data = content.encode("utf-8")
+    if _sha256_file(file_path) == hashlib.sha256(data).hexdigest():
+        return False
+
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = _create_temp(directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(file_path).st_mode & 0o7777)  # keep a replaced file's mode
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return True
+
+
+class GeneratedFileWriter:
+    """
+    Writes the files of a generated code blob under `base_path`.
+
+    Unchanged files are left alone (mtime untouched), changed files are
+    written via temp file + rename, and large batches go through a thread pool.
+    """
+
+    def __init__(self, base_path, max_workers=8, parallel_threshold=16):
+        self.base_path = base_path
+        self.max_workers = max_workers
+        self.parallel_threshold = parallel_threshold
+
+    def write_blob(self, code_blob: str):
+        """Returns (changed_paths, unchanged_paths)."""
+        if not code_blob or not isinstance(code_blob, str):
+            raise ValueError("❌ Developer did not produce any code.")
+
+        # later blocks for the same path win, as they did when files were rewritten in order
+        files = {}
+        base = os.path.realpath(self.base_path)
+        for rel_path, content in split_file_blocks(code_blob):
+            path = os.path.join(self.base_path, rel_path)
+            if not os.path.realpath(path).startswith(base + os.sep):
+                print(f"⚠️ Skipping block (resolves outside {self.base_path}): {rel_path}")
+                continue
+            files[path] = content
+        return self.write_files(files)
+
+    def write_files(self, files):
+        """files: {absolute_or_base_relative_path: content}. Returns (changed, unchanged)."""
+        items = list(files.items())
+        if len(items) >= self.parallel_threshold:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = list(pool.map(lambda kv: write_if_changed(*kv), items))
+        else:
+            results = [write_if_changed(path, content) for path, content in items]
+
+        changed, unchanged = [], []
+        for (path, _), written in zip(items, results):
+            (changed if written else unchanged).append(path)
+            print(f"💾 Code saved to: {path}" if written else f"⏭️ Unchanged: {path}")
+        return changed, unchanged
@@ -8,3 +8,83 @@ DB_CONFIG = {
 
 OLLAMA_MODEL = "mistral"   # or "llama3.2"
 CHECKPOINT_INTERVAL = 3
+
+# Indexed repositories. Each project gets its own partition of java_metadata /
+# method_calls (see db/projects.py), so scans and searches stay per-project.
+#   path:         Java source root to scan
+#   base_path:    where generated files are written (headers are src/main/java/...)
+#   package_root: root package generated classes must live under
+PROJECTS = {
+    "default": {
+        "path": "codebase/src/main/java",
+        "base_path": "codebase",
+        "package_root": "com.example.userproductapp",
+    },
+}
+DEFAULT_PROJECT = "default"
+
+# Binary snapshot of a project's method_calls (see analyzer/graph_engine.py)
+CALL_GRAPH_PATH = "call_graph.{project}.bin"
+
+# Directories never scanned or watched (build output, IDE and VCS metadata)
+SKIP_FOLDERS = {"target", "build", "out", ".idea", ".git"}
+
+# Watch mode (rag/watcher.py): changes are applied once the tree has been quiet
+# for WATCH_DEBOUNCE_SECONDS (so a branch switch is one batch), but never later
+# than WATCH_MAX_DELAY_SECONDS after the first change of a batch
+WATCH_DEBOUNCE_SECONDS = 1.5
+WATCH_MAX_DELAY_SECONDS = 15.0
+WATCH_POLL_SECONDS = 1.0         # polling fallback when watchdog/inotify is unavailable
+# A failed batch is retried after WATCH_RETRY_SECONDS, doubling per consecutive
+# failure up to WATCH_RETRY_MAX_SECONDS (e.g. while Postgres restarts)
+WATCH_RETRY_SECONDS = 1.0
+WATCH_RETRY_MAX_SECONDS = 60.0
+
+# Method-level chunks (analyzer/chunker.py): members over this many javalang
+# tokens are split at statement boundaries
+CHUNK_MAX_TOKENS = 400
+
+# Tokenizer-only extraction (analyzer/fast_scan.py) is always the fallback for
+# files javalang cannot parse; FAST_SCAN=True uses it for every file
+# (`--fast` on the index/graph commands) for higher throughput
+FAST_SCAN = False
+
+# Developer / reviewer prompt budget (prompts/budget.py); leave room in the
+# model's context window for the generated class
+PROMPT_TOKEN_BUDGET = 6000
+PROMPT_CHARS_PER_TOKEN = 4       # rough estimate used instead of a tokenizer
+
+# Prompt/response tracing (agents/trace.py, enabled with LLM_TRACE=1): one
+# gzip archive + index per run, written by a background thread; runs older
+# than TRACE_MAX_AGE_DAYS or beyond TRACE_MAX_BYTES in total are deleted
+TRACE_DIR = "logs"
+TRACE_QUEUE_SIZE = 256           # records waiting for the writer; more are dropped, never blocked on
+TRACE_COMPRESS_LEVEL = 6
+TRACE_MAX_BYTES = 200 * 1024 * 1024
+TRACE_MAX_AGE_DAYS = 14
+TRACE_ACTIVE_SECONDS = 600       # runs modified this recently may be live in another process: never deleted
+TRACE_RETENTION_SECONDS = 300    # retention is re-applied this often while a run's writer is open
+
+# Graph-aware retrieval (rag/retriever.py)
+RETRIEVAL_GRAPH_DEPTH = 1        # caller/callee hops to expand from each vector hit
+RETRIEVAL_HOP_DECAY = 0.5        # score multiplier per hop away from a hit
+RETRIEVAL_CHAR_BUDGET = 12000    # ~3k tokens of code per retrieval
+
+# Hybrid lexical + vector search (rag/retriever.py)
+HYBRID_RRF_K = 60                # reciprocal rank fusion constant
+HYBRID_CANDIDATES = 20           # rows taken from each ranking before fusion
+
+# Retriever result cache (rag/cache.py), invalidated by index_generation
+RETRIEVER_CACHE_SIZE = 512
+RETRIEVER_CACHE_TTL = 600.0              # seconds
+RETRIEVER_GENERATION_CHECK_SECONDS = 1.0 # how often to re-read the DB counter
+
+# Ollama HTTP API (llm.call_model_http), used by the daemon to keep the model warm
+OLLAMA_URL = "http://localhost:11434"
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Assistant daemon (daemon/server.py); bound to localhost only. Every request
+# must carry the token the server writes (mode 0600) to DAEMON_TOKEN_PATH.
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+DAEMON_TOKEN_PATH = "~/.java_assistant/daemon.token"
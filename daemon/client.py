@@ -0,0 +1,97 @@
+# daemon/client.py
+#
+# Thin client for daemon/server.py (stdlib only, so it starts instantly).
+#
+#   python -m daemon.client health
+#   python -m daemon.client search ProductRepository [--graph] [--top-k 5]
+#   python -m daemon.client graph callers com.example.userproductapp.user.UserService.findById
+#   python -m daemon.client scan [--files a.java b.java] [--project orders]
+#   python -m daemon.client generate "Add product reviews"
+
+import os
+import sys
+import json
+import argparse
+import urllib.error
+import urllib.request
+
+from config import DAEMON_HOST, DAEMON_PORT, DAEMON_TOKEN_PATH
+
+
+def read_token(path=DAEMON_TOKEN_PATH):
+    """The token the running daemon wrote at startup ('' if there is none)."""
+    try:
+        with open(os.path.expanduser(path), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def request(endpoint, params=None, host=DAEMON_HOST, port=DAEMON_PORT, timeout=3600):
+    url = f"http://{host}:{port}/{endpoint}"
+    data = None if params is None else json.dumps(params).encode("utf-8")
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {read_token()}"}
+    req = urllib.request.Request(url, data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read().decode("utf-8") or "{}") or {"error": str(e)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Java Assistant daemon client")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("health")
+
+    p = sub.add_parser("search")
+    p.add_argument("query")
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--graph", action="store_true", help="expand hits along the call graph")
+
+    p = sub.add_parser("graph")
+    p.add_argument("op", choices=["callers", "callees", "neighbourhood", "reachable", "scc", "class"])
+    p.add_argument("node", nargs="?")
+    p.add_argument("--target")
+    p.add_argument("-k", type=int, default=1)
+    p.add_argument("--direction", default="both", choices=["in", "out", "both"])
+
+    p = sub.add_parser("scan")
+    p.add_argument("--project-path", help="default: the project's configured path")
+    p.add_argument("--files", nargs="*")
+
+    p = sub.add_parser("generate")
+    p.add_argument("feature_request")
+    p.add_argument("--base-path", help="default: the project's configured base_path")
+
+    for p in sub.choices.values():
+        p.add_argument("--project", help="configured project id (default: config.DEFAULT_PROJECT)")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "health":
+            result = request("health")
+        elif args.command == "search":
+            result = request("search", {"query": args.query, "top_k": args.top_k, "graph": args.graph,
+                                        "project": args.project})
+        elif args.command == "graph":
+            result = request("graph", {"op": args.op, "node": args.node, "target": args.target,
+                                       "k": args.k, "direction": args.direction, "project": args.project})
+        elif args.command == "scan":
+            result = request("scan", {"project_path": args.project_path, "files": args.files,
+                                      "project": args.project})
+        else:
+            result = request("generate", {"feature_request": args.feature_request, "base_path": args.base_path,
+                                          "project": args.project})
+    except urllib.error.URLError as e:
+        print(f"❌ Daemon not reachable on http://{DAEMON_HOST}:{DAEMON_PORT} ({e.reason}). "
+              f"Start it with: python -m daemon.server")
+        return 1
+
+    print(json.dumps(result, indent=2, default=str))
+    return 1 if "error" in result else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
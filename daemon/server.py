@@ -0,0 +1,263 @@
+# daemon/server.py
+#
+# Long-running assistant process: pays the import / connect / schema / model
+# load costs once and serves scan, search, call-graph and generate requests
+# over a localhost JSON API. Requests must send the token from
+# config.DAEMON_TOKEN_PATH (the client does) and JSON bodies, so other local
+# users and web pages posting to localhost cannot drive it.
+#
+#   python -m daemon.server            # start
+#   python -m daemon.client search ProductRepository
+
+import os
+import hmac
+import json
+import time
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import llm
+import main
+from agents.orchestrator import orchestrate
+from analyzer.call_graph import CallGraphBuilder
+from config import DEFAULT_PROJECT, DAEMON_HOST, DAEMON_PORT, DAEMON_TOKEN_PATH, OLLAMA_MODEL
+from db.projects import project_config, snapshot_path
+from rag.retriever import Retriever
+
+
+def write_token(path=DAEMON_TOKEN_PATH):
+    """Create a fresh random token, readable only by the current user."""
+    path = os.path.expanduser(path)
+    os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    os.chmod(path, 0o600)  # O_CREAT's mode does not apply to an existing file
+    return token
+
+
+def _within(path, roots):
+    """True if `path` resolves to one of `roots` or somewhere below them."""
+    real = os.path.realpath(path)
+    for root in roots:
+        root = os.path.realpath(root)
+        if real == root or real.startswith(root + os.sep):
+            return True
+    return False
+
+
+def checked_path(path, project_id, *keys):
+    """`path` if it lies under the project's configured `keys` directories, else PermissionError."""
+    config = project_config(project_id)
+    roots = [config[k] for k in keys]
+    if not _within(path, roots):
+        raise PermissionError(f"{path} is outside project '{project_id}' ({', '.join(roots)})")
+    return path
+
+
+class AssistantDaemon:
+    """Warm state shared by all requests."""
+
+    def __init__(self, model=OLLAMA_MODEL):
+        self.model = model
+        self.started_at = time.time()
+        # Searches share the Retriever's warm connection and caches behind read_lock;
+        # scans and generation serialize on write_lock and use their own connections,
+        # so a long generation never touches the connection searches are using.
+        self.read_lock = threading.Lock()
+        self.write_lock = threading.Lock()
+
+        print("🔌 Connecting to Postgres and loading indexes...")
+        # One warm Retriever per project, opened on first use (the default one eagerly)
+        self.retrievers = {}
+        try:
+            graph = self.retriever_for(DEFAULT_PROJECT).graph
+            print(f"🕸️ Call graph loaded ({len(graph)} nodes, {graph.edge_count} edges)")
+        except Exception as e:
+            print(f"⚠️ Call graph not loaded yet: {e}")
+
+        llm.USE_HTTP = True
+        try:
+            llm.warm_model(model)
+            print(f"🔥 Model {model} loaded")
+        except Exception as e:
+            print(f"⚠️ Could not warm model {model}: {e}")
+
+    def retriever_for(self, project_id):
+        """Call with read_lock held (or before serving)."""
+        retriever = self.retrievers.get(project_id)
+        if retriever is None:
+            project_config(project_id)  # unknown ids raise KeyError -> 400
+            retriever = self.retrievers[project_id] = Retriever(project_id=project_id)
+        return retriever
+
+    # ---------- operations ----------
+
+    def health(self, _params):
+        return {
+            "status": "ok",
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "projects": {
+                project_id: {
+                    "cache_entries": len(r.cache),
+                    "cache_hits": r.cache.hits,
+                    "cache_misses": r.cache.misses,
+                }
+                for project_id, r in self.retrievers.items()
+            },
+        }
+
+    def search(self, params):
+        query = params["query"]
+        top_k = int(params.get("top_k", 5))
+        with self.read_lock:
+            retriever = self.retriever_for(params.get("project") or DEFAULT_PROJECT)
+            if params.get("graph"):
+                return {"results": retriever.ask_with_graph(query, top_k=top_k)}
+            rows = retriever.ask(query, top_k=top_k)
+        keys = ("file_path", "class_name", "method_name", "code_snippet")
+        return {"results": [dict(zip(keys, row)) for row in rows]}
+
+    def graph(self, params):
+        op = params["op"]
+        node = params.get("node")
+        with self.read_lock:
+            g = self.retriever_for(params.get("project") or DEFAULT_PROJECT).graph
+            if op == "callers":
+                return {"results": g.callers(node)}
+            if op == "callees":
+                return {"results": g.callees(node)}
+            if op == "neighbourhood":
+                k = params.get("k", 1)
+                return {"results": g.neighbourhood(node, None if k is None else int(k), params.get("direction", "both"))}
+            if op == "reachable":
+                return {"results": g.reachable(node, params["target"])}
+            if op == "scc":
+                return {"results": g.strongly_connected_components(int(params.get("min_size", 2)))}
+            if op == "class":
+                return {"results": g.nodes_of_class(node)}
+        raise ValueError(f"Unknown graph op: {op}")
+
+    def scan(self, params):
+        project_id = params.get("project") or DEFAULT_PROJECT
+        project_path = checked_path(params.get("project_path") or project_config(project_id)["path"],
+                                    project_id, "path")
+        files = [checked_path(f, project_id, "path", "base_path") for f in params.get("files") or []]
+        with self.write_lock:
+            if files:
+                main.reindex_files(files, project_id)
+            else:
+                main.scan_java_code_for_embeddings(project_path, project_id)
+                builder = CallGraphBuilder(project_path, project_id)
+                builder.scan_codebase()
+                builder.refresh_snapshot(snapshot_path(project_id))
+        return {"status": "ok"}
+
+    def generate(self, params):
+        feature_request = params["feature_request"]
+        project_id = params.get("project") or DEFAULT_PROJECT
+        base_path = checked_path(params.get("base_path") or project_config(project_id)["base_path"],
+                                 project_id, "base_path")
+        with self.write_lock:
+            # its own Retriever: generation runs for minutes and must not share
+            # the warm connection (and its cursors) with concurrent searches
+            retriever = Retriever(project_id=project_id)
+            try:
+                generated_code = orchestrate(feature_request, model=params.get("model", self.model),
+                                             retriever=retriever, project_id=project_id)
+            finally:
+                retriever.close()
+            if not generated_code:
+                raise ValueError("No code generated. Check prompts or model output.")
+            changed = main.save_generated_files(generated_code, base_path)
+            main.reindex_files(changed, project_id)
+        return {"changed_files": changed, "code": generated_code}
+
+
+def make_handler(daemon, token):
+    routes = {
+        "/health": daemon.health,
+        "/search": daemon.search,
+        "/graph": daemon.graph,
+        "/scan": daemon.scan,
+        "/generate": daemon.generate,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, body):
+            data = json.dumps(body, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self):
+            sent = self.headers.get("Authorization") or ""
+            if hmac.compare_digest(sent.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+                return True
+            self._reply(401, {"error": f"missing or wrong token (see {DAEMON_TOKEN_PATH})"})
+            return False
+
+        def _dispatch(self, params):
+            route = routes.get(self.path.split("?", 1)[0])
+            if route is None:
+                return self._reply(404, {"error": f"unknown endpoint {self.path}"})
+            started = time.perf_counter()
+            try:
+                body = route(params)
+            except KeyError as e:
+                return self._reply(400, {"error": f"missing or unknown key: {e}"})
+            except PermissionError as e:
+                return self._reply(403, {"error": str(e)})
+            except Exception as e:
+                return self._reply(500, {"error": str(e)})
+            body["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            self._reply(200, body)
+
+        def do_GET(self):
+            if self._authorized():
+                self._dispatch({})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            content_type = (self.headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+            if content_type != "application/json":
+                return self._reply(415, {"error": "Content-Type must be application/json"})
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                params = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError as e:
+                return self._reply(400, {"error": f"invalid JSON: {e}"})
+            self._dispatch(params)
+
+        def log_message(self, fmt, *args):
+            pass  # keep the console for progress output
+
+    return Handler
+
+
+def serve(host=DAEMON_HOST, port=DAEMON_PORT, model=OLLAMA_MODEL):
+    # Bind before anything else: if the port is taken (e.g. a daemon is already
+    # running) we fail fast and leave that daemon's token file alone.
+    server = ThreadingHTTPServer((host, port), BaseHTTPRequestHandler)
+    try:
+        daemon = AssistantDaemon(model=model)
+        server.RequestHandlerClass = make_handler(daemon, write_token())
+    except BaseException:
+        server.server_close()
+        raise
+    print(f"🚀 Java Assistant daemon listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down daemon")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
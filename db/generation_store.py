@@ -1,12 +1,15 @@
 # db/generation_store.py
+import javalang
 import psycopg2
 from psycopg2.extras import execute_values
-from typing import Dict, List, Set
-from config import DB_CONFIG
+from typing import Dict, List, Optional, Set
+from config import DB_CONFIG, DEFAULT_PROJECT
+from analyzer.symbol_index import type_str, _visibility
 
 DDL = """
 CREATE TABLE IF NOT EXISTS gen_classes (
     id SERIAL PRIMARY KEY,
+    project_id TEXT NOT NULL,
     feature_id TEXT NOT NULL,
     fqcn TEXT NOT NULL,
     header_path TEXT NOT NULL,
@@ -18,6 +21,7 @@ CREATE TABLE IF NOT EXISTS gen_classes (
 
 CREATE TABLE IF NOT EXISTS gen_methods (
     id SERIAL PRIMARY KEY,
+    project_id TEXT NOT NULL,
     feature_id TEXT NOT NULL,
     fqcn TEXT NOT NULL,
     method_name TEXT NOT NULL,
@@ -28,29 +32,186 @@ CREATE TABLE IF NOT EXISTS gen_methods (
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- Tables from before per-project generation: existing rows belong to the default project
+ALTER TABLE gen_classes ADD COLUMN IF NOT EXISTS project_id TEXT NOT NULL DEFAULT %(default)s;
+ALTER TABLE gen_methods ADD COLUMN IF NOT EXISTS project_id TEXT NOT NULL DEFAULT %(default)s;
+ALTER TABLE gen_classes ALTER COLUMN project_id DROP DEFAULT;
+ALTER TABLE gen_methods ALTER COLUMN project_id DROP DEFAULT;
+
 -- Helpful indexes
-CREATE INDEX IF NOT EXISTS idx_gen_classes_feature ON gen_classes(feature_id);
-CREATE INDEX IF NOT EXISTS idx_gen_methods_feature ON gen_methods(feature_id);
+DROP INDEX IF EXISTS idx_gen_classes_feature;
+DROP INDEX IF EXISTS idx_gen_methods_feature;
+CREATE INDEX IF NOT EXISTS idx_gen_classes_project_feature ON gen_classes(project_id, feature_id);
+CREATE INDEX IF NOT EXISTS idx_gen_methods_project_feature ON gen_methods(project_id, feature_id);
 CREATE INDEX IF NOT EXISTS idx_gen_methods_fqcn ON gen_methods(fqcn);
 """
 
+# Methods other generated classes may call: they are what known_apis / service_contract list
+CONTRACT_VISIBILITY = ("public", "package")
+
+
+def extract_method_contracts(source_code: str) -> Dict[str, List[Dict]]:
+    """
+    Method rows for gen_methods, parsed from approved source with javalang,
+    keyed by each type's name within the file (`Review`, `Review.Builder`).
+    Returns {} if the source does not parse.
+    """
+    try:
+        tree = javalang.parse.parse(source_code or "")
+    except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+        return {}
+
+    contracts: Dict[str, List[Dict]] = {}
+    for path, type_decl in tree.filter(javalang.tree.TypeDeclaration):
+        outer = [p.name for p in path if isinstance(p, javalang.tree.TypeDeclaration)]
+        methods = contracts.setdefault(".".join(outer + [type_decl.name]), [])
+        for m in type_decl.methods:
+            param_types = ",".join(type_str(p.type) for p in m.parameters)
+            methods.append({
+                "method_name": m.name,
+                "signature": f"{m.name}({param_types})",
+                "visibility": _visibility(m.modifiers),
+                "return_type": type_str(m.return_type),
+                "params": ", ".join(f"{type_str(p.type)} {p.name}" for p in m.parameters),
+            })
+    return contracts
+
+
+class FeatureBatch:
+    """
+    Unit of work for one feature: classes and methods are buffered in memory
+    and written by `commit()` in a single transaction. Contracts become
+    visible through the store's cache as soon as they are added.
+
+        with store.begin_feature(feature_id) as batch:
+            batch.add_class(fqcn, header_path, package, source_code)
+    """
+
+    def __init__(self, store: "GenerationStore", feature_id: str):
+        self.store = store
+        self.feature_id = feature_id
+        self.classes: List[tuple] = []
+        self.methods: List[tuple] = []
+        self.cached: List[tuple] = []  # (fqcn, method_name) this batch added to the cache
+
+    def add_class(self, fqcn: str, header_path: str, package: str, source_code: str,
+                  approved: bool = True, methods: Optional[List[Dict]] = None) -> Dict[str, List[Dict]]:
+        """
+        Buffer a class; its methods are extracted from `source_code` unless given.
+        Nested and secondary types in the file get contracts under their own FQCN.
+        """
+        self.classes.append((self.store.project_id, self.feature_id, fqcn, header_path, package,
+                             source_code, approved))
+        if methods is not None:
+            contracts = {fqcn: methods}
+        else:
+            contracts = {
+                f"{package}.{name}" if package else name: found
+                for name, found in extract_method_contracts(source_code).items()
+            }
+        for type_fqcn, found in contracts.items():
+            self.add_methods(type_fqcn, found)
+        return contracts
+
+    def add_methods(self, fqcn: str, methods: List[Dict]):
+        self.methods.extend(_method_rows(self.store.project_id, self.feature_id, fqcn, methods))
+        added = self.store._cache_methods(self.feature_id, fqcn, methods)
+        self.cached.extend((fqcn, name) for name in added)
+
+    def commit(self):
+        if not self.classes and not self.methods:
+            return
+        try:
+            with self.store.conn.cursor() as cur:
+                if self.classes:
+                    execute_values(
+                        cur,
+                        """
+                        INSERT INTO gen_classes (project_id, feature_id, fqcn, header_path, package, source_code, approved)
+                        VALUES %s
+                        """,
+                        self.classes
+                    )
+                if self.methods:
+                    execute_values(
+                        cur,
+                        """
+                        INSERT INTO gen_methods (project_id, feature_id, fqcn, method_name, signature, visibility,
+                                                 return_type, params)
+                        VALUES %s
+                        """,
+                        self.methods
+                    )
+            self.store.conn.commit()
+        except Exception:
+            self.store.conn.rollback()
+            raise
+        self.classes, self.methods, self.cached = [], [], []
+
+    def rollback(self):
+        """Drop buffered rows and forget the contracts this batch cached."""
+        self.classes, self.methods = [], []
+        self.store._uncache_methods(self.feature_id, self.cached)
+        self.cached = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+
+def _method_rows(project_id: str, feature_id: str, fqcn: str, methods: List[Dict]) -> List[tuple]:
+    return [
+        (
+            project_id,
+            feature_id,
+            fqcn,
+            m.get("method_name", ""),
+            m.get("signature", ""),
+            m.get("visibility", "public"),
+            m.get("return_type", ""),
+            m.get("params", "")
+        )
+        for m in methods
+    ]
+
+
 class GenerationStore:
-    def __init__(self):
+    """Generated classes and method contracts of one project (config.PROJECTS), per feature."""
+
+    def __init__(self, project_id: str = DEFAULT_PROJECT):
+        self.project_id = project_id
         self.conn = psycopg2.connect(**DB_CONFIG)
+        # feature_id -> {fqcn: [method_name, ...]}; filled by batches or lazily from the DB
+        self._contracts: Dict[str, Dict[str, List[str]]] = {}
         self._ensure_schema()
 
     def _ensure_schema(self):
         with self.conn.cursor() as cur:
-            cur.execute(DDL)
+            cur.execute(DDL, {"default": DEFAULT_PROJECT})
         self.conn.commit()
 
     # ---------- feature scoping ----------
 
     def cleanup_feature(self, feature_id: str):
         with self.conn.cursor() as cur:
-            cur.execute("DELETE FROM gen_methods WHERE feature_id = %s;", (feature_id,))
-            cur.execute("DELETE FROM gen_classes WHERE feature_id = %s;", (feature_id,))
+            cur.execute("DELETE FROM gen_methods WHERE project_id = %s AND feature_id = %s;",
+                        (self.project_id, feature_id))
+            cur.execute("DELETE FROM gen_classes WHERE project_id = %s AND feature_id = %s;",
+                        (self.project_id, feature_id))
         self.conn.commit()
+        self._contracts.pop(feature_id, None)
+
+    def begin_feature(self, feature_id: str) -> FeatureBatch:
+        """Start a unit of work that writes the whole feature in one transaction."""
+        if feature_id not in self._contracts:
+            self._load_contracts(feature_id)
+        return FeatureBatch(self, feature_id)
 
     # ---------- classes ----------
 
@@ -58,10 +219,10 @@ class GenerationStore:
         with self.conn.cursor() as cur:
             cur.execute(
                 """
-                INSERT INTO gen_classes (feature_id, fqcn, header_path, package, source_code, approved)
-                VALUES (%s, %s, %s, %s, %s, %s);
+                INSERT INTO gen_classes (project_id, feature_id, fqcn, header_path, package, source_code, approved)
+                VALUES (%s, %s, %s, %s, %s, %s, %s);
                 """,
-                (feature_id, fqcn, header_path, package, source_code, approved)
+                (self.project_id, feature_id, fqcn, header_path, package, source_code, approved)
             )
         self.conn.commit()
 
@@ -71,49 +232,88 @@ class GenerationStore:
         """
         methods: list of dicts with keys: method_name, signature, visibility, return_type, params
         """
-        rows = [
-            (
-                feature_id,
-                fqcn,
-                m.get("method_name", ""),
-                m.get("signature", ""),
-                m.get("visibility", "public"),
-                m.get("return_type", ""),
-                m.get("params", "")
-            )
-            for m in methods
-        ]
+        rows = _method_rows(self.project_id, feature_id, fqcn, methods)
         if not rows:
             return
         with self.conn.cursor() as cur:
             execute_values(
                 cur,
                 """
-                INSERT INTO gen_methods (feature_id, fqcn, method_name, signature, visibility, return_type, params)
+                INSERT INTO gen_methods (project_id, feature_id, fqcn, method_name, signature, visibility,
+                                         return_type, params)
                 VALUES %s
                 """,
                 rows
             )
         self.conn.commit()
+        self._cache_methods(feature_id, fqcn, methods)
 
-    def get_contract(self, feature_id: str, fqcn: str) -> Set[str]:
-        with self.conn.cursor() as cur:
-            cur.execute(
-                "SELECT method_name FROM gen_methods WHERE feature_id = %s AND fqcn = %s;",
-                (feature_id, fqcn)
-            )
-            return {row[0] for row in cur.fetchall()}
+    # ---------- contract cache ----------
 
-    def get_all_contracts(self, feature_id: str) -> Dict[str, List[str]]:
+    def _cache_methods(self, feature_id: str, fqcn: str, methods: List[Dict]) -> List[str]:
+        """
+        Add the callable (public / package-visible) method names to the feature's
+        cached contracts; returns the names that were new.
+        """
+        if feature_id not in self._contracts:
+            self._load_contracts(feature_id)
+        names = self._contracts[feature_id].setdefault(fqcn, [])
+        added = []
+        for m in methods:
+            name = m.get("method_name", "")
+            if m.get("visibility", "public") not in CONTRACT_VISIBILITY:
+                continue
+            if name and name not in names:
+                names.append(name)
+                added.append(name)
+        return added
+
+    def _uncache_methods(self, feature_id: str, entries: List[tuple]):
+        """Remove (fqcn, method_name) pairs from the feature's cached contracts."""
+        mapping = self._contracts.get(feature_id)
+        if mapping is None:
+            return
+        for fqcn, name in entries:
+            names = mapping.get(fqcn)
+            if names and name in names:
+                names.remove(name)
+                if not names:
+                    del mapping[fqcn]
+
+    def _load_contracts(self, feature_id: str):
         with self.conn.cursor() as cur:
             cur.execute(
-                "SELECT fqcn, method_name FROM gen_methods WHERE feature_id = %s;",
-                (feature_id,)
+                """
+                SELECT fqcn, method_name FROM gen_methods
+                WHERE project_id = %s AND feature_id = %s AND visibility = ANY(%s);
+                """,
+                (self.project_id, feature_id, list(CONTRACT_VISIBILITY))
             )
             mapping: Dict[str, List[str]] = {}
             for fqcn, method in cur.fetchall():
-                mapping.setdefault(fqcn, []).append(method)
-            return mapping
+                names = mapping.setdefault(fqcn, [])
+                if method not in names:
+                    names.append(method)
+        self._contracts[feature_id] = mapping
+
+    def get_contract(self, feature_id: str, fqcn: str) -> Set[str]:
+        return set(self.get_all_contracts(feature_id).get(fqcn, []))
+
+    def get_all_contracts(self, feature_id: str) -> Dict[str, List[str]]:
+        """{fqcn: [method_name, ...]} for a feature; hits the DB at most once per feature."""
+        if feature_id not in self._contracts:
+            self._load_contracts(feature_id)
+        return {fqcn: list(names) for fqcn, names in self._contracts[feature_id].items()}
+
+    def service_contract(self, feature_id: str, controller_fqcn: str) -> List[str]:
+        """Methods of the service a controller should call (`XController` -> `XService`)."""
+        if not controller_fqcn.endswith("Controller"):
+            return []
+        base = controller_fqcn.rsplit(".", 1)[-1][:-len("Controller")]
+        for fqcn, names in self.get_all_contracts(feature_id).items():
+            if fqcn.rsplit(".", 1)[-1] == f"{base}Service":
+                return names
+        return []
 
     def close(self):
         try:
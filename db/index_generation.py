@@ -0,0 +1,52 @@
+# db/index_generation.py
+#
+# Per-project counter bumped by every write to the code index (java_metadata,
+# method_calls). Readers compare generations to know their caches are stale;
+# re-indexing one project leaves the other projects' caches valid.
+
+from config import DEFAULT_PROJECT
+
+DDL = """
+DO $$
+BEGIN
+    -- the first version was a single global row keyed by id; it only holds counters
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'index_generation' AND column_name = 'id') THEN
+        DROP TABLE index_generation;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS index_generation (
+    project_id TEXT PRIMARY KEY,
+    generation BIGINT NOT NULL DEFAULT 0
+);
+"""
+
+# Bumped by every write made from this process, so same-process readers
+# see new data without asking the database.
+_local_generations = {}
+
+
+def ensure_schema(cur):
+    cur.execute(DDL)
+
+
+def bump(cur, project_id=DEFAULT_PROJECT):
+    """Mark a project's index as changed; call inside the writing transaction."""
+    cur.execute("""
+        INSERT INTO index_generation (project_id, generation) VALUES (%s, 1)
+        ON CONFLICT (project_id) DO UPDATE SET generation = index_generation.generation + 1;
+    """, (project_id,))
+    _local_generations[project_id] = _local_generations.get(project_id, 0) + 1
+
+
+def local_generation(project_id=DEFAULT_PROJECT):
+    return _local_generations.get(project_id, 0)
+
+
+def current_generation(conn, project_id=DEFAULT_PROJECT):
+    with conn.cursor() as cur:
+        cur.execute("SELECT generation FROM index_generation WHERE project_id = %s;", (project_id,))
+        row = cur.fetchone()
+    conn.commit()  # don't leave an idle transaction open
+    return row[0] if row else 0
@@ -0,0 +1,71 @@
+# db/lexical.py
+
+import re
+
+IDENT_RE = re.compile(r"[A-Za-z_$][A-Za-z0-9_$]*")
+# camelCase / PascalCase / ACRONYMWords / snake_case parts
+CAMEL_PART_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+# ProductRepository, findByUserId, Product.findById, Product#findById
+IDENTIFIER_QUERY_RE = re.compile(r"^[A-Za-z_$][A-Za-z0-9_$]*(?:[.#][A-Za-z_$][A-Za-z0-9_$]*)?$")
+
+JAVA_KEYWORDS = {
+    "abstract", "boolean", "break", "byte", "case", "catch", "char", "class", "continue", "default",
+    "do", "double", "else", "enum", "extends", "final", "finally", "float", "for", "if", "implements",
+    "import", "instanceof", "int", "interface", "long", "new", "null", "package", "private",
+    "protected", "public", "return", "short", "static", "super", "switch", "this", "throw", "throws",
+    "true", "false", "try", "void", "while",
+}
+
+
+def split_identifier(name):
+    """`findByUserId` -> ['find', 'by', 'user', 'id']; `MAX_SIZE` -> ['max', 'size']."""
+    parts = []
+    for chunk in re.split(r"[_$]+", name or ""):
+        parts.extend(p.lower() for p in CAMEL_PART_RE.findall(chunk))
+    return parts
+
+
+def lexical_document(class_name, method_name, code_snippet):
+    """
+    Text indexed into `java_metadata.lexical_tsv`: the class and method names
+    (whole and split), then every distinct identifier in the snippet with its parts.
+    """
+    terms = []
+    seen = set()
+
+    def add(term):
+        if term and term not in seen:
+            seen.add(term)
+            terms.append(term)
+
+    for name in (class_name, method_name):
+        if name:
+            add(name.lower())
+            for part in split_identifier(name):
+                add(part)
+    for ident in IDENT_RE.findall(code_snippet or ""):
+        if ident in JAVA_KEYWORDS:
+            continue
+        add(ident.lower())
+        for part in split_identifier(ident):
+            add(part)
+    return " ".join(terms)
+
+
+def is_identifier_query(query):
+    """True for queries that look like a single Java identifier (optionally Class.method)."""
+    return bool(IDENTIFIER_QUERY_RE.match((query or "").strip()))
+
+
+def tsquery_terms(query):
+    """
+    OR-query for `to_tsquery('simple', ...)` over the words and identifier parts of `query`.
+    Returns '' when nothing searchable is left.
+    """
+    terms = []
+    for ident in IDENT_RE.findall(query or ""):
+        for term in [ident.lower()] + split_identifier(ident):
+            term = re.sub(r"[^a-z0-9_]", "", term)
+            if term and term not in terms:
+                terms.append(term)
+    return " | ".join(terms)
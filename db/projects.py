@@ -0,0 +1,99 @@
+# db/projects.py
+#
+# Per-project partitioning: java_metadata and method_calls are LIST-partitioned
+# on project_id, one partition per indexed repository, so project-scoped
+# queries only touch that partition and re-indexing one repo leaves the
+# others' tables and indexes alone.
+
+import re
+import hashlib
+
+from config import PROJECTS, DEFAULT_PROJECT, CALL_GRAPH_PATH
+
+
+def project_config(project_id=DEFAULT_PROJECT):
+    try:
+        return PROJECTS[project_id]
+    except KeyError:
+        raise KeyError(f"Unknown project '{project_id}'. Configured: {', '.join(sorted(PROJECTS))}") from None
+
+
+def snapshot_path(project_id=DEFAULT_PROJECT):
+    """Call graph snapshot file for a project."""
+    return CALL_GRAPH_PATH.format(project=_slug(project_id))
+
+
+def _slug(project_id):
+    return re.sub(r"[^a-z0-9_]+", "_", project_id.lower()).strip("_")[:40] or "project"
+
+
+def partition_name(table, project_id):
+    """`java_metadata_p_orders_3fa2c1`: readable, and unique even if two ids slug the same."""
+    digest = hashlib.md5(project_id.encode("utf-8")).hexdigest()[:6]
+    return f"{table}_p_{_slug(project_id)}_{digest}"
+
+
+def relkind(cur, table):
+    """'r' plain table, 'p' partitioned table, None if missing."""
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s);", (table,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def ensure_partitioned(cur, table, create_sql, default_project=DEFAULT_PROJECT):
+    """
+    Make sure `table` exists as a LIST-partitioned table.
+
+    `create_sql` is a CREATE TABLE statement with a `{table}` placeholder.
+    A pre-existing unpartitioned table is migrated: its rows are copied into
+    `default_project`'s partition and the old table is dropped.
+    """
+    from psycopg2 import sql  # local: the CLI imports this module for paths only
+
+    kind = relkind(cur, table)
+    if kind == "p":
+        return
+    if kind is None:
+        cur.execute(sql.SQL(create_sql).format(table=sql.Identifier(table)))
+        return
+
+    print(f"🧱 Migrating {table} to per-project partitions (existing rows -> '{default_project}')")
+    staging = f"{table}_partitioned"
+    cur.execute(sql.SQL(create_sql).format(table=sql.Identifier(staging)))
+    ensure_partition(cur, staging, default_project, name_table=table)
+
+    cur.execute("""
+        SELECT a.column_name FROM information_schema.columns a
+        JOIN information_schema.columns b
+          ON b.table_name = %s AND b.column_name = a.column_name AND b.is_generated = 'NEVER'
+        WHERE a.table_name = %s AND a.column_name NOT IN ('id', 'project_id');
+    """, (staging, table))
+    columns = [sql.Identifier(r[0]) for r in cur.fetchall()]
+    cur.execute(
+        sql.SQL("INSERT INTO {staging} (project_id, {cols}) SELECT %s, {cols} FROM {table};").format(
+            staging=sql.Identifier(staging), table=sql.Identifier(table), cols=sql.SQL(", ").join(columns)),
+        (default_project,)
+    )
+    cur.execute(sql.SQL("DROP TABLE {table};").format(table=sql.Identifier(table)))
+    cur.execute(sql.SQL("ALTER TABLE {staging} RENAME TO {table};").format(
+        staging=sql.Identifier(staging), table=sql.Identifier(table)))
+
+
+def ensure_partition(cur, table, project_id, index_sql=(), name_table=None):
+    """
+    Create `table`'s partition for `project_id` if missing, plus any
+    per-partition indexes (`index_sql`: statements with `{partition}` and
+    `{index}` placeholders, e.g. a vector index that must live per partition).
+    Returns the partition name.
+    """
+    from psycopg2 import sql
+
+    part = partition_name(name_table or table, project_id)
+    cur.execute(
+        sql.SQL("CREATE TABLE IF NOT EXISTS {part} PARTITION OF {table} FOR VALUES IN ({value});").format(
+            part=sql.Identifier(part), table=sql.Identifier(table), value=sql.Literal(project_id))
+    )
+    for i, stmt in enumerate(index_sql):
+        cur.execute(sql.SQL(stmt).format(
+            partition=sql.Identifier(part), index=sql.Identifier(f"{part}_idx{i}")))
+    return part
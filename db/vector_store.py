@@ -1,15 +1,67 @@
 # db/vector_store.py
 
+import hashlib
 import psycopg2
 from psycopg2.extras import execute_values
 
-from config import DB_CONFIG
+from config import DB_CONFIG, DEFAULT_PROJECT
+from db.lexical import lexical_document, tsquery_terms
+from db import index_generation, projects
 
 
 # import ollama  # Uncomment if using Ollama for embeddings
 
+JAVA_METADATA_DDL = """
+CREATE TABLE {table} (
+    id BIGSERIAL,
+    project_id TEXT NOT NULL,
+    file_path TEXT,
+    class_name TEXT,
+    method_name TEXT,
+    code_snippet TEXT,
+    embedding vector(1024),
+    blob_sha TEXT,
+    start_line INT,
+    end_line INT,
+    lexical_text TEXT,
+    lexical_tsv tsvector GENERATED ALWAYS AS (to_tsvector('simple', coalesce(lexical_text, ''))) STORED,
+    PRIMARY KEY (project_id, id)
+) PARTITION BY LIST (project_id);
+"""
+
+# File contents stored once per distinct content (shared by every project and scan);
+# java_metadata rows point at a line span of a blob instead of copying the text.
+SOURCE_BLOBS_DDL = """
+CREATE TABLE IF NOT EXISTS source_blobs (
+    sha256 TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    byte_size INT NOT NULL
+);
+"""
+
+# Snippet of a row: inline code_snippet (legacy rows) or its span of the blob, sliced in SQL.
+# Use with `FROM java_metadata LEFT JOIN source_blobs ON sha256 = blob_sha`.
+SNIPPET_SQL = r"""COALESCE(code_snippet, array_to_string(
+    (string_to_array(content, E'\n'))[start_line:end_line], E'\n'))"""
+
+
+def content_sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def slice_lines(text, start_line, end_line):
+    """1-based inclusive line span, the same slice SNIPPET_SQL takes."""
+    return "\n".join(text.split("\n")[start_line - 1:end_line])
+
+
+# Vector indexes are built per partition so each project's ANN graph only holds its own rows
+PARTITION_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS {index} ON {partition} USING hnsw (embedding vector_l2_ops);",
+)
+
 class VectorStore:
-    def __init__(self):
+    def __init__(self, project_id=DEFAULT_PROJECT):
+        self.project_id = project_id
         self.conn = psycopg2.connect(**DB_CONFIG)
         self._create_table()
 
@@ -17,16 +69,58 @@ class VectorStore:
         with self.conn.cursor() as cur:
             cur.execute("""
                 CREATE EXTENSION IF NOT EXISTS vector;
-                CREATE TABLE IF NOT EXISTS java_metadata (
-                    id SERIAL PRIMARY KEY,
-                    file_path TEXT,
-                    class_name TEXT,
-                    method_name TEXT,
-                    code_snippet TEXT,
-                    embedding vector(1024)
-                );
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
             """)
+            cur.execute(SOURCE_BLOBS_DDL)
+            projects.ensure_partitioned(cur, "java_metadata", JAVA_METADATA_DDL)
+            cur.execute("""
+                -- Installs that predate blob spans
+                ALTER TABLE java_metadata ADD COLUMN IF NOT EXISTS blob_sha TEXT;
+                ALTER TABLE java_metadata ADD COLUMN IF NOT EXISTS start_line INT;
+                ALTER TABLE java_metadata ADD COLUMN IF NOT EXISTS end_line INT;
+
+                -- Installs that predate the lexical column
+                ALTER TABLE java_metadata ADD COLUMN IF NOT EXISTS lexical_text TEXT;
+                ALTER TABLE java_metadata ADD COLUMN IF NOT EXISTS lexical_tsv tsvector
+                    GENERATED ALWAYS AS (to_tsvector('simple', coalesce(lexical_text, ''))) STORED;
+
+                CREATE INDEX IF NOT EXISTS idx_java_metadata_class ON java_metadata(project_id, class_name);
+                CREATE INDEX IF NOT EXISTS idx_java_metadata_file ON java_metadata(project_id, file_path);
+                CREATE INDEX IF NOT EXISTS idx_java_metadata_method ON java_metadata(project_id, method_name);
+                CREATE INDEX IF NOT EXISTS idx_java_metadata_blob ON java_metadata(blob_sha);
+
+                -- Lexical side of hybrid search: split identifiers + snippet terms
+                CREATE INDEX IF NOT EXISTS idx_java_metadata_lexical ON java_metadata USING gin (lexical_tsv);
+                CREATE INDEX IF NOT EXISTS idx_java_metadata_class_trgm ON java_metadata USING gin (class_name gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS idx_java_metadata_method_trgm ON java_metadata USING gin (method_name gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS idx_java_metadata_lexical_missing ON java_metadata(project_id, id) WHERE lexical_text IS NULL;
+            """)
+            projects.ensure_partition(cur, "java_metadata", self.project_id, PARTITION_INDEXES)
+            index_generation.ensure_schema(cur)
             self.conn.commit()
+        self._backfill_lexical()
+
+    def _backfill_lexical(self):
+        """Fill lexical_text for rows written before the lexical column existed."""
+        with self.conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT id, class_name, method_name, {SNIPPET_SQL}
+                FROM java_metadata LEFT JOIN source_blobs ON sha256 = blob_sha
+                WHERE project_id = %s AND lexical_text IS NULL;
+            """, (self.project_id,))
+            rows = [(lexical_document(c, m, s), self.project_id, i) for i, c, m, s in cur.fetchall()]
+            if rows:
+                print(f"🔤 Backfilling lexical index for {len(rows)} rows")
+                execute_values(cur, """
+                    UPDATE java_metadata AS j SET lexical_text = v.lexical_text
+                    FROM (VALUES %s) AS v(lexical_text, project_id, id)
+                    WHERE j.project_id = v.project_id AND j.id = v.id
+                """, rows)
+                index_generation.bump(cur, self.project_id)
+        self.conn.commit()
+
+    def current_generation(self):
+        return index_generation.current_generation(self.conn, self.project_id)
 
     # ✅ NEW: helper for embeddings
     def generate_embedding(self, text):
@@ -46,16 +140,104 @@ class VectorStore:
         Insert a batch of code snippet embeddings into DB.
         Data format: [(file_path, class_name, method_name, code_snippet, embedding)]
         """
+        rows = [
+            (self.project_id, file_path, class_name, method_name, code_snippet, embedding,
+             lexical_document(class_name, method_name, code_snippet))
+            for file_path, class_name, method_name, code_snippet, embedding in data
+        ]
         with self.conn.cursor() as cur:
             execute_values(cur,
                 """
-                INSERT INTO java_metadata (file_path, class_name, method_name, code_snippet, embedding)
+                INSERT INTO java_metadata (project_id, file_path, class_name, method_name, code_snippet, embedding, lexical_text)
                 VALUES %s
                 """,
-                data
+                rows
             )
+            index_generation.bump(cur, self.project_id)
             self.conn.commit()
 
+    def insert_spans(self, file_path, content, spans, replace=False, whole_file=None):
+        """
+        Store `content` once (deduplicated by sha256) and insert one row per span,
+        without copying the text. Spans: [(class_name, method_name, start_line, end_line, embedding)],
+        1-based inclusive lines. With `replace`, the file's old rows (filtered by
+        `whole_file` as in delete_files) are deleted in the same transaction, so
+        searches never see the file missing or doubled. Returns the blob's sha256.
+        """
+        sha = content_sha256(content)
+        rows = [
+            (self.project_id, file_path, class_name, method_name, sha, start, end, embedding,
+             lexical_document(class_name, method_name, slice_lines(content, start, end)))
+            for class_name, method_name, start, end, embedding in spans
+        ]
+        with self.conn.cursor() as cur:
+            if replace:
+                self._delete_rows(cur, [file_path], whole_file)
+            cur.execute("""
+                INSERT INTO source_blobs (sha256, content, byte_size) VALUES (%s, %s, %s)
+                ON CONFLICT (sha256) DO NOTHING;
+            """, (sha, content, len(content.encode("utf-8"))))
+            if rows:
+                execute_values(cur, """
+                    INSERT INTO java_metadata (project_id, file_path, class_name, method_name,
+                                               blob_sha, start_line, end_line, embedding, lexical_text)
+                    VALUES %s
+                """, rows)
+            index_generation.bump(cur, self.project_id)
+        self.conn.commit()
+        return sha
+
+    def indexed_blobs(self, whole_file=True, file_paths=None):
+        """
+        {file_path: blob sha256} of the project's rows, so scans can skip files
+        whose content is unchanged. Files whose rows are not all spans of one
+        blob (e.g. legacy inline snippets) map to None, so they get rewritten.
+        `whole_file` picks file rows (method_name NULL) or method rows;
+        `file_paths` limits the lookup to those files.
+        """
+        paths = None if file_paths is None else list(file_paths)
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT file_path,
+                       CASE WHEN count(*) = count(blob_sha) AND count(DISTINCT blob_sha) = 1
+                            THEN max(blob_sha) END
+                FROM java_metadata
+                WHERE project_id = %s AND (method_name IS NULL) = %s
+                  AND (%s IS NULL OR file_path = ANY(%s))
+                GROUP BY file_path;
+            """, (self.project_id, whole_file, paths, paths))
+            rows = dict(cur.fetchall())
+        self.conn.commit()
+        return rows
+
+    def delete_files(self, file_paths, whole_file=None):
+        """
+        Remove the rows of the given files (before re-indexing them):
+        all of them, or only file rows / method rows when `whole_file` is True / False.
+        """
+        with self.conn.cursor() as cur:
+            self._delete_rows(cur, file_paths, whole_file)
+            index_generation.bump(cur, self.project_id)
+        self.conn.commit()
+
+    def _delete_rows(self, cur, file_paths, whole_file):
+        cur.execute("""
+            DELETE FROM java_metadata
+            WHERE project_id = %s AND file_path = ANY(%s)
+              AND (%s IS NULL OR (method_name IS NULL) = %s);
+        """, (self.project_id, list(file_paths), whole_file, whole_file))
+
+    def prune_blobs(self):
+        """Drop blobs no row of any project points at any more. Returns how many."""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                DELETE FROM source_blobs b
+                WHERE NOT EXISTS (SELECT 1 FROM java_metadata j WHERE j.blob_sha = b.sha256);
+            """)
+            pruned = cur.rowcount
+        self.conn.commit()
+        return pruned
+
     def search(self, query_embedding, top_k=5):
         """
         Search for code snippets by embedding similarity.
@@ -63,15 +245,108 @@ class VectorStore:
         with self.conn.cursor() as cur:
             vector_str = "[" + ",".join([str(x) for x in query_embedding]) + "]"
             cur.execute(
-                """
-                SELECT file_path, class_name, method_name, code_snippet
-                FROM java_metadata
+                f"""
+                SELECT file_path, class_name, method_name, {SNIPPET_SQL}
+                FROM java_metadata LEFT JOIN source_blobs ON sha256 = blob_sha
+                WHERE project_id = %s
                 ORDER BY embedding <-> %s::vector LIMIT %s;
                 """,
-                (vector_str, top_k)
+                (self.project_id, vector_str, top_k)
+            )
+            return cur.fetchall()
+
+    def identifier_search(self, identifier, top_k=5):
+        """
+        Exact lookup for identifier-like queries (`ProductRepository`, `findByUserId`,
+        `Product.findById`), falling back to trigram similarity for near misses.
+        Never touches embeddings.
+        """
+        identifier = identifier.strip().replace("#", ".")
+        with self.conn.cursor() as cur:
+            if "." in identifier:
+                cls, method = identifier.rsplit(".", 1)
+                cur.execute(
+                    f"""
+                    SELECT file_path, class_name, method_name, {SNIPPET_SQL}
+                    FROM java_metadata LEFT JOIN source_blobs ON sha256 = blob_sha
+                    WHERE project_id = %s AND class_name = %s AND method_name = %s
+                    LIMIT %s;
+                    """,
+                    (self.project_id, cls, method, top_k)
+                )
+            else:
+                cur.execute(
+                    f"""
+                    SELECT file_path, class_name, method_name, {SNIPPET_SQL}
+                    FROM java_metadata LEFT JOIN source_blobs ON sha256 = blob_sha
+                    WHERE project_id = %s AND (class_name = %s OR method_name = %s)
+                    ORDER BY (class_name = %s) DESC, (method_name IS NULL) DESC, id DESC
+                    LIMIT %s;
+                    """,
+                    (self.project_id, identifier, identifier, identifier, top_k)
+                )
+            rows = cur.fetchall()
+            if rows:
+                return rows
+
+            name = identifier.rsplit(".", 1)[-1]
+            cur.execute(
+                f"""
+                SELECT file_path, class_name, method_name, {SNIPPET_SQL}
+                FROM java_metadata LEFT JOIN source_blobs ON sha256 = blob_sha
+                WHERE project_id = %s AND (class_name %% %s OR method_name %% %s)
+                ORDER BY GREATEST(similarity(class_name, %s), similarity(coalesce(method_name, ''), %s)) DESC
+                LIMIT %s;
+                """,
+                (self.project_id, name, name, name, name, top_k)
             )
             return cur.fetchall()
 
+    def lexical_search(self, query, top_k=5):
+        """Full-text search over split identifiers and snippet terms, ranked by ts_rank_cd."""
+        terms = tsquery_terms(query)
+        if not terms:
+            return []
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT file_path, class_name, method_name, {SNIPPET_SQL}
+                FROM java_metadata LEFT JOIN source_blobs ON sha256 = blob_sha, to_tsquery('simple', %s) AS q
+                WHERE project_id = %s AND lexical_tsv @@ q
+                ORDER BY ts_rank_cd(lexical_tsv, q) DESC
+                LIMIT %s;
+                """,
+                (terms, self.project_id, top_k)
+            )
+            return cur.fetchall()
+
+    def get_class_snippets(self, class_names):
+        """
+        One snippet per class name: its method-level chunk rows joined in line
+        order (members only, no file preamble), or the whole-file row for files
+        indexed before chunking. Among several files declaring the name, the
+        most recently indexed wins.
+        Returns {class_name: (file_path, code_snippet)}.
+        """
+        if not class_names:
+            return {}
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT DISTINCT ON (class_name) class_name, file_path, code
+                FROM (
+                    SELECT class_name, file_path, method_name IS NULL AS whole_file, max(id) AS newest,
+                           string_agg({SNIPPET_SQL}, E'\\n' ORDER BY start_line NULLS LAST, id) AS code
+                    FROM java_metadata LEFT JOIN source_blobs ON sha256 = blob_sha
+                    WHERE project_id = %s AND class_name = ANY(%s)
+                    GROUP BY class_name, file_path, method_name IS NULL
+                ) per_file
+                ORDER BY class_name, whole_file, newest DESC;
+                """,
+                (self.project_id, list(class_names))
+            )
+            return {cls: (path, code) for cls, path, code in cur.fetchall()}
+
     def search_code_snippets(self, query, top_k=5):
         """
         Search pgvector DB for code snippets relevant to the query (for RAG).
@@ -82,12 +357,13 @@ class VectorStore:
 
         with self.conn.cursor() as cur:
             cur.execute(
-                """
-                SELECT file_path, class_name, method_name, code_snippet
-                FROM java_metadata
+                f"""
+                SELECT file_path, class_name, method_name, {SNIPPET_SQL}
+                FROM java_metadata LEFT JOIN source_blobs ON sha256 = blob_sha
+                WHERE project_id = %s
                 ORDER BY embedding <-> %s::vector
                 LIMIT %s;
                 """,
-                (embedding_str, top_k)
+                (self.project_id, embedding_str, top_k)
             )
             return cur.fetchall()
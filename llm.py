@@ -1,11 +1,39 @@
+import os
+import json
 import subprocess
+import urllib.request
+
+from config import OLLAMA_URL, OLLAMA_KEEP_ALIVE
+
+# Talk to the Ollama server over HTTP instead of spawning `ollama run` per call.
+# Long-running processes (the daemon) turn this on so the model stays loaded.
+USE_HTTP = os.getenv("OLLAMA_HTTP", "0") == "1"
 
 def call_model(prompt, model="llama2"):
     """
     Sends the prompt to Ollama model (default: llama2).
     Change model to mistral, codellama, etc. as needed.
     """
+    if USE_HTTP:
+        return call_model_http(prompt, model=model)
     process = subprocess.run(["ollama", "run", model],
                              input=prompt.encode(),
                              capture_output=True)
     return process.stdout.decode()
+
+def call_model_http(prompt, model="llama2", keep_alive=OLLAMA_KEEP_ALIVE, timeout=600):
+    """Single non-streaming /api/generate call; keep_alive keeps the model resident afterwards."""
+    payload = json.dumps({
+        "model": model,
+        "prompt": prompt,
+        "stream": False,
+        "keep_alive": keep_alive,
+    }).encode("utf-8")
+    req = urllib.request.Request(f"{OLLAMA_URL}/api/generate", data=payload,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8")).get("response", "")
+
+def warm_model(model, keep_alive=OLLAMA_KEEP_ALIVE):
+    """Load `model` into memory without generating (an empty prompt only loads it)."""
+    return call_model_http("", model=model, keep_alive=keep_alive)
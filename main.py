@@ -1,118 +1,382 @@
 import os
-import re
-from agents.orchestrator import orchestrate
-from analyzer.call_graph import CallGraphBuilder
-from db.vector_store import VectorStore
+import sys
+import time
+import argparse
 
-def scan_java_code_for_embeddings(project_path):
+from config import PROJECTS, DEFAULT_PROJECT, SKIP_FOLDERS, FAST_SCAN
+from db.projects import project_config, snapshot_path
+
+# Heavy modules (psycopg2, javalang, numpy, the orchestrator) are imported
+# inside the commands that need them, so e.g. `search` and `--help` start fast.
+
+def _project_path(args):
+    """--project-path when given, otherwise the configured path of --project."""
+    return args.project_path or project_config(args.project)["path"]
+
+def _base_path(args):
+    return args.base_path or project_config(args.project)["base_path"]
+
+def _embed_file(vector_store, file_path, code=None, fast=FAST_SCAN, replace=False):
+    """
+    Store a Java file as spans of its deduplicated source blob: one whole-file
+    row plus one row per method-level chunk (see analyzer/chunker.py).
+    `fast` chunks from the tokenizer-only scan without trying javalang's parser;
+    `replace` swaps out the file's old rows in the same transaction.
+    """
+    import javalang
+    from analyzer.chunker import JavaChunker
+
+    if code is None:
+        with open(file_path, "r", encoding="utf-8") as f:
+            code = f.read()
+    class_name = os.path.basename(file_path).replace(".java", "")
+    spans = [(class_name, None, 1, code.count("\n") + 1, vector_store.generate_embedding(code))]
+    try:
+        chunks = JavaChunker(fast=fast).chunk(code)
+    except javalang.tokenizer.LexerError as e:
+        print(f"⚠️ No method chunks for {file_path} (cannot tokenize): {e}")
+        chunks = []
+    lines = code.split("\n")
+    spans += [
+        (c.class_name, c.member, c.start_line, c.end_line,
+         vector_store.generate_embedding(JavaChunker.text(lines, c)))
+        for c in chunks
+    ]
+    vector_store.insert_spans(file_path, code, spans, replace=replace)
+
+def scan_java_code_for_embeddings(project_path, project_id=DEFAULT_PROJECT, fast=FAST_SCAN):
     """
     Scans all Java files in the project directory,
-    generates embeddings, and stores them in the vector DB.
+    generates embeddings, and stores them in the project's partition of the vector DB.
+    Files whose content hash matches their indexed blob are skipped; rows of
+    deleted files are removed.
     """
-    vector_store = VectorStore()
+    from db.vector_store import VectorStore, content_sha256
+
+    vector_store = VectorStore(project_id)
+    indexed = vector_store.indexed_blobs()
+    seen = set()
+    changed = 0
 
-    for root, _, files in os.walk(project_path):
+    for root, dirs, files in os.walk(project_path):
+        dirs[:] = [d for d in dirs if d not in SKIP_FOLDERS]
         for file in files:
             if file.endswith(".java"):
                 file_path = os.path.join(root, file)
-                print(f"📂 Scanning: {file_path}")
+                seen.add(file_path)
                 with open(file_path, "r", encoding="utf-8") as f:
                     code = f.read()
-                    class_name = file.replace(".java", "")
-                    vector_store.insert_embeddings([
-                        (file_path, class_name, None, code, vector_store.generate_embedding(code))
-                    ])
+                if indexed.get(file_path) == content_sha256(code):
+                    continue
+                print(f"📂 Scanning: {file_path}")
+                _embed_file(vector_store, file_path, code, fast, replace=True)
+                changed += 1
+
+    root = os.path.join(os.path.normpath(project_path), "")
+    removed = [p for p in indexed if p not in seen and os.path.normpath(p).startswith(root)]
+    if removed:
+        vector_store.delete_files(removed)
+    pruned = vector_store.prune_blobs()
 
-    print("✅ Embedding scan complete! All code stored in java_metadata.")
+    print(f"✅ Embedding scan complete! {changed} new/changed, {len(seen) - changed} unchanged, "
+          f"{len(removed)} removed file(s); {pruned} unused blob(s) dropped.")
 
-def build_call_graph(project_path):
+def build_call_graph(project_path, project_id=DEFAULT_PROJECT, fast=FAST_SCAN):
     """
-    Parses Java files and builds method call graph relationships.
+    Parses Java files and builds method call graph relationships,
+    then writes the binary snapshot used for graph queries.
     """
+    from analyzer.call_graph import CallGraphBuilder
+
     print("🔍 Building call graph...")
-    builder = CallGraphBuilder(project_path)
+    builder = CallGraphBuilder(project_path, project_id, fast=fast)
     builder.scan_codebase()
-    print("✅ Call graph build complete!")
+    path = snapshot_path(project_id)
+    graph = builder.refresh_snapshot(path)
+    print(f"✅ Call graph build complete! ({len(graph)} nodes, {graph.edge_count} edges -> {path})")
 
 def save_generated_files(code_blob, base_path):
     """
     Parses the `// FILE:` markers and writes each file to disk.
     Normalizes paths so that headers like `com/example/.../X.java`
     are saved under `src/main/java/com/example/.../X.java`.
+    Files whose content is unchanged are not touched; returns the changed paths.
+    """
+    from codegen.writer import GeneratedFileWriter
+
+    changed, _unchanged = GeneratedFileWriter(base_path).write_blob(code_blob)
+    return changed
+
+def reindex_files(file_paths, project_id=DEFAULT_PROJECT, vector_store=None, builder=None):
+    """
+    Incremental update for just `file_paths`: replace their embedding rows
+    and call-graph edges, then refresh the graph snapshot if one exists.
+    Files whose content still matches their indexed blob are skipped.
+    `vector_store` / `builder` reuse open connections (watch mode).
+    Returns the paths that were re-indexed.
     """
-    if not code_blob or not isinstance(code_blob, str):
-        raise ValueError("❌ Developer did not produce any code.")
-
-    def normalize_rel_path(rel_path: str) -> str:
-        # unify slashes and trim
-        p = rel_path.replace("\\", "/").strip()
-        # drop any accidental leading slash
-        if p.startswith("/"):
-            p = p[1:]
-        # if the header already starts with src/main/java, keep it
-        if p.startswith("src/main/java/"):
-            return p
-        # if the header begins with a package path, prepend src/main/java/
-        if p.startswith("com/") or p.startswith("org/") or p.startswith("io/") or p.startswith("net/"):
-            return f"src/main/java/{p}"
-        # if the header is just a filename, leave it as-is (could be resources/tests etc.)
-        return p
-
-    file_blocks = re.split(r"(?=// FILE:)", code_blob)
-
-    for block in file_blocks:
-        if not block.strip():
-            continue
-
-        header_match = re.match(r"// FILE:\s*(.+)", block)
-        if not header_match:
-            print(f"⚠️ Skipping block (no file marker): {block[:80]!r}")
-            continue
-
-        raw_rel_path = header_match.group(1).strip()
-        # the rest of the block after the header line
-        content = block.split("\n", 1)[1] if "\n" in block else ""
-        rel_path = normalize_rel_path(raw_rel_path)
-
-        file_path = os.path.join(base_path, rel_path)
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content.strip())
-
-        print(f"💾 Code saved to: {file_path}")
-
-
-def run_orchestrator(project_path, feature_request):
+    java_paths = [p for p in dict.fromkeys(file_paths) if p.endswith(".java")]
+    if not java_paths:
+        return []
+    from analyzer.call_graph import CallGraphBuilder
+    from db.vector_store import VectorStore, content_sha256
+
+    vector_store = vector_store or VectorStore(project_id)
+    indexed = vector_store.indexed_blobs(file_paths=java_paths)
+    contents = {}
+    for file_path in java_paths:
+        if os.path.exists(file_path):
+            with open(file_path, "r", encoding="utf-8") as f:
+                contents[file_path] = f.read()
+    java_paths = [
+        p for p in java_paths
+        if p not in contents or indexed.get(p) != content_sha256(contents[p])
+    ]
+    if not java_paths:
+        return []
+
+    print(f"🔄 Re-indexing {len(java_paths)} changed file(s)...")
+
+    removed = [p for p in java_paths if p not in contents]
+    if removed:
+        vector_store.delete_files(removed)
+    for file_path in java_paths:
+        if file_path in contents:
+            _embed_file(vector_store, file_path, contents[file_path], replace=True)
+
+    builder = builder or CallGraphBuilder(os.path.commonpath(java_paths), project_id)
+    builder.update_files(java_paths)
+    path = snapshot_path(project_id)
+    if os.path.exists(path):
+        builder.refresh_snapshot(path)
+    print("✅ Incremental re-index complete!")
+    return java_paths
+
+
+def run_orchestrator(project_path, feature_request, model="mistral", project_id=DEFAULT_PROJECT):
     """
     Runs the full workflow:
     PM → Architect → (class-by-class) Developer → Reviewer → Save to disk.
     """
+    from agents.orchestrator import orchestrate
+
     print(f"\n🚀 Java Assistant Console")
     print(f"📌 Feature request: {feature_request}")
 
     # Run orchestrator: now handles class-by-class loop internally
-    generated_code = orchestrate(feature_request, model="mistral")
+    generated_code = orchestrate(feature_request, model=model, project_id=project_id)
 
     if not generated_code:
         raise ValueError("❌ No code generated. Check prompts or model output.")
 
-    # Save each generated file to disk
-    save_generated_files(generated_code, project_path)
+    # Save each generated file to disk, then index only what changed
+    changed = save_generated_files(generated_code, project_path)
+    reindex_files(changed, project_id)
 
     # Optional: print result
     # print("\n✅ Final Generated Code:\n")
     # print(generated_code)
 
-if __name__ == "__main__":
-    project_path = "codebase/src/main/java"
+# =========================
+# Commands
+# =========================
+
+def cmd_index(args):
+    project_ids = sorted(PROJECTS) if args.all else [args.project]
+    for project_id in project_ids:
+        project_path = (None if args.all else args.project_path) or project_config(project_id)["path"]
+        print(f"📦 Project '{project_id}' ({project_path})")
+        if not args.graph_only:
+            print("📂 Scanning Java code for embeddings...")
+            scan_java_code_for_embeddings(project_path, project_id, args.fast)
+        if not args.embeddings_only:
+            print("\n🔄 Building call graph...")
+            build_call_graph(project_path, project_id, args.fast)
+
+def _load_graph(project_id):
+    from analyzer.graph_engine import CallGraph
+
+    path = snapshot_path(project_id)
+    if os.path.exists(path):
+        return CallGraph.load(path)
+    print(f"⚠️ No snapshot at {path}; loading edges from method_calls")
+    import psycopg2
+    from config import DB_CONFIG
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        return CallGraph.from_db(conn, project_id)
+    finally:
+        conn.close()
+
+def cmd_graph(args):
+    if args.build:
+        build_call_graph(_project_path(args), args.project, args.fast)
+        return
+    graph = _load_graph(args.project)
+    if args.callers:
+        results = graph.callers(args.callers)
+    elif args.callees:
+        results = graph.callees(args.callees)
+    elif args.neighbourhood:
+        results = [f"{name} ({hops})" for name, hops in
+                   sorted(graph.neighbourhood(args.neighbourhood, args.k, args.direction).items(), key=lambda kv: kv[1])]
+    elif args.reachable:
+        source, target = args.reachable
+        results = [f"{source} -> {target}: {graph.reachable(source, target)}"]
+    elif args.scc:
+        results = [", ".join(group) for group in graph.strongly_connected_components()]
+    else:
+        results = [f"{len(graph)} nodes, {graph.edge_count} edges"]
+    for line in results:
+        print(line)
+
+def cmd_search(args):
+    from rag.retriever import Retriever
+
+    retriever = Retriever(project_id=args.project)
+    if args.graph:
+        for it in retriever.ask_with_graph(args.query, top_k=args.top_k):
+            print(f"{it['score']:.3f}  {it['class_name']} (hops={it['hops']})  {it['file_path']}")
+        return
+    for file_path, class_name, method_name, _snippet in retriever.ask(args.query, top_k=args.top_k):
+        label = f"{class_name}.{method_name}()" if method_name else class_name
+        print(f"{label}  {file_path}")
+
+def cmd_generate(args):
+    if args.reindex:
+        cmd_index(argparse.Namespace(project=args.project, project_path=args.project_path, all=False,
+                                     graph_only=False, embeddings_only=False, fast=FAST_SCAN))
+    feature_request = args.feature or input("👉 What feature do you want to add?\n> ")
+    run_orchestrator(_base_path(args), feature_request, model=args.model, project_id=args.project)
+
+def cmd_watch(args):
+    from rag.watcher import IndexWatcher
+
+    IndexWatcher(_project_path(args), args.project, polling=args.polling).run()
+
+def _percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    return f"p50={pick(0.5):.2f}ms p95={pick(0.95):.2f}ms max={ordered[-1]:.2f}ms"
+
+def _bench_parsers(project_path):
+    """Coverage and speed of javalang's full parser vs the fast scan over every source file."""
+    from analyzer.fast_scan import compare_parsers
 
-    print("📂 Scanning Java code for embeddings...")
-    scan_java_code_for_embeddings(project_path)
+    paths = []
+    for root, dirs, files in os.walk(project_path):
+        dirs[:] = [d for d in dirs if d not in SKIP_FOLDERS]
+        paths.extend(os.path.join(root, f) for f in files if f.endswith(".java"))
+    report = compare_parsers(paths)
+    for side, label in (("full", "javalang parse"), ("fast", "fast scan")):
+        s = report[side]
+        print(f"⏱️ {label:<14} {s['ok']}/{report['files']} files, {s['types']} types, {s['methods']} methods, "
+              f"{s['calls']} call sites in {s['seconds'] * 1000:.1f}ms")
+    if report["method_recall"] is not None:
+        print(f"📊 Fast scan found {report['method_recall']:.1%} of the methods javalang found")
+    if report["fast"]["seconds"]:
+        print(f"📊 Fast scan speed-up: {report['full']['seconds'] / report['fast']['seconds']:.1f}x")
 
-    print("\n🔄 Building call graph...")
-    build_call_graph(project_path)
+def cmd_bench(args):
+    """Latency of the read paths: graph load, cold vs cached search, graph-expanded search."""
+    if args.parsers:
+        _bench_parsers(_project_path(args))
+        return
+    started = time.perf_counter()
+    from rag.retriever import Retriever
+    retriever = Retriever(project_id=args.project)
+    print(f"⏱️ Import + connect: {(time.perf_counter() - started) * 1000:.1f}ms")
 
-    print("\n🎯 Starting Orchestrator workflow...")
-    feature_request = input("👉 What feature do you want to add?\n> ")
+    started = time.perf_counter()
+    graph = retriever.graph
+    print(f"⏱️ Graph load: {(time.perf_counter() - started) * 1000:.1f}ms ({len(graph)} nodes, {graph.edge_count} edges)")
 
-    run_orchestrator("codebase", feature_request)
+    for label, fn in (("search", retriever.ask), ("graph search", retriever.ask_with_graph)):
+        for query in args.queries:
+            retriever.cache.clear()
+            started = time.perf_counter()
+            fn(query)
+            cold = (time.perf_counter() - started) * 1000
+            warm = []
+            for _ in range(args.iterations):
+                started = time.perf_counter()
+                fn(query)
+                warm.append((time.perf_counter() - started) * 1000)
+            print(f"⏱️ {label:<12} {query!r}: cold={cold:.2f}ms cached {_percentiles(warm)}")
+
+def _add_project_args(p, path=True):
+    p.add_argument("--project", default=DEFAULT_PROJECT, choices=sorted(PROJECTS),
+                   help="which configured project (config.PROJECTS) to work on")
+    if path:
+        p.add_argument("--project-path", help="override the project's configured source path")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Java Assistant")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("index", help="scan embeddings and build the call graph")
+    _add_project_args(p)
+    p.add_argument("--all", action="store_true", help="index every project in config.PROJECTS")
+    only = p.add_mutually_exclusive_group()
+    only.add_argument("--embeddings-only", action="store_true")
+    only.add_argument("--graph-only", action="store_true")
+    p.add_argument("--fast", action="store_true", default=FAST_SCAN,
+                   help="tokenizer-only extraction for every file (no javalang parse)")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser("graph", help="build or query the call graph")
+    _add_project_args(p)
+    p.add_argument("--build", action="store_true", help="rebuild method_calls and the snapshot")
+    p.add_argument("--fast", action="store_true", default=FAST_SCAN,
+                   help="with --build: tokenizer-only extraction for every file")
+    p.add_argument("--callers", metavar="NODE")
+    p.add_argument("--callees", metavar="NODE")
+    p.add_argument("--neighbourhood", metavar="NODE")
+    p.add_argument("-k", type=int, default=1, help="hops for --neighbourhood")
+    p.add_argument("--direction", default="both", choices=["in", "out", "both"])
+    p.add_argument("--reachable", nargs=2, metavar=("SOURCE", "TARGET"))
+    p.add_argument("--scc", action="store_true", help="list mutually recursive method groups")
+    p.set_defaults(func=cmd_graph)
+
+    p = sub.add_parser("search", help="search the code index")
+    p.add_argument("query")
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--graph", action="store_true", help="expand hits along the call graph")
+    _add_project_args(p, path=False)
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("generate", help="run PM → Architect → Developer → Reviewer")
+    p.add_argument("feature", nargs="?")
+    _add_project_args(p)
+    p.add_argument("--base-path", help="where generated files go (default: the project's base_path)")
+    p.add_argument("--model", default="mistral")
+    p.add_argument("--reindex", action="store_true", help="run a full index first")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("watch", help="keep the index current as files change")
+    _add_project_args(p)
+    p.add_argument("--polling", action="store_true", help="poll mtimes instead of using watchdog/inotify")
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("bench", help="measure search and graph latency")
+    p.add_argument("queries", nargs="*", default=["ProductRepository", "add a review to a product"])
+    p.add_argument("--iterations", type=int, default=20)
+    p.add_argument("--parsers", action="store_true",
+                   help="instead: compare javalang's parser with the fast scan on the project's sources")
+    _add_project_args(p)
+    p.set_defaults(func=cmd_bench)
+
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+    args.func(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# prompts/budget.py
+#
+# Prompt budgeting for the agent prompts: token estimates, a per-call budget
+# enforced by trimming the least important sections first, and compaction of
+# the PM plan / architect output so they are not re-sent in full on every call.
+
+import re
+import json
+from collections import namedtuple
+
+from config import PROMPT_TOKEN_BUDGET, PROMPT_CHARS_PER_TOKEN
+
+# trim_order: None = never trimmed; otherwise lower values are trimmed first
+Section = namedtuple("Section", "name text trim_order")
+
+# New architect block: blank line, markdown heading, numbered or bold top-level line
+_BLOCK_START_RE = re.compile(r"^(#|\d+[.)]\s|\*\*|-\s+\*\*)")
+
+
+def estimate_tokens(text):
+    """Rough token count (~PROMPT_CHARS_PER_TOKEN characters per token), no tokenizer needed."""
+    return -(-len(text or "") // PROMPT_CHARS_PER_TOKEN)
+
+
+def truncate_lines(text, max_chars):
+    """
+    Keep whole leading lines of `text` within `max_chars`, noting how many were
+    dropped. A first line longer than `max_chars` is cut mid-line instead of
+    dropping everything.
+    """
+    if len(text) <= max_chars:
+        return text
+    lines = text.split("\n")
+    kept, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > max_chars:
+            break
+        kept.append(line)
+        used += len(line) + 1
+    if not kept and max_chars > 0:
+        return f"{lines[0][:max_chars]}... (truncated to fit the prompt budget)"
+    dropped = len(lines) - len(kept)
+    return "\n".join(kept + [f"... ({dropped} more lines omitted to fit the prompt budget)"])
+
+
+def fit(sections, budget=PROMPT_TOKEN_BUDGET):
+    """
+    Join `sections` in the order given (keep stable text first so the model
+    server can reuse its cached prefix), shrinking trimmable sections, lowest
+    trim_order first, until the prompt's estimate fits `budget` tokens.
+    If the untrimmable sections alone exceed the budget, the prompt is
+    returned over budget with a warning.
+    """
+    texts = [s.text.strip("\n") for s in sections]
+
+    def total():
+        return estimate_tokens("\n\n".join(t for t in texts if t))
+
+    trimmed = []
+    for i in sorted((i for i, s in enumerate(sections) if s.trim_order is not None),
+                    key=lambda i: sections[i].trim_order):
+        over = total() - budget
+        if over <= 0:
+            break
+        texts[i] = truncate_lines(texts[i], max(0, len(texts[i]) - over * PROMPT_CHARS_PER_TOKEN - 80))
+        trimmed.append(sections[i].name)
+    if trimmed:
+        print(f"✂️ Prompt over budget ({budget} tokens); trimmed: {', '.join(trimmed)} -> ~{total()} tokens")
+    if total() > budget:
+        fixed = [s.name for s in sections if s.trim_order is None]
+        print(f"⚠️ Prompt still over budget: ~{total()} > {budget} tokens after trimming "
+              f"(untrimmable: {', '.join(fixed) or 'none'})")
+    return "\n\n".join(t for t in texts if t) + "\n"
+
+
+def compact_plan(pm_plan):
+    """
+    The PM plan as compact JSON, one top-level key (or list item) per line so
+    budget trimming drops trailing keys rather than the whole plan; other
+    values as stripped text.
+    """
+    def dumps(value):
+        return json.dumps(value, ensure_ascii=False, separators=(", ", ": "))
+
+    if isinstance(pm_plan, dict):
+        return "\n".join(f"{dumps(key)}: {dumps(value)}" for key, value in pm_plan.items())
+    if isinstance(pm_plan, list):
+        return "\n".join(f"- {dumps(item)}" for item in pm_plan)
+    return str(pm_plan or "").strip()
+
+
+def _blocks(text):
+    block = []
+    for line in (text or "").split("\n"):
+        if not line.strip() or (_BLOCK_START_RE.match(line) and block):
+            if block:
+                yield "\n".join(block)
+            block = [line] if line.strip() else []
+        else:
+            block.append(line)
+    if block:
+        yield "\n".join(block)
+
+
+def architect_slices(arch_output, target_classes):
+    """
+    Condense the architect's free-form design into one slice per target class:
+    the blocks (paragraphs, headed sections, numbered items) naming that
+    class. A class the design never names gets the whole design.
+    Returns {target_class: text}.
+    """
+    blocks = list(_blocks(arch_output))
+    slices = {}
+    for target in target_classes:
+        name = re.compile(rf"\b{re.escape(target.rsplit('.', 1)[-1])}\b")
+        picked = [b for b in blocks if name.search(b)]
+        slices[target] = "\n\n".join(picked) if picked else (arch_output or "").strip()
+    return slices
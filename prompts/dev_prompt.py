@@ -1,16 +1,25 @@
-def dev_prompt(pm_plan, arch_plan, context=None, target_class=None):
+from prompts.budget import Section, fit, compact_plan
+from config import PROMPT_TOKEN_BUDGET
+
+
+def dev_prompt(pm_plan, arch_plan, context=None, target_class=None, budget=PROMPT_TOKEN_BUDGET):
     """
     Generate EXACTLY ONE Java class that compiles on its own.
 
     Parameters:
       pm_plan: dict or string from PM step
-      arch_plan: string from Architect step
+      arch_plan: string from Architect step (ideally this class's slice, see prompts/budget.architect_slices)
       context: optional dict that may include:
         - package_root: e.g. "com.example.userproductapp" (default inferred from target_class or fallback)
         - entities / repositories / services / controllers: brief lists or notes
         - known_apis: { fqcn: [methodName, ...], ... } of already-approved classes (optional)
         - service_contract: [methodName, ...] for controllers to honor (optional)
+        - related_code: existing source retrieved for this class and its call-graph neighbours (optional)
       target_class: fully-qualified class name to implement, e.g. "com.example.userproductapp.review.ReviewService"
+      budget: token budget; related code, known APIs, architecture and plan are trimmed in that order to fit
+
+    Sections run from the most stable (rules, feature-wide hints, plan) to the
+    most specific (this class), so retries and sibling classes share a prefix.
     """
     context = context or {}
 
@@ -28,24 +37,23 @@ def dev_prompt(pm_plan, arch_plan, context=None, target_class=None):
 
     known_apis = context.get("known_apis", {})
     service_contract = context.get("service_contract", [])
+    related_code = context.get("related_code") or "(none retrieved)"
 
-    return f"""
+    rules = f"""
 You are a senior Java/Spring Boot developer.
 
-Your task:
-- Implement EXACTLY ONE class: {target_class or "(choose one under the existing package root)"}.
+Your task is to implement EXACTLY ONE class, named under YOUR TASK at the end.
 
 OUTPUT FORMAT (STRICT):
-- The FIRST non-empty line MUST be this exact header:
-{expected_header}
-- Immediately after the header, output the COMPLETE Java source for {target_class}.
+- The FIRST non-empty line MUST be the exact header given under YOUR TASK.
+- Immediately after the header, output the COMPLETE Java source for that class.
 - Do NOT include markdown fences (no ``` or ```java), explanations, extra text, or additional files.
 - Produce exactly ONE // FILE: header in total.
 
 HARD REQUIREMENTS:
 1) Package and path MUST align:
    - Header path must begin with: src/main/java/{package_root.replace('.', '/')}/
-   - The Java package declaration must match the path after src/main/java/ (e.g., package {expected_package};)
+   - The Java package declaration must match the path after src/main/java/
    - Do NOT invent alternate roots like com.example.productreviewsystem or pseudo-roots like ".domain.entities"/".repositories"/".domain.services".
 2) No placeholders or stubs:
    - Forbidden anywhere in the file: "// getters and setters", "// add method", "// ...", "// TODO", "to be implemented", "stub".
@@ -60,17 +68,28 @@ Order-resilient context you MAY reuse (optional hints):
 - Repositories: {context.get("repositories", "e.g., UserRepository, ProductRepository")}
 - Services: {context.get("services", "e.g., UserService, ProductService")}
 - Controllers: {context.get("controllers", "e.g., UserController, ProductController")}
-- Known APIs (approved classes & their public methods): {known_apis}
-- Allowed service methods for this controller (if applicable): {service_contract}
-
-Feature Plan (from PM):
-{pm_plan}
+"""
 
-Architecture (from Architect):
-{arch_plan}
+    task = f"""
+YOUR TASK:
+- Implement EXACTLY ONE class: {target_class or "(choose one under the existing package root)"}.
+- The FIRST non-empty line MUST be this exact header:
+{expected_header}
+- Package declaration: package {expected_package};
 
 REMINDERS:
 - Start with the header line EXACTLY as shown.
 - Output ONE file only. No extra commentary. No backticks.
 - Ensure the package matches the header path and the package root {package_root}.
 """
+
+    return fit([
+        Section("rules", rules, None),
+        Section("plan", f"Feature Plan (from PM):\n{compact_plan(pm_plan)}", 3),
+        Section("architecture", f"Architecture for this class (from Architect):\n{arch_plan}", 2),
+        Section("known_apis", f"- Known APIs (approved classes & their public methods): {known_apis}\n"
+                              f"- Allowed service methods for this controller (if applicable): {service_contract}", 1),
+        Section("related_code", "Related existing code (retrieved from the codebase and its call graph; "
+                                f"reuse these APIs, do not copy them):\n{related_code}", 0),
+        Section("task", task, None),
+    ], budget)
@@ -1,4 +1,8 @@
-def reviewer_prompt(pm_plan, dev_code):
+from prompts.budget import Section, fit, compact_plan
+from config import PROMPT_TOKEN_BUDGET
+
+
+def reviewer_prompt(pm_plan, dev_code, budget=PROMPT_TOKEN_BUDGET):
     """
     Strict single-file reviewer.
 
@@ -11,17 +15,15 @@ def reviewer_prompt(pm_plan, dev_code):
       - Constructor injection only (no field-level @Autowired)
       - Surface compile checks (imports & annotations sanity)
       - Reasonable Spring layering rules
+
+    The checklist and plan come before the submission (stable prefix first)
+    and the JSON-only output instruction after it; only the plan is trimmed
+    when over `budget`.
     """
-    return f"""
+    checklist = """
 You are a strict Java/Spring Boot code reviewer.
 
-Review the developer's SINGLE-FILE submission against the PM plan.
-
-PM Plan:
-{pm_plan}
-
-Developer Submission:
-{dev_code}
+Review the developer's SINGLE-FILE submission (at the end) against the PM plan.
 
 Approve ONLY if ALL checks pass:
 
@@ -52,10 +54,18 @@ E) Surface compile sanity:
 F) Layering rules:
    - Controllers call Services; Services call Repositories.
    - REJECT Controller → Repository direct calls.
-
+"""
+    # Output format goes after the submission so it is the last thing the model reads
+    output = """
 Return STRICT JSON only:
-{{
+{
   "status": "approved" or "rejected",
   "issues": ["Short, concrete issues (empty if approved)"]
-}}
+}
 """
+    return fit([
+        Section("checklist", checklist, None),
+        Section("plan", f"PM Plan:\n{compact_plan(pm_plan)}", 0),
+        Section("submission", f"Developer Submission:\n{dev_code}", None),
+        Section("output", output, None),
+    ], budget)
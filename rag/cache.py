@@ -0,0 +1,56 @@
+# rag/cache.py
+
+import time
+import threading
+from collections import OrderedDict
+
+class QueryCache:
+    """
+    Small LRU + TTL cache tagged with an index generation.
+
+    Entries are only valid for the generation they were stored under: the
+    first lookup that sees a newer generation drops everything.
+    """
+
+    def __init__(self, maxsize=512, ttl=600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sync(self, generation):
+        if generation != self.generation:
+            self._data.clear()
+            self.generation = generation
+
+    def get(self, key, generation):
+        """Cached value for `key`, or None on miss/expiry/stale generation."""
+        with self._lock:
+            self._sync(generation)
+            entry = self._data.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, generation):
+        with self._lock:
+            self._sync(generation)
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -1,15 +1,16 @@
 import os
-import javalang
 import hashlib
 import numpy as np
-from db.vector_store import VectorStore
+from config import DEFAULT_PROJECT, SKIP_FOLDERS
+from analyzer.chunker import JavaChunker
+from db.vector_store import VectorStore, content_sha256
 
-SKIP_FOLDERS = {"target", "build", "out", ".idea", ".git"}
 
 class JavaIngestor:
-    def __init__(self, root_path, model="codellama"):
+    def __init__(self, root_path, model="codellama", project_id=DEFAULT_PROJECT):
         self.root_path = root_path
-        self.db = VectorStore()  # No longer using Ollama for embeddings here
+        self.db = VectorStore(project_id)  # No longer using Ollama for embeddings here
+        self.chunker = JavaChunker()
 
     def generate_fake_embedding(self, text):
         """Create a deterministic fake embedding (hash-based)."""
@@ -23,6 +24,7 @@ class JavaIngestor:
     def ingest(self):
         file_count = 0
         print(f"🔍 Starting recursive scan in: {self.root_path}")
+        indexed = self.db.indexed_blobs(whole_file=False)
 
         for subdir, dirs, files in os.walk(self.root_path):
             # Skip unwanted folders
@@ -38,17 +40,23 @@ class JavaIngestor:
                         with open(file_path, "r") as f:
                             code = f.read()
 
+                        # Same content as the indexed blob: its method rows are still valid
+                        if indexed.get(file_path) == content_sha256(code):
+                            continue
+
                         try:
-                            tree = javalang.parse.parse(code)
+                            chunks = self.chunker.chunk(code)
                         except Exception as parse_err:
                             print(f"⚠️ Parse error in {file_path}: {parse_err}")
                             continue
 
-                        for path, class_decl in tree.filter(javalang.tree.ClassDeclaration):
-                            for method in class_decl.methods:
-                                snippet = f"{class_decl.name}.{method.name}()"
-                                fake_embed = self.generate_fake_embedding(snippet)
-                                self.db.insert_embeddings([(file_path, class_decl.name, method.name, snippet, fake_embed)])
+                        # One row per method / constructor / field group (split parts share the name)
+                        lines = code.split("\n")
+                        self.db.insert_spans(file_path, code, [
+                            (c.class_name, c.member, c.start_line, c.end_line,
+                             self.generate_fake_embedding(JavaChunker.text(lines, c)))
+                            for c in chunks
+                        ], replace=file_path in indexed, whole_file=False)
 
                     except Exception as file_err:
                         print(f"⚠️ Could not process {file_path}: {file_err}")
@@ -1,10 +1,82 @@
+import os
+import time
 import hashlib
 import numpy as np
 from db.vector_store import VectorStore
+from db.lexical import is_identifier_query
+from db import index_generation, projects
+from rag.cache import QueryCache
+from analyzer.graph_engine import CallGraph
+from config import (
+    DEFAULT_PROJECT, RETRIEVAL_GRAPH_DEPTH, RETRIEVAL_HOP_DECAY, RETRIEVAL_CHAR_BUDGET,
+    HYBRID_RRF_K, HYBRID_CANDIDATES,
+    RETRIEVER_CACHE_SIZE, RETRIEVER_CACHE_TTL, RETRIEVER_GENERATION_CHECK_SECONDS,
+)
+
+
+def reciprocal_rank_fusion(rankings, top_k, k=HYBRID_RRF_K):
+    """
+    Merge several ranked row lists: each row scores sum(1 / (k + rank)).
+    Rows are identified by (file_path, class_name, method_name).
+    """
+    scores = {}
+    rows = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            key = row[:3]
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+            rows.setdefault(key, row)
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [rows[key] for key in best]
 
 class Retriever:
-    def __init__(self, model="codellama"):
-        self.db = VectorStore()
+    def __init__(self, model="codellama", graph_path=None, project_id=DEFAULT_PROJECT):
+        self.project_id = project_id
+        self.db = VectorStore(project_id)
+        self.graph_path = graph_path or projects.snapshot_path(project_id)
+        self._graph = None
+        self._graph_mtime = None
+        self._graph_generation = None
+        self.cache = QueryCache(RETRIEVER_CACHE_SIZE, RETRIEVER_CACHE_TTL)
+        self._db_generation = None
+        self._seen_local_generation = None
+        self._generation_checked_at = 0.0
+
+    def close(self):
+        try:
+            self.db.conn.close()
+        except Exception:
+            pass
+
+    # ---------- caching ----------
+
+    def generation(self):
+        """
+        Current index generation. Writes from this process are noticed
+        immediately; writes from other processes within
+        RETRIEVER_GENERATION_CHECK_SECONDS.
+        """
+        local = index_generation.local_generation(self.project_id)
+        now = time.monotonic()
+        if (self._db_generation is None or local != self._seen_local_generation
+                or now - self._generation_checked_at >= RETRIEVER_GENERATION_CHECK_SECONDS):
+            self._db_generation = self.db.current_generation()
+            self._seen_local_generation = local
+            self._generation_checked_at = now
+        return self._db_generation
+
+    def _cached(self, key, compute):
+        generation = self.generation()
+        result = self.cache.get(key, generation)
+        if result is None:
+            result = compute()
+            self.cache.put(key, result, generation)
+        return result
+
+    @staticmethod
+    def normalize_query(question):
+        # whitespace only: identifier lookups are case-sensitive
+        return " ".join((question or "").split())
 
     def generate_fake_embedding(self, text):
         """Create the same deterministic fake embedding used in ingestion."""
@@ -14,6 +86,145 @@ class Retriever:
         padded[:len(arr)] = arr[:min(len(arr), 1024)]
         return padded.tolist()
 
-    def ask(self, question):
+    def ask(self, question, top_k=5):
+        """
+        Identifier-like questions are answered from the lexical index alone;
+        everything else fuses lexical and vector rankings. Results are cached
+        until the index generation changes.
+        """
+        question = self.normalize_query(question)
+        return self._cached(("ask", question, top_k), lambda: self._ask(question, top_k))
+
+    def _ask(self, question, top_k):
+        if is_identifier_query(question):
+            rows = self.db.identifier_search(question, top_k)
+            if rows:
+                return rows
+
+        candidates = max(top_k, HYBRID_CANDIDATES)
+        lexical = self.db.lexical_search(question, candidates)
         fake_embed = self.generate_fake_embedding(question)
-        return self.db.search(fake_embed)
+        vector = self.db.search(fake_embed, top_k=candidates)
+        return reciprocal_rank_fusion([lexical, vector], top_k)
+
+    # ---------- graph-aware retrieval ----------
+
+    @property
+    def graph(self):
+        """
+        Call graph used for expansion: the binary snapshot when present
+        (reloaded if it changes on disk), otherwise built from method_calls
+        (rebuilt when the index generation moves).
+        """
+        if os.path.exists(self.graph_path):
+            mtime = os.path.getmtime(self.graph_path)
+            if self._graph is None or mtime != self._graph_mtime:
+                self._graph = CallGraph.load(self.graph_path)
+                self._graph_mtime = mtime
+        else:
+            generation = self.generation()
+            if self._graph is None or self._graph_mtime is not None or generation != self._graph_generation:
+                self._graph = CallGraph.from_db(self.db.conn, self.project_id)
+                self._graph_mtime = None
+                self._graph_generation = generation
+        return self._graph
+
+    def _expand(self, seeds, depth, decay):
+        """
+        Spread each seed class's score to its callers/callees within `depth` hops.
+        Returns {simple_class_name: (score, min_hops)}; classes reached from
+        several hits accumulate score.
+        """
+        graph = self.graph
+        ranked = {}
+        for cls, seed_score in seeds.items():
+            best = {cls: 0}
+            for node in graph.nodes_of_class(cls):
+                for neighbour, hops in graph.neighbourhood(node, depth, "both").items():
+                    other = CallGraph.class_of(neighbour).rsplit(".", 1)[-1]
+                    if other and hops < best.get(other, depth + 1):
+                        best[other] = hops
+            for other, hops in best.items():
+                score, min_hops = ranked.get(other, (0.0, hops))
+                ranked[other] = (score + seed_score * decay ** hops, min(min_hops, hops))
+        return ranked
+
+    @staticmethod
+    def _pack(items, budget_chars):
+        """Greedily keep the highest-scoring snippets that fit in `budget_chars`."""
+        packed = []
+        used = 0
+        for item in items:
+            code = item["code_snippet"] or ""
+            room = budget_chars - used
+            if room <= 0:
+                break
+            if len(code) > room:
+                if packed:
+                    continue
+                code = code[:room]  # always return something for the best hit
+            packed.append({**item, "code_snippet": code})
+            used += len(code)
+        return packed
+
+    def ask_with_graph(self, question, top_k=5, depth=RETRIEVAL_GRAPH_DEPTH,
+                       budget_chars=RETRIEVAL_CHAR_BUDGET, decay=RETRIEVAL_HOP_DECAY):
+        """
+        Vector search, then expand the hits along the call graph.
+
+        Returns a list of dicts (class_name, file_path, code_snippet, score, hops),
+        one per class, best first, packed into `budget_chars`.
+        """
+        question = self.normalize_query(question)
+        graph_version = os.path.getmtime(self.graph_path) if os.path.exists(self.graph_path) else None
+        key = ("graph", question, top_k, depth, budget_chars, decay, graph_version)
+        return self._cached(key, lambda: self._ask_with_graph(question, top_k, depth, budget_chars, decay))
+
+    def _ask_with_graph(self, question, top_k, depth, budget_chars, decay):
+        hits = self.ask(question, top_k)
+        seeds = {}
+        for rank, (_path, class_name, _method, _code) in enumerate(hits):
+            if class_name:
+                seeds[class_name] = seeds.get(class_name, 0.0) + 1.0 / (rank + 1)
+
+        ranked = self._expand(seeds, depth, decay) if depth else {c: (s, 0) for c, s in seeds.items()}
+        snippets = self.db.get_class_snippets(ranked.keys())
+
+        items = [
+            {
+                "class_name": cls,
+                "file_path": snippets[cls][0],
+                "code_snippet": snippets[cls][1],
+                "score": score,
+                "hops": hops,
+            }
+            for cls, (score, hops) in ranked.items()
+            if cls in snippets
+        ]
+        items.sort(key=lambda it: (-it["score"], it["hops"], it["class_name"]))
+        return self._pack(items, budget_chars)
+
+    def context_for(self, question, **kwargs):
+        """
+        Graph-expanded retrieval rendered as one prompt-ready block. If the
+        graph cannot be loaded or expanded, falls back to the plain search hits.
+        """
+        blocks = []
+        try:
+            for it in self.ask_with_graph(question, **kwargs):
+                relation = "direct hit" if it["hops"] == 0 else f"{it['hops']} hop(s) from a hit"
+                blocks.append(f"// {it['class_name']} ({relation}) - {it['file_path']}\n{it['code_snippet']}")
+        except Exception as e:
+            print(f"⚠️ Graph-expanded retrieval failed ({e}); using plain search hits")
+            self.db.conn.rollback()
+            return self._plain_context(question, kwargs.get("top_k", 5),
+                                       kwargs.get("budget_chars", RETRIEVAL_CHAR_BUDGET))
+        return "\n\n".join(blocks)
+
+    def _plain_context(self, question, top_k, budget_chars):
+        items = [
+            {"class_name": f"{cls}.{method}()" if method else cls, "file_path": path, "code_snippet": code}
+            for path, cls, method, code in self.ask(question, top_k)
+        ]
+        return "\n\n".join(f"// {it['class_name']} (search hit) - {it['file_path']}\n{it['code_snippet']}"
+                           for it in self._pack(items, budget_chars))
@@ -0,0 +1,229 @@
+# rag/watcher.py
+#
+# Watch mode: keep java_metadata / method_calls current while the code is
+# edited. File events come from watchdog (inotify on Linux) when it is
+# installed, otherwise from polling mtimes; bursts are debounced into one
+# batch and only the affected files are re-parsed, re-embedded and re-linked.
+#
+#   python main.py watch [--project default]
+
+import os
+import time
+import threading
+
+from config import (
+    DEFAULT_PROJECT, SKIP_FOLDERS,
+    WATCH_DEBOUNCE_SECONDS, WATCH_MAX_DELAY_SECONDS, WATCH_POLL_SECONDS,
+    WATCH_RETRY_SECONDS, WATCH_RETRY_MAX_SECONDS,
+)
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional: fall back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+
+def is_watched(path, root):
+    """
+    A .java file under `root` outside SKIP_FOLDERS. Only the part of the path
+    below `root` is checked, so a project that itself lives under e.g. `build/`
+    is still watched.
+    """
+    if not path.endswith(".java"):
+        return False
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(root))
+    parts = rel.split(os.sep)
+    return parts[0] != os.pardir and not SKIP_FOLDERS.intersection(parts)
+
+
+class ChangeBatch:
+    """Thread-safe set of changed paths under `root`, released once the burst has settled."""
+
+    def __init__(self, root, debounce=WATCH_DEBOUNCE_SECONDS, max_delay=WATCH_MAX_DELAY_SECONDS):
+        self.root = root
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._paths = set()
+        self._first = self._last = None
+        self._cond = threading.Condition()
+
+    def add(self, paths):
+        paths = [p for p in paths if p and is_watched(p, self.root)]
+        if not paths:
+            return
+        with self._cond:
+            now = time.monotonic()
+            self._paths.update(paths)
+            self._first = self._first or now
+            self._last = now
+            self._cond.notify()
+
+    def wait(self, stop):
+        """Block until a settled batch is ready (returns the paths) or `stop` is set (returns [])."""
+        with self._cond:
+            while not stop.is_set():
+                if not self._paths:
+                    self._cond.wait(0.5)
+                    continue
+                now = time.monotonic()
+                due = min(self._last + self.debounce, self._first + self.max_delay)
+                if now >= due:
+                    paths = sorted(self._paths)
+                    self._paths.clear()
+                    self._first = self._last = None
+                    return paths
+                self._cond.wait(due - now)
+        return []
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, batch):
+        super().__init__()
+        self.batch = batch
+
+    def on_any_event(self, event):
+        # opened/closed events also fire when the indexer itself reads a file
+        if event.is_directory or event.event_type not in ("created", "modified", "deleted", "moved"):
+            return
+        self.batch.add([event.src_path, getattr(event, "dest_path", "") or ""])
+
+
+class PollingSource:
+    """Fallback change source: compares (mtime, size) of every watched file each interval."""
+
+    def __init__(self, root, batch, interval=WATCH_POLL_SECONDS):
+        self.root = root
+        self.batch = batch
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="watch-poll", daemon=True)
+        self._state = self._snapshot()
+
+    def _snapshot(self):
+        state = {}
+        for root, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d not in SKIP_FOLDERS]
+            for file in files:
+                if file.endswith(".java"):
+                    path = os.path.join(root, file)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    state[path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            state = self._snapshot()
+            changed = [p for p in state.keys() | self._state.keys() if state.get(p) != self._state.get(p)]
+            self._state = state
+            self.batch.add(changed)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class IndexWatcher:
+    """
+    Watches one project's source tree and re-indexes changed files in batches.
+    `apply(paths)` defaults to main.reindex_files with connections kept open
+    across batches; a failed batch drops them and is retried with backoff.
+    """
+
+    retry_delay = WATCH_RETRY_SECONDS
+    retry_max = WATCH_RETRY_MAX_SECONDS
+
+    def __init__(self, project_path, project_id=DEFAULT_PROJECT, apply=None, polling=False):
+        self.project_path = project_path
+        self.project_id = project_id
+        self.batch = ChangeBatch(project_path)
+        self._apply = apply
+        self._stop = threading.Event()
+        self.polling = polling or Observer is None
+        self._vector_store = self._builder = None
+
+    def _normalize(self, path):
+        """Event paths in the form the index stores them (project_path + relative path)."""
+        rel = os.path.relpath(os.path.abspath(path), os.path.abspath(self.project_path))
+        return os.path.join(self.project_path, rel)
+
+    def apply(self, paths):
+        if self._apply is not None:
+            return self._apply(paths)
+        import main
+        from analyzer.call_graph import CallGraphBuilder
+        from db.vector_store import VectorStore
+
+        try:
+            if self._vector_store is None:
+                self._vector_store = VectorStore(self.project_id)
+                self._builder = CallGraphBuilder(self.project_path, self.project_id)
+            return main.reindex_files(paths, self.project_id,
+                                      vector_store=self._vector_store, builder=self._builder)
+        except Exception:
+            self._drop_connections()
+            raise
+
+    def _drop_connections(self):
+        """Close the cached connections (possibly broken) so the next batch reconnects."""
+        for owner in (self._vector_store, self._builder):
+            conn = getattr(owner, "conn", None)
+            if conn is None:
+                continue
+            try:
+                conn.rollback()
+                conn.close()
+            except Exception as e:
+                print(f"⚠️ Could not close index connection: {e}")
+        self._vector_store = self._builder = None
+
+    def _source(self):
+        if self.polling:
+            return PollingSource(self.project_path, self.batch)
+        observer = Observer()
+        observer.schedule(_EventHandler(self.batch), self.project_path, recursive=True)
+        return observer
+
+    def run(self):
+        """Watch until `stop()` (or Ctrl+C)."""
+        source = self._source()
+        source.start()
+        mode = "polling" if self.polling else "inotify/watchdog"
+        print(f"👀 Watching {self.project_path} for project '{self.project_id}' ({mode}); Ctrl+C to stop")
+        failures = 0
+        try:
+            while not self._stop.is_set():
+                paths = self.batch.wait(self._stop)
+                if not paths:
+                    continue
+                paths = [self._normalize(p) for p in paths]
+                started = time.perf_counter()
+                try:
+                    done = self.apply(paths)
+                except Exception as e:
+                    # keep the paths: they are retried with the next batch, after a backoff
+                    failures += 1
+                    delay = min(self.retry_delay * 2 ** (failures - 1), self.retry_max)
+                    print(f"⚠️ Re-index of {len(paths)} file(s) failed, retrying in {delay:.0f}s: {e}")
+                    self._stop.wait(delay)
+                    self.batch.add(paths)
+                    continue
+                failures = 0
+                print(f"⏱️ Index updated for {len(done or [])}/{len(paths)} changed file(s) "
+                      f"in {time.perf_counter() - started:.2f}s")
+        except KeyboardInterrupt:
+            print("\n👋 Stopping watch mode")
+        finally:
+            source.stop()
+            if not self.polling:
+                source.join()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,80 @@
+"""In-memory stand-ins for the Postgres-backed stores."""
+
+
+class FakeConn:
+    def __init__(self, error=None):
+        self.error = error  # raised by cursor(), to simulate a failing statement
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self, *args, **kwargs):
+        raise self.error or NotImplementedError("FakeConn does not run SQL")
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStore:
+    """Stands in for VectorStore: fixed search hits and one snippet per class."""
+
+    def __init__(self, project_id=None):
+        self.conn = FakeConn()
+        self.generation = 1
+        self.hits = [("src/OrderService.java", "OrderService", None, "class OrderService {}")]
+        self.snippets = {
+            "OrderService": ("src/OrderService.java", "class OrderService {}"),
+            "OrderRepository": ("src/OrderRepository.java", "interface OrderRepository {}"),
+            "Unrelated": ("src/Unrelated.java", "class Unrelated {}"),
+        }
+        self.searches = 0
+
+    def current_generation(self):
+        return self.generation
+
+    def identifier_search(self, identifier, top_k=5):
+        self.searches += 1
+        return [h for h in self.hits if h[1] == identifier][:top_k]
+
+    def lexical_search(self, query, top_k=5):
+        self.searches += 1
+        return self.hits[:top_k]
+
+    def search(self, embedding, top_k=5):
+        return self.hits[:top_k]
+
+    def get_class_snippets(self, class_names):
+        return {c: self.snippets[c] for c in class_names if c in self.snippets}
+
+
+class RecordingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = conn.rowcount
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append((" ".join(sql.split()), params))
+
+
+class RecordingConn(FakeConn):
+    """Records the SQL run through its cursors instead of executing it."""
+
+    def __init__(self):
+        super().__init__()
+        self.statements = []
+        self.rowcount = 0  # reported by every statement
+
+    def cursor(self, *args, **kwargs):
+        return RecordingCursor(self)
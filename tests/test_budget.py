@@ -0,0 +1,77 @@
+from prompts.budget import (
+    Section, architect_slices, compact_plan, estimate_tokens, fit, truncate_lines,
+)
+from prompts.reviewer_prompt import reviewer_prompt
+
+PLAN = {
+    "feature": "Product reviews",
+    "entities": ["Review"],
+    "endpoints": ["POST /products/{id}/reviews", "GET /products/{id}/reviews"],
+    "rules": "rating between 1 and 5",
+}
+
+
+def test_estimate_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_compact_plan_puts_each_key_on_its_own_line():
+    lines = compact_plan(PLAN).split("\n")
+    assert lines[0] == '"feature": "Product reviews"'
+    assert lines[2] == '"endpoints": ["POST /products/{id}/reviews", "GET /products/{id}/reviews"]'
+    assert len(lines) == 4
+    assert compact_plan(["a", {"b": 1}]) == '- "a"\n- {"b": 1}'
+    assert compact_plan("  free text \n") == "free text"
+
+
+def test_trimming_the_plan_keeps_its_leading_keys():
+    plan = compact_plan(PLAN)
+    trimmed = truncate_lines(plan, len(plan) - 10)
+    assert trimmed.startswith('"feature": "Product reviews"\n"entities": ["Review"]')
+    assert trimmed.endswith("(1 more lines omitted to fit the prompt budget)")
+
+
+def test_a_single_long_line_is_cut_not_dropped():
+    assert truncate_lines("x" * 100, 10) == "x" * 10 + "... (truncated to fit the prompt budget)"
+
+
+def test_fit_trims_lowest_trim_order_first():
+    related = "\n".join(f"line {i} of related code" for i in range(200))
+    plan = compact_plan(PLAN)
+    prompt = fit([
+        Section("rules", "Write Java.", None),
+        Section("plan", plan, 2),
+        Section("related", related, 1),
+    ], budget=estimate_tokens(plan) + 100)
+    assert "Write Java." in prompt and plan in prompt
+    assert "more lines omitted" in prompt
+    assert estimate_tokens(prompt) <= estimate_tokens(plan) + 100
+
+
+def test_fit_warns_when_untrimmable_sections_exceed_the_budget(capsys):
+    prompt = fit([Section("rules", "r" * 400, None), Section("plan", "p" * 40, 0)], budget=50)
+    assert "r" * 400 in prompt
+    assert "still over budget" in capsys.readouterr().out
+
+
+def test_fit_leaves_small_prompts_alone(capsys):
+    assert fit([Section("a", "one", None), Section("b", "two", 0)], budget=100) == "one\n\ntwo\n"
+    assert capsys.readouterr().out == ""
+
+
+def test_architect_slices_pick_blocks_naming_the_class():
+    design = "# Review\nEntity with rating.\n\n# ReviewService\nValidates ratings.\n\nShared notes."
+    slices = architect_slices(design, ["a.Review", "a.ReviewService", "a.Other"])
+    assert slices["a.Review"] == "# Review\nEntity with rating."
+    assert slices["a.ReviewService"] == "# ReviewService\nValidates ratings."
+    assert slices["a.Other"] == design
+
+
+def test_reviewer_prompt_ends_with_the_json_instruction():
+    code = "// FILE: src/main/java/a/A.java\npackage a;\nclass A {}"
+    prompt = reviewer_prompt({"feature": "orders"}, code)
+    assert prompt.index("Approve ONLY if") < prompt.index("PM Plan:") < prompt.index(code)
+    assert prompt.index(code) < prompt.index("Return STRICT JSON only:")
+    assert prompt.rstrip().endswith("}")
@@ -0,0 +1,42 @@
+from analyzer.call_graph import CallGraphBuilder
+from analyzer.symbol_index import SymbolIndex
+from tests.fakes import RecordingConn
+
+
+def builder():
+    b = CallGraphBuilder.__new__(CallGraphBuilder)
+    b.project_id = "orders"
+    b.fast = False
+    b.conn = RecordingConn()
+    return b
+
+
+def indexed(*paths):
+    index = SymbolIndex()
+    for path in paths:
+        index.add_file(path, "package a;\nclass %s {}\n" % path.rsplit("/", 1)[-1][:-5])
+    return index
+
+
+def deletes(conn):
+    return [(sql, params) for sql, params in conn.statements if sql.startswith("DELETE")]
+
+
+def test_full_scan_drops_rows_of_files_no_longer_present():
+    b = builder()
+    b._insert_calls(indexed("src/A.java", "src/B.java"), full=True)
+    stmts = deletes(b.conn)
+    prune = [s for s in stmts if "file_path IS NULL OR NOT (file_path = ANY" in s[0]]
+    assert prune == [(
+        "DELETE FROM method_calls WHERE project_id = %s AND (file_path IS NULL OR NOT (file_path = ANY(%s)));",
+        ("orders", ["src/A.java", "src/B.java"]),
+    )]
+    pruned_tables = {s.split()[2] for s, _ in stmts if "NOT (file_path = ANY" in s}
+    assert {"symbol_types", "symbol_imports", "symbol_fields", "symbol_methods"} <= pruned_tables
+    assert b.conn.commits == 1
+
+
+def test_incremental_updates_only_touch_their_files():
+    b = builder()
+    b._insert_calls(indexed("src/A.java"))
+    assert [s for s, _ in deletes(b.conn) if "NOT (" in s] == []
@@ -0,0 +1,82 @@
+import pytest
+
+from analyzer.chunker import FIELDS, JavaChunker
+from analyzer.symbol_index import CONSTRUCTOR
+
+ORDERS = """package a.b;
+
+import java.util.List;
+
+public class Orders {
+    private final List<String> ids;
+    private int count;
+
+    public Orders(List<String> ids) {
+        this.ids = ids;
+    }
+
+    @Override
+    public String toString() { return "Orders{" + ids + "}"; }
+
+    public int total(int a, int b) {
+        int x = a + b;
+        int y = x * 2;
+        int z = y - a;
+        if (z > 10) {
+            z = z - 10;
+        }
+        int w = z + y + x;
+        return w + count;
+    }
+
+    static class Line {
+        String sku;
+        String sku() { return sku; }
+    }
+}
+"""
+
+
+@pytest.fixture(params=[False, True], ids=["parser", "fast"])
+def chunker(request):
+    return JavaChunker(max_tokens=40, fast=request.param)
+
+
+def spans(chunks):
+    return [(c.class_name, c.member, c.start_line, c.end_line, c.part) for c in chunks]
+
+
+def test_one_chunk_per_member_in_source_order(chunker):
+    assert spans(chunker.chunk(ORDERS)) == [
+        ("Orders", FIELDS, 6, 7, None),
+        ("Orders", CONSTRUCTOR, 9, 11, None),
+        ("Orders", "toString", 13, 14, None),   # annotation line included
+        ("Orders", "total", 16, 19, 1),
+        ("Orders", "total", 20, 25, 2),
+        ("Line", FIELDS, 28, 28, None),
+        ("Line", "sku", 29, 29, None),
+    ]
+
+
+def test_oversized_methods_split_at_top_level_statements(chunker):
+    parts = [c for c in chunker.chunk(ORDERS) if c.member == "total"]
+    assert all(c.tokens <= 40 for c in parts)
+    # the if-block stays whole: the cut is after `int z = y - a;`, not inside the braces
+    assert parts[0].end_line == 19 and parts[1].start_line == 20
+
+
+def test_chunk_text_carries_the_class_header(chunker):
+    chunk = next(c for c in chunker.chunk(ORDERS) if c.member == "sku")
+    text = JavaChunker.text(ORDERS.split("\n"), chunk)
+    assert text == "package a.b;\n    static class Line {\n        String sku() { return sku; }"
+
+
+def test_large_limit_keeps_members_whole():
+    chunks = JavaChunker(max_tokens=10_000).chunk(ORDERS)
+    assert [c.part for c in chunks] == [None] * len(chunks)
+    assert len(chunks) == 6
+
+
+def test_unparseable_files_fall_back_to_the_fast_scan():
+    record = "package a;\n\npublic record Point(int x, int y) {\n    int sum() { return x + y; }\n}\n"
+    assert spans(JavaChunker().chunk(record)) == [("Point", "sum", 4, 4, None)]
@@ -0,0 +1,32 @@
+import pytest
+
+import main
+
+
+def test_index_only_flags_are_mutually_exclusive(capsys):
+    parser = main.build_parser()
+    assert parser.parse_args(["index", "--graph-only"]).graph_only
+    with pytest.raises(SystemExit):
+        parser.parse_args(["index", "--embeddings-only", "--graph-only"])
+    assert "not allowed with argument" in capsys.readouterr().err
+
+
+def test_graph_loaded_from_the_db_closes_its_connection(monkeypatch, tmp_path):
+    import psycopg2
+    from analyzer.graph_engine import CallGraph
+
+    closed = []
+
+    class Conn:
+        def close(self):
+            closed.append(True)
+
+    def from_db(conn, project_id):
+        raise RuntimeError("query failed")
+
+    monkeypatch.setattr(main, "snapshot_path", lambda project_id: str(tmp_path / "missing.bin"))
+    monkeypatch.setattr(psycopg2, "connect", lambda **kw: Conn())
+    monkeypatch.setattr(CallGraph, "from_db", staticmethod(from_db))
+    with pytest.raises(RuntimeError):
+        main._load_graph("default")
+    assert closed == [True]
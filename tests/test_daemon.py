@@ -0,0 +1,107 @@
+import json
+import os
+import stat
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import config
+
+from daemon import server
+
+
+class EchoDaemon:
+    """Stands in for AssistantDaemon: every endpoint echoes its params."""
+
+    def __getattr__(self, name):
+        return lambda params: {"endpoint": name, "params": params}
+
+
+@pytest.fixture
+def url():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), server.make_handler(EchoDaemon(), "s3cret"))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def call(url, path, body=None, headers=None):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    req = urllib.request.Request(url + path, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+AUTH = {"Authorization": "Bearer s3cret", "Content-Type": "application/json"}
+
+
+def test_requests_without_the_token_are_refused(url):
+    assert call(url, "/health")[0] == 401
+    assert call(url, "/search", {"query": "x"}, {"Content-Type": "application/json"})[0] == 401
+    assert call(url, "/search", {"query": "x"}, {**AUTH, "Authorization": "Bearer wrong"})[0] == 401
+
+
+def test_posts_must_be_json(url):
+    status, body = call(url, "/search", {"query": "x"}, {"Authorization": "Bearer s3cret",
+                                                          "Content-Type": "text/plain"})
+    assert status == 415
+
+
+def test_authorized_json_requests_are_dispatched(url):
+    status, body = call(url, "/search", {"query": "x"}, {**AUTH, "Content-Type": "application/json; charset=utf-8"})
+    assert status == 200
+    assert body["endpoint"] == "search" and body["params"] == {"query": "x"}
+    assert call(url, "/health", headers=AUTH)[0] == 200
+
+
+def test_paths_outside_the_project_are_rejected(tmp_path, monkeypatch):
+    src = tmp_path / "repo" / "src"
+    src.mkdir(parents=True)
+    monkeypatch.setitem(config.PROJECTS, "t",
+                        {"path": str(src), "base_path": str(tmp_path / "repo")})
+
+    inside = str(src / "a" / "A.java")
+    assert server.checked_path(inside, "t", "path") == inside
+    assert server.checked_path(str(tmp_path / "repo"), "t", "base_path")
+    for outside in (str(tmp_path / "other"), str(src / ".." / ".." / "x"), str(tmp_path / "repo" / "src2")):
+        with pytest.raises(PermissionError):
+            server.checked_path(outside, "t", "path")
+
+
+def test_symlinks_cannot_escape_the_project(tmp_path, monkeypatch):
+    root = tmp_path / "repo"
+    root.mkdir()
+    os.symlink(tmp_path, root / "escape")
+    monkeypatch.setitem(config.PROJECTS, "t",
+                        {"path": str(root), "base_path": str(root)})
+    with pytest.raises(PermissionError):
+        server.checked_path(str(root / "escape" / "secret.java"), "t", "path")
+
+
+def test_token_file_is_private(tmp_path):
+    path = tmp_path / "dir" / "daemon.token"
+    token = server.write_token(str(path))
+    assert path.read_text() == token and len(token) >= 32
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert server.write_token(str(path)) != token
+
+
+def test_serve_leaves_the_token_alone_when_the_port_is_taken(monkeypatch):
+    calls = []
+    monkeypatch.setattr(server, "AssistantDaemon", lambda **kw: calls.append("daemon"))
+    monkeypatch.setattr(server, "write_token", lambda: calls.append("token"))
+    taken = ThreadingHTTPServer(("127.0.0.1", 0), server.make_handler(EchoDaemon(), "s3cret"))
+    try:
+        with pytest.raises(OSError):
+            server.serve("127.0.0.1", taken.server_address[1])
+    finally:
+        taken.server_close()
+    assert calls == []
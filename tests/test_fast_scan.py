@@ -0,0 +1,223 @@
+import javalang
+import pytest
+
+from analyzer.fast_scan import CHAINED, base_type, fast_scan, strip_text_blocks
+from analyzer.symbol_index import CONSTRUCTOR, _body_members
+
+# Sources javalang can parse: the fast scan must find what the full parser finds.
+PARSEABLE = {
+    "enum_constant_bodies": """
+package a;
+public enum Op {
+    PLUS("+") {
+        int apply(int x, int y) { return add(x, y); }
+    },
+    MINUS("-");
+    private final String sign;
+    Op(String sign) { this.sign = sign; }
+    int apply(int x, int y) { return x - y; }
+    static int add(int x, int y) { return x + y; }
+}
+""",
+    "annotation_elements": """
+package a;
+public @interface Route {
+    String value();
+    String[] methods() default {"GET"};
+    int timeout() default 30;
+}
+""",
+    "nested_generics": """
+package a;
+import java.util.*;
+public class Cache<K, V extends Comparable<V>> {
+    private final Map<K, List<Map<String, V>>> data = new HashMap<>();
+    public Map<K, List<V>> group(List<Map<K, V>> rows, int limit) { return new HashMap<>(); }
+    public <T extends List<List<V>>> T wrap(T value) { return value; }
+}
+""",
+    "chained_calls": """
+package a;
+import java.util.List;
+public class Report {
+    private Repo repo;
+    public String render(List<String> names) {
+        return repo.find(names.get(0)).orElseThrow().toString().trim();
+    }
+    static class Repo {
+        java.util.Optional<String> find(String name) { return java.util.Optional.of(name); }
+    }
+}
+""",
+    "initializers": """
+package a;
+public class Config {
+    static final java.util.Map<String, String> DEFAULTS = new java.util.HashMap<>();
+    static { DEFAULTS.put("a", "b"); }
+    { reset(); }
+    void reset() {}
+}
+""",
+    "explicit_constructor_calls": """
+package a;
+public class Account extends Base {
+    private final String id;
+    public Account() { this("anonymous"); }
+    public Account(String id) {
+        super(id.length());
+        this.id = id;
+    }
+    static class Base {
+        Base(int size) { super(); }
+    }
+}
+""",
+}
+
+
+def javalang_members(code):
+    members = set()
+    for _, decl in javalang.parse.parse(code).filter(javalang.tree.TypeDeclaration):
+        for m in _body_members(decl):
+            if isinstance(m, javalang.tree.ConstructorDeclaration):
+                members.add((decl.name, CONSTRUCTOR))
+            elif isinstance(m, (javalang.tree.MethodDeclaration, javalang.tree.AnnotationMethod)):
+                members.add((decl.name, m.name))
+    return members
+
+
+def fast_members(code):
+    return {(t.name.rsplit(".", 1)[-1], m.name) for t in fast_scan(code).types for m in t.methods}
+
+
+def javalang_call_names(code):
+    """Invocations and `new`s inside method, constructor and initializer bodies (not field initializers)."""
+    names = []
+    for _, decl in javalang.parse.parse(code).filter(javalang.tree.TypeDeclaration):
+        for m in _body_members(decl):
+            if isinstance(m, (javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)):
+                bodies = [m]
+            elif isinstance(m, list):
+                bodies = m
+            else:
+                continue
+            for body in bodies:
+                names += [n.member for _, n in body.filter(javalang.tree.MethodInvocation)]
+                names += [n.type.name for _, n in body.filter(javalang.tree.ClassCreator)]
+                names += [CONSTRUCTOR for _, n in body.filter(javalang.tree.SuperConstructorInvocation)]
+                names += [CONSTRUCTOR for _, n in body.filter(javalang.tree.ExplicitConstructorInvocation)]
+    return sorted(names)
+
+
+def fast_call_names(code):
+    return sorted(c.name for t in fast_scan(code).types for m in t.methods + t.initializers for c in m.calls)
+
+
+@pytest.mark.parametrize("name", ["annotation_elements", "nested_generics", "chained_calls", "initializers",
+                                  "explicit_constructor_calls"])
+def test_members_match_javalang(name):
+    assert fast_members(PARSEABLE[name]) == javalang_members(PARSEABLE[name])
+
+
+def test_enum_constant_bodies_are_not_members_of_the_enum():
+    # javalang lists the constant body's methods separately; only the enum's own members count
+    assert fast_members(PARSEABLE["enum_constant_bodies"]) == {
+        ("Op", CONSTRUCTOR), ("Op", "apply"), ("Op", "add"),
+    }
+    op = fast_scan(PARSEABLE["enum_constant_bodies"]).types[0]
+    assert op.fields == {"sign": "String"}
+
+
+@pytest.mark.parametrize("name", ["nested_generics", "chained_calls", "initializers", "explicit_constructor_calls"])
+def test_calls_match_javalang(name):
+    assert fast_call_names(PARSEABLE[name]) == javalang_call_names(PARSEABLE[name])
+
+
+def test_shift_like_generics_close_correctly():
+    cache = fast_scan(PARSEABLE["nested_generics"]).types[0]
+    assert cache.fields == {"data": "Map<K, List<Map<String, V>>>"}
+    group, wrap = cache.methods
+    assert group.return_type == "Map<K, List<V>>"
+    assert group.params == [("List<Map<K, V>>", "rows"), ("int", "limit")]
+    assert wrap.params == [("T", "value")]
+    assert base_type(cache.fields["data"]) == "Map"
+
+
+def test_chained_calls_point_at_their_receiver_call():
+    render = fast_scan(PARSEABLE["chained_calls"]).types[0].methods[0]
+    calls = render.calls
+    assert [(c.qualifier, c.name) for c in calls] == [
+        ("repo", "find"), ("names", "get"), (CHAINED, "orElseThrow"), (CHAINED, "toString"), (CHAINED, "trim"),
+    ]
+    assert [calls[c.prev].name for c in calls if c.qualifier == CHAINED] == ["find", "orElseThrow", "toString"]
+
+
+def test_annotation_elements_with_defaults():
+    route = fast_scan(PARSEABLE["annotation_elements"]).types[0]
+    assert route.kind == "annotation"
+    assert [(m.name, m.return_type) for m in route.methods] == [
+        ("value", "String"), ("methods", "String[]"), ("timeout", "int"),
+    ]
+
+
+def test_initializer_blocks_get_synthetic_members():
+    config = fast_scan(PARSEABLE["initializers"]).types[0]
+    assert [(m.name, [c.name for c in m.calls]) for m in config.initializers] == [
+        ("<clinit>", ["put"]), ("<init>", ["reset"]),
+    ]
+
+
+def test_explicit_constructor_calls_are_init_calls():
+    account, base = fast_scan(PARSEABLE["explicit_constructor_calls"]).types
+    assert account.superclass == "Base" and base.superclass is None
+    assert [[(c.qualifier, c.name) for c in m.calls] for m in account.methods] == [
+        [("this", CONSTRUCTOR)], [("super", CONSTRUCTOR), ("id", "length")],
+    ]
+    assert [(c.qualifier, c.name) for c in base.methods[0].calls] == [("super", CONSTRUCTOR)]
+
+
+# Syntax javalang rejects: checked against hand-written expectations.
+
+RECORD = """
+package a;
+public record Point(int x, java.util.List<Integer> ys) implements Comparable<Point> {
+    public Point {
+        if (x < 0) throw new IllegalArgumentException();
+    }
+    static Point origin() { return new Point(0, java.util.List.of()); }
+    public int compareTo(Point o) { return Integer.compare(x, o.x()); }
+}
+"""
+
+TEXT_BLOCK = '''
+package a;
+public class Sql {
+    static final String QUERY = """
+        SELECT id, name
+        FROM users WHERE name = '{'
+        """;
+    String run() { return execute(QUERY); }
+}
+'''
+
+
+def test_records_are_rejected_by_javalang_but_scanned():
+    with pytest.raises(javalang.parser.JavaSyntaxError):
+        javalang.parse.parse(RECORD)
+    (point,) = fast_scan(RECORD).types
+    assert (point.kind, point.supertypes) == ("record", ["Comparable"])
+    assert point.fields == {"x": "int", "ys": "java.util.List<Integer>"}
+    assert [(m.name, m.is_constructor) for m in point.methods] == [
+        (CONSTRUCTOR, True), ("origin", False), ("compareTo", False),
+    ]
+    assert [c.name for c in point.methods[1].calls] == ["Point", "of"]
+
+
+def test_text_blocks_keep_line_numbers_and_hide_their_braces():
+    assert strip_text_blocks('x = """\n  a\n  """;') == 'x = ""\n\n;'
+    (sql,) = fast_scan(TEXT_BLOCK).types
+    assert sql.fields == {"QUERY": "String"}
+    (run,) = sql.methods
+    assert (run.name, run.start_line, run.end_line) == ("run", 8, 8)
+    assert [(c.qualifier, c.name) for c in run.calls] == [(None, "execute")]
+    assert sql.end_line == 9
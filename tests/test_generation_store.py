@@ -0,0 +1,104 @@
+import pytest
+
+from db.generation_store import GenerationStore, extract_method_contracts
+from tests.fakes import FakeConn
+
+REVIEW = """
+package com.example.review;
+
+import java.util.List;
+
+public class Review {
+    private int rating;
+
+    public int getRating() { return rating; }
+    protected void setRating(int rating) { this.rating = rating; }
+    String describe(List<String> tags, int limit) { return ""; }
+
+    public static class Builder {
+        private Builder self() { return this; }
+        public Review build() { return new Review(); }
+    }
+}
+"""
+
+
+def make_store(error=None, contracts=None):
+    """A GenerationStore without a database: contracts are pre-loaded, SQL fails."""
+    store = GenerationStore.__new__(GenerationStore)
+    store.project_id = "orders"
+    store.conn = FakeConn(error)
+    store._contracts = {"f1": contracts if contracts is not None else {}}
+    return store
+
+
+def test_contracts_are_keyed_per_type_including_nested():
+    contracts = extract_method_contracts(REVIEW)
+    assert {name: [m["method_name"] for m in ms] for name, ms in contracts.items()} == {
+        "Review": ["getRating", "setRating", "describe"],
+        "Review.Builder": ["self", "build"],
+    }
+
+
+def test_contract_rows_carry_visibility_and_signature():
+    rows = {m["method_name"]: m for m in extract_method_contracts(REVIEW)["Review"]}
+    assert rows["getRating"]["visibility"] == "public"
+    assert rows["setRating"]["visibility"] == "protected"
+    assert rows["describe"]["visibility"] == "package"
+    assert rows["describe"]["signature"] == "describe(List<String>,int)"
+    assert rows["describe"]["params"] == "List<String> tags, int limit"
+    assert extract_method_contracts(REVIEW)["Review.Builder"][0]["visibility"] == "private"
+
+
+def test_unparseable_source_has_no_contracts():
+    assert extract_method_contracts("public class {") == {}
+
+
+def test_add_class_caches_nested_types_under_their_own_fqcn():
+    store = make_store()
+    batch = store.begin_feature("f1")
+    batch.add_class("com.example.review.Review", "src/Review.java", "com.example.review", REVIEW)
+
+    contracts = store.get_all_contracts("f1")
+    assert contracts["com.example.review.Review"] == ["getRating", "describe"]
+    assert contracts["com.example.review.Review.Builder"] == ["build"]
+    assert len(batch.classes) == 1 and len(batch.methods) == 5  # every method is stored
+    assert {row[0] for row in batch.classes + batch.methods} == {"orders"}
+
+
+def test_rollback_forgets_only_this_batchs_contracts():
+    store = make_store(contracts={"com.example.Existing": ["find"]})
+    with pytest.raises(RuntimeError):
+        with store.begin_feature("f1") as batch:
+            batch.add_class("com.example.review.Review", "src/Review.java", "com.example.review", REVIEW)
+            raise RuntimeError("reviewer crashed")
+
+    assert store.get_all_contracts("f1") == {"com.example.Existing": ["find"]}
+    assert batch.classes == [] and batch.methods == []
+
+
+def test_failed_commit_rolls_back_the_connection():
+    store = make_store(error=RuntimeError("connection lost"))
+    batch = store.begin_feature("f1")
+    batch.add_class("com.example.review.Review", "src/Review.java", "com.example.review", REVIEW)
+
+    with pytest.raises(RuntimeError):
+        batch.commit()
+    assert store.conn.rollbacks == 1
+    assert store.conn.commits == 0
+    assert batch.classes  # still buffered, so the caller can retry
+
+
+def test_private_and_protected_methods_are_not_offered_as_known_apis():
+    store = make_store()
+    batch = store.begin_feature("f1")
+    batch.add_class("com.example.review.ReviewService", "src/ReviewService.java", "com.example.review", """
+package com.example.review;
+
+public class ReviewService {
+    public Review create(int rating) { return validate(rating); }
+    private Review validate(int rating) { return null; }
+}
+""")
+    assert store.get_all_contracts("f1") == {"com.example.review.ReviewService": ["create"]}
+    assert store.service_contract("f1", "com.example.review.ReviewController") == ["create"]
@@ -0,0 +1,88 @@
+import pytest
+
+from analyzer.graph_engine import CallGraph, node_name
+
+EDGES = [
+    ("a.A.run", "a.B.load"),
+    ("a.B.load", "a.C.fetch"),
+    ("a.C.fetch", "a.B.load"),      # B.load <-> C.fetch form a cycle
+    ("a.A.run", "a.D.log"),
+    ("a.A.run", "a.D.log"),         # duplicate edge
+    ("a.E.main", "a.A.run"),
+]
+
+
+@pytest.fixture
+def graph():
+    return CallGraph.from_edges(EDGES)
+
+
+def test_node_name():
+    assert node_name("a.B", "load") == "a.B.load"
+    assert node_name(None, "load") == "load"
+
+
+def test_duplicate_edges_collapse(graph):
+    assert len(graph) == 5
+    assert graph.edge_count == 5
+    assert sorted(graph.callees("a.A.run")) == ["a.B.load", "a.D.log"]
+    assert sorted(graph.callers("a.B.load")) == ["a.A.run", "a.C.fetch"]
+
+
+def test_unknown_node_raises(graph):
+    with pytest.raises(KeyError):
+        graph.callees("a.Z.nope")
+
+
+def test_neighbourhood_directions(graph):
+    assert graph.neighbourhood("a.A.run", k=1, direction="out") == {"a.B.load": 1, "a.D.log": 1}
+    assert graph.neighbourhood("a.A.run", k=1, direction="in") == {"a.E.main": 1}
+    assert graph.neighbourhood("a.A.run", k=2, direction="out") == {"a.B.load": 1, "a.D.log": 1, "a.C.fetch": 2}
+    with pytest.raises(ValueError):
+        graph.neighbourhood("a.A.run", direction="sideways")
+
+
+def test_reachable(graph):
+    assert graph.reachable("a.E.main", "a.C.fetch")
+    assert not graph.reachable("a.C.fetch", "a.E.main")
+    assert not graph.reachable("a.E.main", "a.C.fetch", max_depth=2)
+    assert graph.reachable("a.D.log", "a.D.log")
+
+
+def test_strongly_connected_components(graph):
+    assert [sorted(g) for g in graph.strongly_connected_components()] == [["a.B.load", "a.C.fetch"]]
+    assert sorted(graph.component_of("a.C.fetch")) == ["a.B.load", "a.C.fetch"]
+    assert graph.component_of("a.D.log") == ["a.D.log"]
+
+
+def test_nodes_of_class(graph):
+    assert graph.nodes_of_class("a.B") == ["a.B.load"]
+    assert graph.nodes_of_class("B") == ["a.B.load"]
+    assert graph.nodes_of_class("Missing") == []
+
+
+def test_save_load_round_trip(graph, tmp_path):
+    graph.strongly_connected_components()   # persisted with the snapshot
+    path = tmp_path / "graph.bin"
+    graph.save(path)
+    loaded = CallGraph.load(path)
+    assert loaded.names == graph.names
+    assert loaded.edge_count == graph.edge_count
+    assert sorted(loaded.callers("a.B.load")) == sorted(graph.callers("a.B.load"))
+    assert loaded._scc is not None
+    assert [sorted(g) for g in loaded.strongly_connected_components()] == [["a.B.load", "a.C.fetch"]]
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "bogus.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        CallGraph.load(path)
+
+
+def test_empty_graph(tmp_path):
+    graph = CallGraph.from_edges([])
+    assert len(graph) == 0
+    assert graph.strongly_connected_components() == []
+    graph.save(tmp_path / "empty.bin")
+    assert len(CallGraph.load(tmp_path / "empty.bin")) == 0
@@ -0,0 +1,39 @@
+from db.lexical import split_identifier, lexical_document, is_identifier_query, tsquery_terms
+from rag.retriever import reciprocal_rank_fusion
+
+
+def test_split_identifier():
+    assert split_identifier("findByUserId") == ["find", "by", "user", "id"]
+    assert split_identifier("HTTPServerError") == ["http", "server", "error"]
+    assert split_identifier("MAX_SIZE") == ["max", "size"]
+    assert split_identifier("") == []
+
+
+def test_lexical_document_skips_keywords_and_duplicates():
+    doc = lexical_document("UserRepository", "findById", "public User findById(long id) { return null; }").split()
+    assert doc[:4] == ["userrepository", "user", "repository", "findbyid"]
+    assert "public" not in doc and "return" not in doc
+    assert len(doc) == len(set(doc))
+
+
+def test_is_identifier_query():
+    for q in ("ProductRepository", "findByUserId", "Product.findById", "Product#findById", "  Foo  "):
+        assert is_identifier_query(q), q
+    for q in ("add a review", "Product.find.by", "", "1abc"):
+        assert not is_identifier_query(q), q
+
+
+def test_tsquery_terms():
+    assert tsquery_terms("findById for users") == "findbyid | find | by | id | for | users"
+    assert tsquery_terms("!!! ???") == ""
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    a = ("a.java", "A", None, "a")
+    b = ("b.java", "B", None, "b")
+    c = ("c.java", "C", "run", "c")
+    lexical = [b, a]
+    vector = [c, a, b]
+    assert reciprocal_rank_fusion([lexical, vector], top_k=2) == [b, a]
+    assert reciprocal_rank_fusion([[], vector], top_k=5) == vector
+    assert reciprocal_rank_fusion([[], []], top_k=5) == []
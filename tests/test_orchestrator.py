@@ -0,0 +1,82 @@
+import pytest
+
+from agents import orchestrator
+
+
+class FailingBatch:
+    def add_class(self, *args, **kwargs):
+        pass
+
+    def commit(self):
+        raise RuntimeError("server closed the connection unexpectedly")
+
+
+class FakeGenerationStore:
+    instances = []
+
+    def __init__(self, project_id):
+        self.closed = False
+        FakeGenerationStore.instances.append(self)
+
+    def begin_feature(self, feature_id):
+        return FailingBatch()
+
+    def get_all_contracts(self, feature_id):
+        return {}
+
+    def service_contract(self, feature_id, fqcn):
+        return []
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRetriever:
+    instances = []
+
+    def __init__(self, project_id):
+        self.closed = False
+        FakeRetriever.instances.append(self)
+
+    def context_for(self, question):
+        return ""
+
+    def close(self):
+        self.closed = True
+
+
+def fake_model(prompt, model=None):
+    role, _, target = prompt.partition(" ")
+    if role == "DEV":
+        package, name = target.rsplit(".", 1)
+        return f"// FILE: src/main/java/{target.replace('.', '/')}.java\npackage {package};\n\npublic class {name} {{}}\n"
+    if role == "REVIEW":
+        return '{"status": "approved", "issues": []}'
+    return '{"feature": "reviews"}'
+
+
+@pytest.fixture
+def patched(monkeypatch):
+    FakeGenerationStore.instances.clear()
+    FakeRetriever.instances.clear()
+    monkeypatch.setattr(orchestrator, "GenerationStore", FakeGenerationStore)
+    monkeypatch.setattr(orchestrator, "Retriever", lambda project_id: FakeRetriever(project_id))
+    monkeypatch.setattr(orchestrator, "call_model", fake_model)
+    monkeypatch.setattr(orchestrator, "pm_prompt", lambda request: "PM")
+    monkeypatch.setattr(orchestrator, "architect_prompt", lambda plan: "ARCH")
+    monkeypatch.setattr(orchestrator, "dev_prompt", lambda plan, arch, context, target: f"DEV {target}")
+    monkeypatch.setattr(orchestrator, "reviewer_prompt", lambda plan, code: "REVIEW")
+
+
+def test_a_failed_final_commit_still_returns_the_approved_code(patched, capsys):
+    code = orchestrator.orchestrate("Add product reviews")
+    assert code.count("// FILE:") == 4
+    assert "Could not record the approved classes" in capsys.readouterr().out
+    assert FakeGenerationStore.instances[0].closed
+    assert FakeRetriever.instances[0].closed
+
+
+def test_a_callers_retriever_is_left_open(patched):
+    mine = FakeRetriever("default")
+    orchestrator.orchestrate("Add product reviews", retriever=mine)
+    assert not mine.closed
@@ -0,0 +1,48 @@
+import rag.cache as cache_module
+import rag.retriever as retriever_module
+from rag.cache import QueryCache
+from rag.retriever import Retriever
+from tests.fakes import FakeStore
+
+
+def test_lru_eviction():
+    cache = QueryCache(maxsize=2, ttl=60)
+    cache.put("a", 1, generation=1)
+    cache.put("b", 2, generation=1)
+    assert cache.get("a", 1) == 1          # a becomes most recent
+    cache.put("c", 3, generation=1)
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == 1 and cache.get("c", 1) == 3
+
+
+def test_new_generation_drops_everything():
+    cache = QueryCache()
+    cache.put("a", 1, generation=1)
+    assert cache.get("a", 2) is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = QueryCache(ttl=10)
+    cache.put("a", 1, generation=1)
+    now[0] += 5
+    assert cache.get("a", 1) == 1
+    now[0] += 6
+    assert cache.get("a", 1) is None
+
+
+def test_retriever_caches_until_generation_moves(tmp_path, monkeypatch):
+    monkeypatch.setattr(retriever_module, "VectorStore", FakeStore)
+    monkeypatch.setattr(retriever_module, "RETRIEVER_GENERATION_CHECK_SECONDS", 0.0)
+    retriever = Retriever(graph_path=str(tmp_path / "missing.bin"))
+
+    first = retriever.ask("OrderService")
+    assert retriever.ask("  OrderService ") == first     # whitespace-normalised key
+    assert retriever.db.searches == 1
+
+    retriever.db.generation += 1                         # another process re-indexed
+    retriever.ask("OrderService")
+    assert retriever.db.searches == 2
@@ -0,0 +1,44 @@
+import pytest
+
+import rag.retriever as retriever_module
+from analyzer.graph_engine import CallGraph
+from rag.retriever import Retriever
+from tests.fakes import FakeStore
+
+
+@pytest.fixture
+def retriever(tmp_path, monkeypatch):
+    monkeypatch.setattr(retriever_module, "VectorStore", FakeStore)
+    graph = CallGraph.from_edges([
+        ("app.OrderController.create", "app.OrderService.place"),
+        ("app.OrderService.place", "app.OrderRepository.save"),
+    ])
+    path = tmp_path / "graph.bin"
+    graph.save(path)
+    return Retriever(graph_path=str(path))
+
+
+def test_graph_expansion_scores_by_hops(retriever):
+    items = retriever.ask_with_graph("place an order", depth=1)
+    assert [(it["class_name"], it["hops"]) for it in items] == [("OrderService", 0), ("OrderRepository", 1)]
+    assert items[0]["score"] > items[1]["score"]
+
+
+def test_pack_respects_budget(retriever):
+    items = [
+        {"class_name": "A", "code_snippet": "a" * 60},
+        {"class_name": "B", "code_snippet": "b" * 60},
+        {"class_name": "C", "code_snippet": "c" * 30},
+    ]
+    assert [it["class_name"] for it in Retriever._pack(items, 100)] == ["A", "C"]
+    assert Retriever._pack(items, 10)[0]["code_snippet"] == "a" * 10   # best hit is cut, never dropped
+
+
+def test_context_for_falls_back_to_plain_hits(retriever, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("relation method_calls does not exist")
+
+    monkeypatch.setattr(retriever, "ask_with_graph", broken)
+    context = retriever.context_for("place an order")
+    assert "OrderService (search hit)" in context
+    assert retriever.db.conn.rollbacks == 1
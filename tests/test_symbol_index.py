@@ -0,0 +1,207 @@
+import pytest
+
+from analyzer.symbol_index import SymbolIndex, CONSTRUCTOR, STATIC_INIT
+
+FILES = {
+    "src/a/util/Strings.java": """
+package a.util;
+
+public final class Strings {
+    public static String trimAll(String s) { return s.trim(); }
+    public static boolean blank(String s) { return s.isEmpty(); }
+}
+""",
+    "src/a/repo/UserRepository.java": """
+package a.repo;
+
+import a.model.User;
+
+public interface UserRepository {
+    User findById(long id);
+    void save(User user);
+}
+""",
+    "src/a/model/User.java": """
+package a.model;
+
+public class User {
+    private String name;
+    public String getName() { return name; }
+    public static class Address {
+        public String city() { return ""; }
+    }
+}
+""",
+    "src/a/service/UserService.java": """
+package a.service;
+
+import a.model.User;
+import a.repo.UserRepository;
+import static a.util.Strings.trimAll;
+import static a.util.Strings.*;
+
+public class UserService {
+    private final UserRepository repo;
+
+    public UserService(UserRepository repo) { this.repo = repo; }
+
+    public String rename(long id, String name) {
+        User user = repo.findById(id);
+        String clean = trimAll(name);
+        if (blank(clean)) { helper(); }
+        repo.save(new User());
+        user.getName().length();
+        return repo.findById(id).getName();
+    }
+
+    private void helper() { repo.delete(); }
+}
+""",
+}
+
+
+def build(fast=False):
+    index = SymbolIndex()
+    for path, code in FILES.items():
+        assert index.add_file(path, code, fast=fast)
+    return index
+
+
+def calls_of(index, method):
+    return {(callee, name, resolved) for _, _, caller, callee, name, resolved in index.resolve_calls()
+            if caller == method}
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_resolves_fields_locals_chains_and_constructors(fast):
+    calls = calls_of(build(fast), "rename")
+    assert ("a.repo.UserRepository", "findById", True) in calls
+    assert ("a.repo.UserRepository", "save", True) in calls
+    assert ("a.model.User", CONSTRUCTOR, True) in calls
+    assert ("a.model.User", "getName", True) in calls        # via local and via chained call
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_static_imports(fast):
+    calls = calls_of(build(fast), "rename")
+    assert ("a.util.Strings", "trimAll", True) in calls       # single static import
+    assert ("a.util.Strings", "blank", True) in calls         # static wildcard import
+    assert ("a.service.UserService", "helper", True) in calls
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_unknown_methods_are_unresolved(fast):
+    index = build(fast)
+    assert ("a.repo.UserRepository", "delete", False) in calls_of(index, "helper")
+    # String is known by name only: its methods are not indexed
+    assert ("java.lang.String", "length", False) in calls_of(index, "rename")
+
+
+def test_nested_types_and_signatures():
+    index = build()
+    assert "a.model.User.Address" in index.types
+    assert index.resolve_type("User.Address", index.types["a.service.UserService"]["ctx"]) == "a.model.User.Address"
+    methods = {m["signature"]: m for m in index.types["a.service.UserService"]["methods"]}
+    assert set(methods) == {"<init>(UserRepository)", "rename(long,String)", "helper()"}
+    assert methods["helper()"]["visibility"] == "private"
+
+
+def test_re_adding_a_file_replaces_its_declarations():
+    index = build()
+    assert index.add_file("src/a/model/User.java", "package a.model;\npublic class Person {}\n")
+    assert "a.model.User" not in index.types
+    assert "a.model.Person" in index.types
+    assert "User" not in index.simple_names
+
+
+def test_unreadable_file_leaves_nothing_stale():
+    index = build()
+    assert not index.add_file("src/a/model/User.java", "class Broken { \u0000 #")
+    assert "a.model.User" not in index.types
+    assert all(ctx.file_path != "src/a/model/User.java" for ctx, _ in index.units)
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_initializer_calls_get_synthetic_callers(fast):
+    index = build(fast)
+    assert index.add_file("src/a/util/Registry.java", """
+package a.util;
+
+public class Registry {
+    static {
+        if (Strings.blank("")) { Strings.trimAll(" "); }
+    }
+    {
+        Strings.blank("x");
+    }
+}
+""", fast=fast)
+    assert calls_of(index, STATIC_INIT) == {("a.util.Strings", "blank", True), ("a.util.Strings", "trimAll", True)}
+    assert ("a.util.Strings", "blank", True) in calls_of(index, CONSTRUCTOR)
+    # initializers are callers only, never declared members
+    assert index.types["a.util.Registry"]["methods"] == []
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_explicit_constructor_calls_target_this_or_the_superclass(fast):
+    index = build(fast)
+    assert index.add_file("src/a/model/Admin.java", """
+package a.model;
+
+import java.io.Serializable;
+
+public class Admin extends User implements Serializable {
+    public Admin() { this(0); }
+    public Admin(int level) { super(); }
+    static class Audit implements Serializable {
+        Audit() { super(); }
+    }
+}
+""", fast=fast)
+    calls = {(caller, callee, name, resolved) for _, caller, _, callee, name, resolved in index.resolve_calls()
+             if caller.startswith("a.model.Admin")}
+    assert calls == {
+        ("a.model.Admin", "a.model.Admin", CONSTRUCTOR, True),
+        ("a.model.Admin", "a.model.User", CONSTRUCTOR, True),
+        ("a.model.Admin.Audit", "java.lang.Object", CONSTRUCTOR, True),
+    }
+
+
+def test_unimported_types_are_not_guessed_from_their_simple_name():
+    index = build()
+    assert index.add_file("src/b/Audit.java", """
+package b;
+
+public class Audit {
+    void log(User user) { user.getName(); }
+}
+""")
+    # a.model.User is the only `User`, but b.Audit neither imports it nor shares its package
+    assert ("User", "getName", False) in calls_of(index, "log")
+
+
+def test_member_types_of_enclosing_classes_resolve():
+    index = build()
+    assert index.add_file("src/a/model/Order.java", """
+package a.model;
+
+public class Order {
+    static class Line { int qty() { return 1; } }
+    static class Totals {
+        int sum(Line line) { return line.qty(); }
+    }
+}
+""")
+    assert ("a.model.Order.Line", "qty", True) in calls_of(index, "sum")
+
+
+def test_pathologically_nested_input_falls_back_to_the_fast_scan(monkeypatch):
+    import javalang
+
+    def overflow(self):
+        raise RecursionError("maximum recursion depth exceeded")
+
+    monkeypatch.setattr(javalang.parser.Parser, "parse", overflow)
+    index = SymbolIndex()
+    assert index.add_file("src/a/A.java", "package a;\nclass A { void f() {} }\n")
+    assert [m["name"] for m in index.types["a.A"]["methods"]] == ["f"]
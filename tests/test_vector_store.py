@@ -0,0 +1,93 @@
+import main
+from db import vector_store
+from db.vector_store import VectorStore, content_sha256, slice_lines
+from tests.fakes import RecordingConn
+
+SOURCE = "package a;\n\nclass A {\n    void run() {\n        go();\n    }\n}\n"
+
+
+def pg_slice(text, start, end):
+    """What SNIPPET_SQL computes: string_to_array(text, E'\\n')[start:end], rejoined.
+    Postgres arrays are 1-based and clamp out-of-range bounds."""
+    parts = text.split("\n")
+    lo, hi = max(start, 1), min(end, len(parts))
+    return "\n".join(parts[i - 1] for i in range(lo, hi + 1))
+
+
+def test_slice_lines_matches_the_sql_slice():
+    last = SOURCE.count("\n") + 1  # the whole-file span _embed_file stores
+    for start, end in [(1, last), (4, 6), (3, 3), (6, 100), (8, 8), (5, 4)]:
+        assert slice_lines(SOURCE, start, end) == pg_slice(SOURCE, start, end)
+    assert slice_lines(SOURCE, 1, last) == SOURCE
+    assert slice_lines(SOURCE, 4, 6) == "    void run() {\n        go();\n    }"
+
+
+def store(monkeypatch):
+    monkeypatch.setattr(vector_store, "execute_values", lambda cur, sql, rows: cur.execute(sql, rows))
+    s = VectorStore.__new__(VectorStore)
+    s.project_id = "orders"
+    s.conn = RecordingConn()
+    return s
+
+
+def test_replacing_spans_deletes_and_inserts_in_one_transaction(monkeypatch):
+    s = store(monkeypatch)
+    sha = s.insert_spans("src/A.java", SOURCE, [("A", None, 1, 8, [0.0]), ("A", "run", 4, 6, [0.0])],
+                         replace=True)
+    sqls = [sql.split(" (")[0] for sql, _ in s.conn.statements]
+    assert sqls[:3] == ["DELETE FROM java_metadata WHERE project_id = %s AND file_path = ANY(%s) AND",
+                        "INSERT INTO source_blobs", "INSERT INTO java_metadata"]
+    assert s.conn.statements[0][1] == ("orders", ["src/A.java"], None, None)
+    rows = s.conn.statements[2][1]
+    assert [(r[4], r[5], r[6]) for r in rows] == [(sha, 1, 8), (sha, 4, 6)]
+    assert s.conn.commits == 1
+
+
+def test_prune_blobs_drops_blobs_no_project_references(monkeypatch):
+    s = store(monkeypatch)
+    s.conn.rowcount = 2
+    assert s.prune_blobs() == 2
+    (sql, params), = s.conn.statements
+    assert sql == ("DELETE FROM source_blobs b WHERE NOT EXISTS "
+                   "(SELECT 1 FROM java_metadata j WHERE j.blob_sha = b.sha256);")
+    assert "project_id" not in sql  # blobs are shared across projects
+    assert s.conn.commits == 1
+
+
+class ScanStore:
+    """Stands in for VectorStore in scan_java_code_for_embeddings."""
+
+    def __init__(self, indexed):
+        self.indexed = indexed
+        self.inserted = []
+        self.deleted = []
+
+    def __call__(self, project_id):
+        return self
+
+    def indexed_blobs(self):
+        return dict(self.indexed)
+
+    def generate_embedding(self, text):
+        return [0.0]
+
+    def insert_spans(self, file_path, content, spans, replace=False):
+        self.inserted.append((file_path, replace))
+
+    def delete_files(self, file_paths):
+        self.deleted.extend(file_paths)
+
+    def prune_blobs(self):
+        return 0
+
+
+def test_scan_skips_unchanged_files_and_drops_deleted_ones(monkeypatch, tmp_path):
+    (tmp_path / "Same.java").write_text("class Same {}\n")
+    (tmp_path / "Edited.java").write_text("class Edited { void x() {} }\n")
+    same, edited, gone = (str(tmp_path / n) for n in ("Same.java", "Edited.java", "Gone.java"))
+    fake = ScanStore({same: content_sha256("class Same {}\n"), edited: "old-sha", gone: "sha",
+                      "/elsewhere/Other.java": "sha"})
+    monkeypatch.setattr(vector_store, "VectorStore", fake)
+    main.scan_java_code_for_embeddings(str(tmp_path), "orders")
+    assert fake.inserted == [(edited, True)]
+    assert fake.deleted == [gone]
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+import main
+from analyzer import call_graph
+from db import vector_store
+from rag.watcher import ChangeBatch, IndexWatcher, is_watched
+from tests.fakes import FakeConn
+
+
+def test_only_java_files_below_the_root_outside_skip_folders(tmp_path):
+    root = tmp_path / "build" / "checkout" / "src"
+    assert is_watched(str(root / "a" / "A.java"), str(root))  # `build` is above the root
+    assert not is_watched(str(root / "target" / "A.java"), str(root))
+    assert not is_watched(str(root / "a" / "A.class"), str(root))
+    assert not is_watched(str(tmp_path / "other" / "A.java"), str(root))
+
+
+def test_a_burst_is_released_once_it_settles(tmp_path):
+    batch = ChangeBatch(str(tmp_path), debounce=0.1, max_delay=5)
+    stop = threading.Event()
+    started = time.monotonic()
+    batch.add([str(tmp_path / "B.java"), str(tmp_path / "A.java"), str(tmp_path / "notes.txt")])
+    batch.add([str(tmp_path / "A.java")])
+    assert batch.wait(stop) == [str(tmp_path / "A.java"), str(tmp_path / "B.java")]
+    assert time.monotonic() - started >= 0.1
+
+
+def test_max_delay_caps_a_continuous_burst(tmp_path):
+    batch = ChangeBatch(str(tmp_path), debounce=0.2, max_delay=0.3)
+    stop = threading.Event()
+    feeding = threading.Event()
+
+    def feed():
+        while not feeding.is_set():
+            batch.add([str(tmp_path / "A.java")])
+            time.sleep(0.02)
+
+    threading.Thread(target=feed, daemon=True).start()
+    started = time.monotonic()
+    assert batch.wait(stop) == [str(tmp_path / "A.java")]
+    feeding.set()
+    assert time.monotonic() - started < 1.0
+
+
+def test_wait_returns_nothing_once_stopped(tmp_path):
+    stop = threading.Event()
+    stop.set()
+    assert ChangeBatch(str(tmp_path)).wait(stop) == []
+
+
+def test_failed_batches_are_retried(tmp_path):
+    calls = []
+
+    def apply(paths):
+        calls.append(paths)
+        if len(calls) == 1:
+            raise RuntimeError("database restarting")
+        watcher.stop()
+        return paths
+
+    watcher = IndexWatcher(str(tmp_path), "default", apply=apply, polling=True)
+    watcher.batch.debounce = 0.05
+    watcher.retry_delay = 0.01
+    path = os.path.join(str(tmp_path), "A.java")
+    watcher.batch.add([path])
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert calls == [[path], [path]]
+
+
+class Connected:
+    """Stands in for VectorStore / CallGraphBuilder: holds one fresh connection."""
+
+    def __init__(self, *args):
+        self.conn = FakeConn()
+
+
+def test_a_failed_batch_reconnects_after_a_backoff(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "VectorStore", Connected)
+    monkeypatch.setattr(call_graph, "CallGraphBuilder", Connected)
+    stores = []
+
+    def reindex_files(paths, project_id, vector_store, builder):
+        stores.append((vector_store, builder, time.monotonic()))
+        if len(stores) == 1:
+            raise RuntimeError("server closed the connection unexpectedly")
+        watcher.stop()
+        return paths
+
+    monkeypatch.setattr(main, "reindex_files", reindex_files)
+    watcher = IndexWatcher(str(tmp_path), "default", polling=True)
+    watcher.batch.debounce = 0.01
+    watcher.retry_delay = 0.2
+    watcher.batch.add([os.path.join(str(tmp_path), "A.java")])
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+
+    (broken_store, broken_builder, failed_at), (store, builder, retried_at) = stores
+    assert broken_store.conn.rollbacks == 1 and broken_store.conn.closed
+    assert broken_builder.conn.rollbacks == 1 and broken_builder.conn.closed
+    assert store is not broken_store and builder is not broken_builder
+    assert not store.conn.closed
+    assert retried_at - failed_at >= 0.2
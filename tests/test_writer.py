@@ -0,0 +1,91 @@
+import os
+import stat
+
+import pytest
+
+from codegen.writer import GeneratedFileWriter, normalize_rel_path, write_if_changed
+
+BLOB = """// FILE: com/example/A.java
+class A {}
+// FILE: src/main/java/com/example/B.java
+class B {}
+"""
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_header_paths_are_placed_under_src_main_java():
+    assert normalize_rel_path("com/example/A.java") == "src/main/java/com/example/A.java"
+    assert normalize_rel_path("src/main/java/x/B.java") == "src/main/java/x/B.java"
+    assert normalize_rel_path("README.md") == "README.md"
+
+
+def test_unchanged_files_are_not_rewritten(tmp_path):
+    w = GeneratedFileWriter(str(tmp_path))
+    changed, unchanged = w.write_blob(BLOB)
+    assert len(changed) == 2 and unchanged == []
+
+    a = tmp_path / "src/main/java/com/example/A.java"
+    assert a.read_text() == "class A {}"
+    os.utime(a, (1, 1))
+    changed, unchanged = w.write_blob(BLOB)
+    assert changed == [] and len(unchanged) == 2
+    assert os.stat(a).st_mtime == 1
+
+
+def test_new_files_get_the_umask_mode(tmp_path):
+    umask = os.umask(0o027)
+    try:
+        path = tmp_path / "New.java"
+        assert write_if_changed(str(path), "class New {}")
+        assert mode(path) == 0o640
+    finally:
+        os.umask(umask)
+
+
+@pytest.mark.parametrize("header", ["/etc/cron.d/job", "C:/Windows/x.java", "../outside/A.java",
+                                    "com/example/../../../../A.java", "src\\..\\..\\A.java"])
+def test_headers_escaping_the_base_path_are_rejected(header):
+    with pytest.raises(ValueError):
+        normalize_rel_path(header)
+
+
+def test_escaping_blocks_are_skipped_not_written(tmp_path):
+    base = tmp_path / "project"
+    blob = "// FILE: ../evil.java\nclass Evil {}\n// FILE: com/example/A.java\nclass A {}\n"
+    changed, _ = GeneratedFileWriter(str(base)).write_blob(blob)
+    assert changed == [str(base / "src/main/java/com/example/A.java")]
+    assert not (tmp_path / "evil.java").exists()
+
+
+def test_symlinked_directories_cannot_escape_the_base_path(tmp_path):
+    base = tmp_path / "project"
+    base.mkdir()
+    os.symlink(tmp_path, base / "link")
+    changed, _ = GeneratedFileWriter(str(base)).write_blob("// FILE: link/evil.java\nclass Evil {}\n")
+    assert changed == []
+    assert not (tmp_path / "evil.java").exists()
+
+
+def test_replacing_a_file_keeps_its_mode(tmp_path):
+    path = tmp_path / "Script.java"
+    path.write_text("old")
+    os.chmod(path, 0o754)
+    assert write_if_changed(str(path), "new")
+    assert path.read_text() == "new"
+    assert mode(path) == 0o754
+
+
+def test_no_temp_files_are_left_behind(tmp_path):
+    write_if_changed(str(tmp_path / "X.java"), "x")
+    write_if_changed(str(tmp_path / "X.java"), "y")
+    assert os.listdir(tmp_path) == ["X.java"]
+
+
+def test_large_batches_use_the_thread_pool(tmp_path):
+    files = {str(tmp_path / f"F{i}.java"): f"class F{i} {{}}" for i in range(20)}
+    changed, unchanged = GeneratedFileWriter(str(tmp_path), parallel_threshold=4).write_files(files)
+    assert sorted(changed) == sorted(files) and unchanged == []
+    assert all(open(p).read() == c for p, c in files.items())